@@ -0,0 +1,23 @@
+import os
+from typing import Union
+from ..models.elementList import MachineModel
+from ..models.elementRegistry import element_dict_adapter
+
+
+def export_machine_json(filename: str, machine: MachineModel, indent: Union[int, None] = None) -> None:
+    """
+    Write every element of a machine to a JSON file, as an object of name -> element
+
+    The elements are serialized by pydantic-core in a single call, without
+    :meth:`base_model_dump`; the file can be loaded with :func:`read_JSON_File`, or as
+    the element_list of :class:`PAdantic`.
+
+    :param str filename: JSON file
+    :param MachineModel machine: Machine to export
+    :param int indent: Indentation of the output; compact if None
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    os.makedirs(directory, exist_ok=True)
+    data = element_dict_adapter().dump_json(dict(machine.elements.items()), indent=indent)
+    with open(filename, "wb") as stream:
+        stream.write(data)
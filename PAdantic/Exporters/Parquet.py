@@ -0,0 +1,176 @@
+import json
+import os
+import types
+import typing
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Tuple, Type, Union
+from pydantic import BaseModel, RootModel
+from ..models.elementList import MachineModel
+from ..models.element import PhysicalElement
+from ..Importers.Parquet_Loader import (
+    CLASS_COLUMN,
+    PARQUET_METADATA_KEY,
+    PARQUET_VERSION,
+    POSITION_COLUMN,
+    _import_pyarrow,
+)
+
+# Arrow types of the scalar field annotations; other fields are written as JSON strings
+ARROW_TYPES = {bool: "bool_", int: "int64", float: "float64", str: "string"}
+
+
+def _optional(annotation: Any) -> Tuple[Any, bool]:
+    """Unwrap Optional[X], returning X and whether the annotation allowed None"""
+    if typing.get_origin(annotation) in (Union, types.UnionType):
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0], True
+    return annotation, False
+
+
+def _dumps_fields(annotation: Any) -> bool:
+    """Whether a model is dumped as a dictionary of its own fields, which can be columns"""
+    return (
+        isinstance(annotation, type)
+        and issubclass(annotation, BaseModel)
+        and not issubclass(annotation, RootModel)
+        and not annotation.__pydantic_decorators__.model_serializers
+        and not annotation.model_computed_fields
+        and annotation.model_config.get("extra") != "allow"
+    )
+
+
+@lru_cache(maxsize=None)
+def model_columns(
+    cls: Type[BaseModel], path: Tuple[str, ...] = ()
+) -> Tuple[Tuple[Tuple[str, ...], Union[str, None]], ...]:
+    """
+    Describe the columns holding the fields of a model class
+
+    bool, int, float and str fields (optionally None) have typed columns. Nested models
+    that are always set and are dumped as a dictionary of their fields have a column
+    per field, named by its dotted path (e.g. "physical.length"); all other fields,
+    including nested models without fields, hold JSON strings.
+
+    :param cls: Model class
+    :param tuple path: Path of the model in the element
+    :returns: (path, name of the pyarrow type, or None for JSON) for each column
+    """
+    columns = []
+    for name, field in cls.model_fields.items():
+        if field.exclude:
+            continue
+        annotation, optional = _optional(field.annotation)
+        nested = ()
+        if not optional and _dumps_fields(annotation):
+            nested = model_columns(annotation, path + (name,))
+        if nested:
+            columns.extend(nested)
+        else:
+            # models without fields are written as JSON too, so that they are not lost
+            columns.append((path + (name,), ARROW_TYPES.get(annotation)))
+    columns.extend((path + (name,), None) for name in cls.model_computed_fields)
+    return tuple(columns)
+
+
+def _get_path(value: dict, path: Tuple[str, ...]) -> Any:
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def machine_tables(elements: Iterable[PhysicalElement]) -> list:
+    """
+    Convert elements into Arrow tables, one per element class
+
+    The tables share a schema built from the fields of the element classes (see
+    :func:`model_columns`), so the columns and their types do not depend on the values.
+    A column a class does not have is null for its rows. The "_class" and "_position"
+    columns hold the class and the position of each element, and the schema metadata
+    lists the columns of each class, so the dictionaries can be rebuilt with
+    :func:`table_to_element_dicts`.
+
+    :param elements: Elements to convert
+    :returns: List of pyarrow.Table
+    """
+    pyarrow = _import_pyarrow()
+    groups: Dict[type, List[Tuple[int, dict]]] = {}
+    for position, elem in enumerate(elements):
+        groups.setdefault(type(elem), []).append((position, elem.base_model_dump()))
+    columns: Dict[str, Tuple[Tuple[str, ...], Union[str, None]]] = {}
+    classes: Dict[str, List[str]] = {}
+    for cls in groups:
+        classes[cls.__name__] = []
+        for path, arrow_type in model_columns(cls):
+            name = ".".join(path)
+            classes[cls.__name__].append(name)
+            if name in columns and columns[name][1] != arrow_type:
+                # the classes have different types for the field
+                columns[name] = (path, None)
+            else:
+                columns.setdefault(name, (path, arrow_type))
+    metadata = {
+        "version": PARQUET_VERSION,
+        "columns": {name: list(path) for name, (path, _) in columns.items()},
+        "json": [name for name, (_, arrow_type) in columns.items() if arrow_type is None],
+        "classes": classes,
+    }
+    schema = pyarrow.schema(
+        [
+            (name, getattr(pyarrow, arrow_type or "string")())
+            for name, (_, arrow_type) in columns.items()
+        ]
+        + [(CLASS_COLUMN, pyarrow.string()), (POSITION_COLUMN, pyarrow.int64())],
+        metadata={PARQUET_METADATA_KEY: json.dumps(metadata)},
+    )
+    tables = []
+    for cls, rows in groups.items():
+        names = set(classes[cls.__name__])
+        arrays = []
+        for name, (path, arrow_type) in columns.items():
+            values = [_get_path(dump, path) if name in names else None for _, dump in rows]
+            if arrow_type is None:
+                values = [None if v is None else json.dumps(v) for v in values]
+            arrays.append(pyarrow.array(values, schema.field(name).type))
+        arrays.append(pyarrow.array([cls.__name__] * len(rows), pyarrow.string()))
+        arrays.append(pyarrow.array([position for position, _ in rows], pyarrow.int64()))
+        tables.append(pyarrow.Table.from_arrays(arrays, schema=schema))
+    return tables
+
+
+def machine_table(elements: Iterable[PhysicalElement]):
+    """
+    Convert elements into one Arrow table, with a chunk per element class
+
+    See :func:`machine_tables`.
+
+    :param elements: Elements to convert
+    :returns: pyarrow.Table, or None if there are no elements
+    """
+    pyarrow = _import_pyarrow()
+    tables = machine_tables(elements)
+    return pyarrow.concat_tables(tables) if tables else None
+
+
+def export_machine_parquet(filename: str, machine: MachineModel) -> None:
+    """
+    Write every element of a machine to a Parquet file, one row per element
+
+    Requires pyarrow (``pip install padantic[parquet]``). Each element class is written
+    as its own row group; see :func:`machine_tables` for the columns. The file can be
+    loaded with :func:`read_Parquet_File`, or as the element_list of :class:`PAdantic`.
+
+    :param str filename: Parquet file
+    :param MachineModel machine: Machine to export
+    """
+    pyarrow = _import_pyarrow()
+    directory = os.path.dirname(os.path.abspath(filename))
+    os.makedirs(directory, exist_ok=True)
+    tables = machine_tables(machine.elements.values())
+    if not tables:
+        raise ValueError("the machine has no elements to export")
+    with pyarrow.parquet.ParquetWriter(filename, tables[0].schema) as writer:
+        for table in tables:
+            writer.write_table(table)
@@ -0,0 +1,26 @@
+import os
+import pickle
+import tempfile
+from ..models.elementList import MachineModel
+from ..Importers.Snapshot_Loader import SNAPSHOT_VERSION
+
+
+def export_snapshot(filename: str, machine: MachineModel, key: str) -> None:
+    """
+    Write a machine snapshot, replacing any existing file atomically
+
+    :param str filename: Snapshot file
+    :param MachineModel machine: Fully built machine
+    :param str key: Key identifying the machine definition (see :func:`snapshot_key`)
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    os.makedirs(directory, exist_ok=True)
+    snapshot = {"version": SNAPSHOT_VERSION, "key": key, "machine": machine}
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as stream:
+            pickle.dump(snapshot, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, filename)
+    except BaseException:
+        os.remove(temporary)
+        raise
@@ -1,8 +1,11 @@
+import io
 import os
 import yaml
-from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Tuple, Union
 from ..models.elementList import MachineModel
 from ..models.element import PhysicalElement
+from ..Importers.YAML_Loader import open_combined_file
 
 
 def export_as_yaml(
@@ -31,6 +34,59 @@ def export_machine_combined_file(path: str, machine: MachineModel) -> None:
         yaml.dump(combined_yaml, yaml_file)
 
 
+COMBINED_FILE_EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def write_combined_file(
+    filename: str,
+    elements: Iterable[Tuple[str, PhysicalElement]],
+    compression: Union[str, None] = None,
+) -> None:
+    """
+    Write a combined element file one element at a time
+
+    Each element is serialized and written on its own, so only one element dump is
+    held in memory. Given the elements sorted by name, the file is the same as
+    :func:`export_machine_combined_file` writes.
+
+    :param str filename: Combined file
+    :param elements: (name, element) pairs
+    :param str compression: None, "gzip" or "zstd" (zstd needs Python 3.14 or the
+        zstandard package)
+    """
+    with open_combined_file(filename, "w", compression) as yaml_file:
+        empty = True
+        for name, elem in elements:
+            yaml_file.write(yaml.dump({name: export_as_yaml(None, elem)}, Dumper=yaml.CDumper))
+            empty = False
+        if empty:
+            yaml_file.write(yaml.dump({}, Dumper=yaml.CDumper))
+
+
+def export_machine_combined_file_streaming(
+    path: str, machine: MachineModel, compression: Union[str, None] = None
+) -> str:
+    """
+    Write the summary.yaml file of a machine one element at a time
+
+    See :func:`write_combined_file`; the file can be read with
+    :func:`read_YAML_Combined_File` or :func:`iter_YAML_Combined_File`.
+
+    :param str path: Directory to export to
+    :param MachineModel machine: Machine to export
+    :param str compression: None, "gzip" or "zstd"; ".gz" or ".zst" is appended to the file name
+    :returns: The file written
+    """
+    filename = os.path.join(path, "summary.yaml" + COMBINED_FILE_EXTENSIONS.get(compression, ""))
+    os.makedirs(path, exist_ok=True)
+    write_combined_file(
+        filename,
+        ((name, machine.elements[name]) for name in sorted(machine.elements)),
+        compression,
+    )
+    return filename
+
+
 def export_machine(path: str, machine: MachineModel, overwrite: bool = False) -> None:
     for name, elem in machine.elements.items():
         directory = os.path.join(path, elem.subdirectory)
@@ -47,3 +103,80 @@ def export_elements(path: str, elements: list[PhysicalElement]) -> None:
         os.makedirs(directory, exist_ok=True)
         filename = os.path.join(directory, elem.name + ".yaml")
         export_as_yaml(filename, elem)
+
+
+def dump_element_yaml(ele: PhysicalElement) -> str:
+    """Serialize an element as :func:`export_as_yaml` does, using the libyaml emitter"""
+    return yaml.dump(ele.base_model_dump(), Dumper=yaml.CDumper)
+
+
+def _encode_text_file(text: str) -> bytes:
+    """Encode text as open(filename, "w") writes it, with the platform newline and encoding"""
+    buffer = io.BytesIO()
+    stream = io.TextIOWrapper(buffer)
+    stream.write(text)
+    stream.flush()
+    return buffer.getvalue()
+
+
+def _write_if_changed(filename: str, text: str) -> bool:
+    contents = _encode_text_file(text)
+    try:
+        if os.path.getsize(filename) == len(contents):
+            with open(filename, "rb") as stream:
+                if stream.read() == contents:
+                    return False
+    except FileNotFoundError:
+        pass
+    with open(filename, "w") as stream:
+        stream.write(text)
+    return True
+
+
+def export_elements_parallel(
+    path: str, elements: list[PhysicalElement], workers: Union[int, None] = None
+) -> List[str]:
+    """
+    Export elements to one YAML file each, only writing the files that have changed
+
+    Each element is serialized with :func:`dump_element_yaml` and written in text mode,
+    with the platform newline and encoding, giving the same files as
+    :func:`export_elements`. A file is left untouched if its contents are already those
+    of the serialized element. The elements are serialized and written in a pool of
+    threads.
+
+    :param str path: Directory to export to
+    :param list elements: Elements to export
+    :param int workers: Number of threads; defaults to the ThreadPoolExecutor default
+    :returns: Files that were written
+    """
+    directories = [os.path.join(path, elem.subdirectory) for elem in elements]
+    for directory in set(directories):
+        os.makedirs(directory, exist_ok=True)
+    filenames = [
+        os.path.join(directory, elem.name + ".yaml")
+        for directory, elem in zip(directories, elements)
+    ]
+
+    def export(filename: str, elem: PhysicalElement) -> bool:
+        return _write_if_changed(filename, dump_element_yaml(elem))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        written = list(executor.map(export, filenames, elements))
+    return [filename for filename, w in zip(filenames, written) if w]
+
+
+def export_machine_parallel(
+    path: str, machine: MachineModel, workers: Union[int, None] = None
+) -> List[str]:
+    """
+    Export every element of a machine, only writing the files that have changed
+
+    See :func:`export_elements_parallel`.
+
+    :param str path: Directory to export to
+    :param MachineModel machine: Machine to export
+    :param int workers: Number of threads; defaults to the ThreadPoolExecutor default
+    :returns: Files that were written
+    """
+    return export_elements_parallel(path, list(machine.elements.values()), workers)
@@ -2,28 +2,7 @@ import os
 import glob
 from yaml import load
 from Importers.MySafeLoader import MySafeLoader
-from PAdantic.models.PV import (  # noqa: F401
-    MagnetPV,
-    BPMPV,
-    CameraPV,
-    ScreenPV,
-    ChargeDiagnosticPV,
-    VacuumGuagePV,
-    LaserEnergyMeterPV,
-    LaserHWPPV,
-    LaserMirrorPV,
-    LightingPV,
-    PIDPV,
-    LLRFPV,
-    RFModulatorPV,
-    ShutterPV,
-    ValvePV,
-    RFProtectionPV,
-    RFHeartbeatPV,
-    PV,
-    elementTypes,
-    PVTypes,
-)
+from PAdantic.models.PV import PV, element_pv_model, pv_values
 from PAdantic.models.element import *  # noqa
 
 
@@ -83,7 +62,8 @@ def read_CATAP_YAML(filename):
     # for k in data['controls_information']['pv_record_map'].keys():
     #     print('    - '+k)
     # exit()
-    fpv = globals()[PVTypes[data["properties"]["hardware_type"]]]
+    PVTypes, elementTypes = pv_values()["PVTypes"], pv_values()["elementTypes"]
+    fpv = element_pv_model(PVTypes[data["properties"]["hardware_type"]])
 
     if "mag_type" in data["properties"]:
         felem = globals()[elementTypes[data["properties"]["mag_type"]]]
@@ -0,0 +1,40 @@
+import json
+from typing import Union
+
+from ..models.elementRegistry import VALIDATION_EXCEPTIONS, element_dict_adapter
+from .YAML_Loader import _interpret_Combined_Elements
+
+
+def read_JSON_File(
+    filename: str,
+    errors: Union[list, None] = None,
+    trusted: bool = False,
+    documents: Union[list, None] = None,
+) -> list:
+    """
+    Load the elements of a JSON file written by :func:`export_machine_json`
+
+    The file is parsed and validated by pydantic-core in a single call. If any element
+    is invalid, the file is loaded element by element instead, skipping those elements.
+
+    :param str filename: JSON file
+    :param list errors: :class:`ElementLoadError` s for the elements that could not be
+        validated are appended to this list
+    :param bool trusted: Build the models with :func:`trusted_construct`; only for files
+        written by the exporters
+    :param list documents: If *trusted*, (filename, index, document, element) is appended for
+        each element, for :func:`validate_trusted_YAML_Elements`
+    :returns: List of element models
+    """
+    with open(filename, "rb") as stream:
+        data = stream.read()
+    if not trusted:
+        try:
+            return list(element_dict_adapter().validate_json(data).values())
+        except VALIDATION_EXCEPTIONS:
+            # load element by element, recording the invalid ones
+            pass
+    elements = json.loads(data)
+    return _interpret_Combined_Elements(
+        filename, iter(elements.values()), errors, trusted, documents
+    )
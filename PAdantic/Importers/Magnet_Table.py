@@ -1,61 +1,293 @@
 import os
+import hashlib
+from functools import lru_cache
 from math import ceil
-import pandas
+from typing import Dict, Iterable, List, Union
+
+import numpy as np
+
+from .Snapshot_Loader import default_cache_directory
 
 magnet_table_filename = os.path.join(
     os.path.dirname(__file__), "CLARA Magnet Table v6.xlsx"
 )
-magnet_table = pandas.read_excel(
-    magnet_table_filename,
-    sheet_name="Table",
-    skiprows=2,
-    index_col=(2, 3, 5, 6),
-    dtype={"serial number": "str"},
-).fillna(0)
 
+# columns of the magnet table used to annotate magnets, in the order they are applied
+MAGNET_TABLE_VALUES = [
+    "slope [units/A]",
+    "max current [A]",
+    "f [units/A³]",
+    "a [units/A²]",
+    "I0 [A]",
+    "d [units]",
+    "magnetic length [mm]",
+    "current [A]",
+]
+MAGNET_TABLE_LABELS = ["magnet type", "serial number"]
+
+
+def _import_pandas():
+    try:
+        import pandas
+    except ImportError:
+        raise ImportError(
+            "reading the magnet table workbook requires pandas; install padantic[magnet-table]"
+        ) from None
+    return pandas
+
+
+@lru_cache(maxsize=None)
+def get_magnet_table():
+    """Read the magnet table on first use; pandas is only imported when it is needed"""
+    pandas = _import_pandas()
+
+    return pandas.read_excel(
+        magnet_table_filename,
+        sheet_name="Table",
+        skiprows=2,
+        index_col=(2, 3, 5, 6),
+        dtype={"serial number": "str"},
+    ).fillna(0)
 
-def create_degauss_values(maxI):
-    if maxI < 10.0:
-        maxI = 10.0
-    return [
-        round(ceil(maxI) / 10.0 * v, 2)
-        for v in [9.98, -9.98, 6.0, -6.0, 4.0, -4.0, 2.0, -2.0, 1.0, -1.0, 0.0]
-    ]
 
+def __getattr__(name: str):
+    if name == "magnet_table":
+        return get_magnet_table()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def add_magnet_table_parameters(n, e, magnetPV):
+
+def magnet_key(magnetPV: str) -> Union[str, None]:
+    """
+    Convert a magnet PV name into its key in the magnet table
+
+    :param str magnetPV: PV name of the magnet, e.g. CLA-S01-MAG-QUAD-01
+    :returns: Key "machine|area|type|index", or None if the name cannot be parsed
+    """
     try:
         magPVsplit = magnetPV.split("-")
-        magnet = (
+        return "%s|%s|%s|%d" % (
             magPVsplit[0].replace("EBT", "CLA"),
             magPVsplit[1].replace("HRG1", "GUN"),
             magPVsplit[3],
             int(magPVsplit[4]),
         )
-        table = magnet_table.loc[
-            magnet,
-            [
-                "slope [units/A]",
-                "max current [A]",
-                "f [units/A³]",
-                "a [units/A²]",
-                "I0 [A]",
-                "d [units]",
-                "magnetic length [mm]",
-                "current [A]",
-                "magnet type",
-                "serial number",
-            ],
-        ]
-        m, I_max, f, a, I0, d, L, I_degauss, manufacturer, serial_number = table
-        e.magnetic.linear_saturation_coefficients.update_from_string(
-            ",".join(list(map(str, [m, I_max, f, a, I0, d, L])))
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def _source_signature(filename: str) -> np.ndarray:
+    stat = os.stat(filename)
+    return np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+
+class MagnetTable:
+    """
+    Magnet table indexed by (machine, area, type, index).
+
+    The keys are held as a sorted string array, so that a batch of magnets is
+    joined against the table with a single binary search. Numeric columns
+    (:data:`MAGNET_TABLE_VALUES`) and string columns (:data:`MAGNET_TABLE_LABELS`)
+    are stored as arrays in the same order; where a key appears more than once in
+    the workbook the first row is kept.
+    """
+
+    def __init__(self, keys: np.ndarray, values: np.ndarray, labels: np.ndarray):
+        keys = np.asarray(keys, dtype=str)
+        keys, first = np.unique(keys, return_index=True)
+        self.keys = keys
+        self.values = np.asarray(values, dtype=np.float64).reshape(-1, len(MAGNET_TABLE_VALUES))[first]
+        self.labels = np.asarray(labels, dtype=str).reshape(-1, len(MAGNET_TABLE_LABELS))[first]
+
+    @classmethod
+    def from_dataframe(cls, table) -> "MagnetTable":
+        """Build the table from the DataFrame returned by :func:`get_magnet_table`"""
+        keys, rows = [], []
+        for i, (machine, area, magnet_type, index) in enumerate(table.index):
+            try:
+                keys.append("%s|%s|%s|%d" % (machine, area, magnet_type, int(index)))
+                rows.append(i)
+            except (TypeError, ValueError):
+                continue
+        values = table[MAGNET_TABLE_VALUES].to_numpy(dtype=np.float64)[rows]
+        labels = table[MAGNET_TABLE_LABELS].astype(str).to_numpy()[rows]
+        return cls(keys, values, labels)
+
+    @classmethod
+    def from_excel(cls, filename: str = magnet_table_filename) -> "MagnetTable":
+        """Parse the magnet table workbook (requires pandas)"""
+        if filename == magnet_table_filename:
+            return cls.from_dataframe(get_magnet_table())
+        pandas = _import_pandas()
+
+        return cls.from_dataframe(
+            pandas.read_excel(
+                filename,
+                sheet_name="Table",
+                skiprows=2,
+                index_col=(2, 3, 5, 6),
+                dtype={"serial number": "str"},
+            ).fillna(0)
         )
-        e.degauss.values = create_degauss_values(float(I_degauss))
-        e.manufacturer.manufacturer = manufacturer
-        e.manufacturer.serial_number = serial_number
-        e.electrical.maxI = ceil(I_degauss)
-        e.electrical.minI = -1.0 * ceil(I_degauss)
+
+    def save(self, filename: str, source: str) -> None:
+        """
+        Write the table to an npz file, recording the state of the workbook it was read from
+
+        :param str filename: Cache file
+        :param str source: Workbook the table was read from
+        """
+        directory = os.path.dirname(os.path.abspath(filename))
+        os.makedirs(directory, exist_ok=True)
+        temporary = filename + ".%d.tmp" % os.getpid()
+        with open(temporary, "wb") as stream:
+            np.savez(
+                stream,
+                keys=self.keys,
+                values=self.values,
+                labels=self.labels,
+                source=_source_signature(source),
+            )
+        os.replace(temporary, filename)
+
+    @classmethod
+    def load(cls, filename: str, source: Union[str, None] = None) -> Union["MagnetTable", None]:
+        """
+        Read a table written by :meth:`save`
+
+        :param str filename: Cache file
+        :param str source: Workbook the table should have been read from; if given, the
+            cache is only used if the workbook has not changed since it was written
+        :returns: MagnetTable, or None if the cache is missing, unreadable or out of date
+        """
+        try:
+            with np.load(filename, allow_pickle=False) as data:
+                if source is not None and not np.array_equal(
+                    data["source"], _source_signature(source)
+                ):
+                    return None
+                return cls(data["keys"], data["values"], data["labels"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def rows(self, keys: Iterable[Union[str, None]]) -> np.ndarray:
+        """
+        Join a batch of keys against the table
+
+        :param keys: Keys as returned by :func:`magnet_key`; None for magnets without a key
+        :returns: Row of each key in the table, or -1 for keys that are not present
+        """
+        keys = np.array(["" if k is None else k for k in keys], dtype=str)
+        if len(self.keys) == 0 or len(keys) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[rows] == keys, rows, -1)
+
+    def row(self, key: Union[str, None]) -> int:
+        """Return the row holding a key, or -1 if it is not present"""
+        return int(self.rows([key])[0])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+def magnet_table_cache_filename(
+    source: str = magnet_table_filename, cache_directory: Union[str, None] = None
+) -> str:
+    """Return the npz file caching a magnet table workbook"""
+    directory = default_cache_directory() if cache_directory is None else cache_directory
+    digest = hashlib.sha256(os.path.abspath(source).encode()).hexdigest()[:16]
+    return os.path.join(directory, "magnet_table-%s.npz" % digest)
+
+
+def load_magnet_table(
+    source: str = magnet_table_filename, cache_directory: Union[str, None] = None
+) -> MagnetTable:
+    """
+    Load a magnet table, converting the workbook to an npz cache the first time
+
+    The cache is rebuilt whenever the modification time or size of the workbook changes.
+
+    :param str source: Magnet table workbook
+    :param str cache_directory: Directory holding the cache; see :func:`default_cache_directory`
+    :returns: MagnetTable
+    """
+    cache = magnet_table_cache_filename(source, cache_directory)
+    table = MagnetTable.load(cache, source)
+    if table is None:
+        table = MagnetTable.from_excel(source)
+        try:
+            table.save(cache, source)
+        except OSError:
+            pass
+    return table
+
+
+@lru_cache(maxsize=None)
+def get_magnet_table_store() -> MagnetTable:
+    """Return the CLARA magnet table, loaded once per session"""
+    return load_magnet_table()
+
+
+def create_degauss_values(maxI):
+    if maxI < 10.0:
+        maxI = 10.0
+    return [
+        round(ceil(maxI) / 10.0 * v, 2)
+        for v in [9.98, -9.98, 6.0, -6.0, 4.0, -4.0, 2.0, -2.0, 1.0, -1.0, 0.0]
+    ]
+
+
+def _apply_magnet_table_row(e, values: np.ndarray, labels: np.ndarray):
+    m, I_max, f, a, I0, d, L, I_degauss = values.tolist()
+    manufacturer, serial_number = labels.tolist()
+    e.magnetic.linear_saturation_coefficients.update_from_string(
+        ",".join(list(map(str, [m, I_max, f, a, I0, d, L])))
+    )
+    e.degauss.values = create_degauss_values(float(I_degauss))
+    e.manufacturer.manufacturer = manufacturer
+    e.manufacturer.serial_number = serial_number
+    e.electrical.maxI = ceil(I_degauss)
+    e.electrical.minI = -1.0 * ceil(I_degauss)
+    return e
+
+
+def add_magnet_table_parameters(n, e, magnetPV, table: Union[MagnetTable, None] = None):
+    table = get_magnet_table_store() if table is None else table
+    magnet = magnet_key(magnetPV)
+    try:
+        row = table.row(magnet)
+        if row < 0:
+            raise KeyError(magnet)
+        _apply_magnet_table_row(e, table.values[row], table.labels[row])
     except Exception:
         print("Magnet missing from magnet table!", magnet)
     return e
+
+
+def add_magnet_table_parameters_batch(
+    elements: Dict[str, object],
+    table: Union[MagnetTable, None] = None,
+    magnetPVs: Union[Dict[str, str], None] = None,
+) -> List[str]:
+    """
+    Annotate many magnets from the magnet table with one join
+
+    :param dict elements: Magnet elements, keyed by name
+    :param MagnetTable table: Magnet table; the CLARA magnet table if None
+    :param dict magnetPVs: PV name of each magnet; the element name if not given
+    :returns: Names of the magnets that are not in the table
+    """
+    table = get_magnet_table_store() if table is None else table
+    magnetPVs = {} if magnetPVs is None else magnetPVs
+    names = list(elements)
+    rows = table.rows([magnet_key(magnetPVs.get(n, n)) for n in names])
+    found = np.flatnonzero(rows >= 0)
+    values = table.values[rows[found]]
+    labels = table.labels[rows[found]]
+    missing = [names[i] for i in np.flatnonzero(rows < 0)]
+    for i, row_values, row_labels in zip(found, values, labels):
+        try:
+            _apply_magnet_table_row(elements[names[i]], row_values, row_labels)
+        except Exception:
+            missing.append(names[i])
+    return missing
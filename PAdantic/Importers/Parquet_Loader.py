@@ -0,0 +1,92 @@
+import json
+from typing import Iterator, List, Union
+
+from .YAML_Loader import _interpret_Combined_Elements
+
+# key of the schema metadata describing how the columns map onto the element dictionaries
+PARQUET_METADATA_KEY = b"padantic"
+# increment when the layout of the columnar files changes
+PARQUET_VERSION = 2
+# columns holding, for each row, the element class and the position of the element in the machine
+CLASS_COLUMN = "_class"
+POSITION_COLUMN = "_position"
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "reading and writing Parquet element files requires pyarrow; install padantic[parquet]"
+        ) from None
+    return pyarrow
+
+
+def _set_path(element: dict, path: List[str], value) -> None:
+    for key in path[:-1]:
+        element = element.setdefault(key, {})
+    element[path[-1]] = value
+
+
+def table_to_element_dicts(table) -> Iterator[dict]:
+    """
+    Rebuild the element dictionaries from a table written by :func:`machine_table`
+
+    :param pyarrow.Table table: One row per element
+    :returns: Generator of element dictionaries, as returned by base_model_dump, in the
+        order of the elements in the exported machine
+    """
+    metadata = json.loads(table.schema.metadata[PARQUET_METADATA_KEY])
+    if metadata.get("version") != PARQUET_VERSION:
+        raise ValueError("unsupported columnar element file version %s" % metadata.get("version"))
+    encoded = set(metadata["json"])
+    columns = {
+        name: (table.column(name).to_pylist(), path, name in encoded)
+        for name, path in metadata["columns"].items()
+    }
+    classes = {
+        hardware_type: [columns[name] for name in names]
+        for hardware_type, names in metadata["classes"].items()
+    }
+    rows = table.column(CLASS_COLUMN).to_pylist()
+    positions = table.column(POSITION_COLUMN).to_pylist()
+    for row in sorted(range(table.num_rows), key=positions.__getitem__):
+        element = {}
+        for values, path, is_json in classes[rows[row]]:
+            value = values[row]
+            _set_path(element, path, json.loads(value) if is_json and value is not None else value)
+        yield element
+
+
+def read_Parquet_Element_Dicts(filename: str) -> List[dict]:
+    """Read the element dictionaries from a Parquet file written by :func:`export_machine_parquet`"""
+    pyarrow = _import_pyarrow()
+    return list(table_to_element_dicts(pyarrow.parquet.read_table(filename)))
+
+
+def read_Parquet_File(
+    filename: str,
+    errors: Union[list, None] = None,
+    trusted: bool = False,
+    documents: Union[list, None] = None,
+) -> list:
+    """
+    Load the elements of a Parquet file written by :func:`export_machine_parquet`
+
+    Requires pyarrow (``pip install padantic[parquet]``).
+
+    :param str filename: Parquet file
+    :param list errors: :class:`ElementLoadError` s for the elements that could not be
+        validated are appended to this list
+    :param bool trusted: Build the models with :func:`trusted_construct`; only for files
+        written by the exporters
+    :param list documents: If *trusted*, (filename, index, document, element) is appended for
+        each element, for :func:`validate_trusted_YAML_Elements`
+    :returns: List of element models
+    """
+    pyarrow = _import_pyarrow()
+    table = pyarrow.parquet.read_table(filename)
+    return _interpret_Combined_Elements(
+        filename, table_to_element_dicts(table), errors, trusted, documents
+    )
@@ -1,34 +1,17 @@
 import os
-from copy import copy
-from typing import Any, Union
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy, deepcopy
+from functools import lru_cache
+from typing import Any, Iterator, Union
 import yaml
 from pydantic import BaseModel, field_validator, ValidationInfo, Field
 
-from .Magnet_Table import add_magnet_table_parameters
-from ..models.PV import (  # noqa
-    MagnetPV,
-    BPMPV,
-    BAMPV,
-    BLMPV,
-    CameraPV,
-    ScreenPV,
-    ChargeDiagnosticPV,
-    VacuumGaugePV,
-    LaserEnergyMeterPV,
-    LaserHWPPV,
-    LaserMirrorPV,
-    LightingPV,
-    PIDPV,
-    LLRFPV,
-    RFModulatorPV,
-    ShutterPV,
-    ValvePV,
-    RFProtectionPV,
-    RFHeartbeatPV,
-    PV,
-    elementTypes,
-    PVTypes,
+from .Magnet_Table import (
+    add_magnet_table_parameters,
+    add_magnet_table_parameters_batch,
+    magnet_key,
 )
+from ..models.PV import element_pv_model, pv_values
 from ..models.element import (
     Quadrupole,
     Dipole,
@@ -55,14 +38,21 @@ from ..models.element import (
 )
 from ..models.diagnostic import Camera_Diagnostic_Type
 
-with open(
-    os.path.dirname(os.path.abspath(__file__)) + "/camera_assignments.yaml", "r"
-) as stream:
-    camera_assignments = yaml.load(stream, Loader=yaml.Loader)
+camera_assignments_filename = (
+    os.path.dirname(os.path.abspath(__file__)) + "/camera_assignments.yaml"
+)
+
+
+@lru_cache(maxsize=None)
+def get_camera_types() -> dict:
+    """Load the camera type of each screen from camera_assignments.yaml on first use"""
+    with open(camera_assignments_filename, "r") as stream:
+        camera_assignments = yaml.load(stream, Loader=yaml.Loader)
     camera_types = {}
     for k, v in camera_assignments.items():
         for s in v:
             camera_types[s] = k
+    return camera_types
 
 
 class SimFrame_Conversion(BaseModel):
@@ -161,11 +151,13 @@ def get_SimFrame_PV(name):
     return name
 
 
-def interpret_SimFrame_Element(name, elem):
+def _convert_SimFrame_Element(name, elem):
+    """Convert a SimFrame element definition into an element model, without the magnet table"""
     if "type" in elem and elem["type"] in SimFrame_Elements:
         # try:
         # print('type',elem['type'],'found')
         felem = SimFrame_Elements[elem["type"]].typeclass
+        PVTypes = pv_values()["PVTypes"]
         hasPV = SimFrame_Elements[elem["type"]].PV_class in PVTypes
 
         elem.update(dict(SimFrame_Elements[elem["type"]]))
@@ -180,7 +172,7 @@ def interpret_SimFrame_Element(name, elem):
         fields = elem
         if hasPV:
             try:
-                fpv = globals()[PVTypes[SimFrame_Elements[elem["type"]].PV_class]]
+                fpv = element_pv_model(PVTypes[SimFrame_Elements[elem["type"]].PV_class])
                 elemPV = fpv.with_defaults(name)
                 fields["controls"] = elemPV
             except Exception as e:
@@ -193,30 +185,78 @@ def interpret_SimFrame_Element(name, elem):
                 if hasattr(v.annotation, "from_CATAP")
             }
         )
-        elemmodel = felem(**fields)
-        if SimFrame_Elements[elem["type"]].hardware_class == "Magnet":
-            elemmodel = add_magnet_table_parameters(
-                name, elemmodel, get_SimFrame_PV(name)
-            )
-        return elemmodel
+        return felem(**fields)
     # except Exception as e:
     #     print('Error', name, e)
 
 
-def read_SimFrame_YAML(filename):
-    # print('File:',filename)
-    elemlist = {}
+def interpret_SimFrame_Element(name, elem):
+    magnet = "type" in elem and _is_SimFrame_Magnet(elem)
+    elemmodel = _convert_SimFrame_Element(name, elem)
+    if magnet:
+        elemmodel = add_magnet_table_parameters(
+            name, elemmodel, get_SimFrame_PV(name)
+        )
+    return elemmodel
+
+
+def _is_SimFrame_Magnet(elem: dict) -> bool:
+    return (
+        elem["type"] in SimFrame_Elements
+        and SimFrame_Elements[elem["type"]].hardware_class == "Magnet"
+    )
+
+
+@lru_cache(maxsize=128)
+def _parse_SimFrame_YAML(filename: str, mtime_ns: int) -> dict:
     with open(filename, "r") as stream:
-        data = yaml.load(stream, Loader=yaml.Loader)
+        return yaml.load(stream, Loader=yaml.Loader)
+
+
+def load_SimFrame_YAML(filename: str) -> dict:
+    """
+    Parse a SimFrame lattice file, reusing the result while the file is unchanged
+
+    Files are cached by path and modification time. The conversion modifies the
+    element definitions, so a deep copy of the cached data is returned.
+
+    :param str filename: SimFrame YAML file
+    :returns: Parsed file
+    """
+    filename = os.path.abspath(filename)
+    return deepcopy(_parse_SimFrame_YAML(filename, os.stat(filename).st_mtime_ns))
+
+
+def _collect_SimFrame_Elements(
+    filename: str, jobs: list, files: dict, stack: tuple = ()
+) -> str:
+    """
+    Add the elements of a SimFrame file, and of the files it includes, to the jobs
+
+    The elements of each file are added once, however often it is included; the
+    order in which the definitions override each other is recorded in *files* (see
+    :func:`_SimFrame_Element_Order`). A file that includes itself, directly or
+    through other files, is skipped.
+
+    :param str filename: SimFrame YAML file
+    :param list jobs: (name, definition, is screen) is appended for each element
+    :param dict files: Maps the absolute path of each file read to its entries, in
+        order: the position in *jobs* of an element, or the absolute path of an include
+    :param tuple stack: Files being read that include *filename*
+    :returns: Absolute path of *filename*
+    """
+    filename = os.path.abspath(filename)
+    if filename in files or filename in stack:
+        return filename
+    stack = stack + (filename,)
+    entries = []
+    data = load_SimFrame_YAML(filename)
     for name, elem in data["elements"].items():
         if name == "filename":  # and isinstance(elem, str):
-            if isinstance(elem, str):
-                newfilename = get_SimFrame_YAML_filename(filename, elem)
-                elemlist.update(read_SimFrame_YAML(newfilename))
-            elif isinstance(elem, list):
-                for e in elem:
-                    newfilename = get_SimFrame_YAML_filename(filename, e)
-                    elemlist.update(read_SimFrame_YAML(newfilename))
+            includes = [elem] if isinstance(elem, str) else elem if isinstance(elem, list) else []
+            for e in includes:
+                newfilename = get_SimFrame_YAML_filename(filename, e)
+                entries.append(_collect_SimFrame_Elements(newfilename, jobs, files, stack))
         elif "type" in elem and elem["type"] in SimFrame_Elements:
             if elem["type"] == "kicker":
                 helem = copy(elem)
@@ -227,33 +267,13 @@ def read_SimFrame_YAML(filename):
                 velem["type"] = "vkicker"
                 velem["mag_type"] = "VERTICAL_CORRECTOR"
                 vname = name.replace("HVCOR", "VCOR")
-                elemmodel = interpret_SimFrame_Element(hname, helem)
-                elemlist.update({hname: elemmodel})
-                elemmodel = interpret_SimFrame_Element(vname, velem)
-                elemlist.update({vname: elemmodel})
+                entries.extend([len(jobs), len(jobs) + 1])
+                jobs.append((hname, helem, False))
+                jobs.append((vname, velem, False))
                 elem["Horizontal_Corrector"] = hname
                 elem["Vertical_Corrector"] = vname
-            if elem["type"] == "screen":
-                elemmodel = interpret_SimFrame_Element(name, elem)
-                elemlist.update({name: elemmodel})
-                camtype = (
-                    camera_types[elemmodel.name]
-                    if elemmodel.name in camera_types
-                    else "PCO"
-                )
-                print(elemmodel.diagnostic.camera_name, "camtype = ", camtype)
-                elemmodelcam = Camera(
-                    name=elemmodel.diagnostic.camera_name,
-                    hardware_model=camtype,
-                    machine_area=elemmodel.machine_area,
-                    physical=elemmodel.physical,
-                    diagnostic=Camera_Diagnostic_Type(type=camtype),
-                    controls=None,
-                )
-                elemlist.update({elemmodel.diagnostic.camera_name: elemmodelcam})
-            else:
-                elemmodel = interpret_SimFrame_Element(name, elem)
-                elemlist.update({name: elemmodel})
+            entries.append(len(jobs))
+            jobs.append((name, elem, elem["type"] == "screen"))
         else:
             # pass
             print("read_SimFrame_YAML", name, elem["type"])
@@ -262,13 +282,106 @@ def read_SimFrame_YAML(filename):
                 if "type" in subelem and subelem["type"] in SimFrame_Elements:
                     # print('Subelement:', subelem)
                     subelem["subelement"] = True
-                    elemmodel = interpret_SimFrame_Element(subname, subelem)
-                    # print(subname, elemmodel)
-                    elemlist.update({subname: elemmodel})
+                    entries.append(len(jobs))
+                    jobs.append((subname, subelem, False))
+    files[filename] = entries
+    return filename
+
+
+def _SimFrame_Element_Order(filename: str, files: dict, stack: tuple = ()) -> Iterator[int]:
+    """
+    Yield the positions in the jobs of the elements of a file, expanding its includes
+
+    Elements are yielded in the order in which they are read, so every time a file
+    is included; a later element overrides an earlier one with the same name.
+
+    :param str filename: Absolute path of a file collected by :func:`_collect_SimFrame_Elements`
+    :param dict files: Entries of each collected file
+    :param tuple stack: Files being expanded that include *filename*
+    """
+    stack = stack + (filename,)
+    for entry in files[filename]:
+        if isinstance(entry, str):
+            if entry not in stack:
+                yield from _SimFrame_Element_Order(entry, files, stack)
+        else:
+            yield entry
+
+
+def _convert_SimFrame_Elements(jobs: list) -> list:
+    return [_convert_SimFrame_Element(name, elem) for name, elem, _ in jobs]
+
+
+def read_SimFrame_YAML_files(
+    filenames: list, workers: int = 1, chunks_per_worker: int = 4
+) -> dict:
+    """
+    Convert SimFrame lattice files, and the files they include, into element models
+
+    Every file is parsed (see :func:`load_SimFrame_YAML`) and its elements converted
+    once, in a pool of worker processes; the definitions are then merged in the order
+    in which they are read, and the magnets annotated from the magnet table with a
+    single join. The result is the same as updating a dict with the elements of each
+    file in turn, reading an include every time it appears.
+
+    :param list filenames: SimFrame YAML files
+    :param int workers: Number of worker processes; the conversion runs in this process
+        if 1, and uses one process per CPU if None
+    :param int chunks_per_worker: Number of chunks to split the elements into per worker
+    :returns: dict of element name -> element model
+    """
+    jobs = []
+    files = {}
+    filenames = [_collect_SimFrame_Elements(filename, jobs, files) for filename in filenames]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2:
+        models = _convert_SimFrame_Elements(jobs)
+    else:
+        size = max(1, -(-len(jobs) // (workers * chunks_per_worker)))
+        chunks = [jobs[i: i + size] for i in range(0, len(jobs), size)]
+        models = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for converted in executor.map(_convert_SimFrame_Elements, chunks):
+                models.extend(converted)
+    order = [i for filename in filenames for i in _SimFrame_Element_Order(filename, files)]
+    # the job defining each element once all overrides are applied
+    final = {jobs[i][0]: i for i in order}
+    magnets = {
+        name: models[i] for name, i in final.items() if _is_SimFrame_Magnet(jobs[i][1])
+    }
+    if magnets:
+        for name in add_magnet_table_parameters_batch(
+            magnets, magnetPVs={name: get_SimFrame_PV(name) for name in magnets}
+        ):
+            print("Magnet missing from magnet table!", magnet_key(get_SimFrame_PV(name)))
+    elemlist = {}
+    cameras = {}
+    for i in order:
+        name, elem, screen = jobs[i]
+        elemmodel = models[i]
+        elemlist.update({name: elemmodel})
+        if screen:
+            if i not in cameras:
+                camtype = get_camera_types().get(elemmodel.name, "PCO")
+                print(elemmodel.diagnostic.camera_name, "camtype = ", camtype)
+                cameras[i] = Camera(
+                    name=elemmodel.diagnostic.camera_name,
+                    hardware_model=camtype,
+                    machine_area=elemmodel.machine_area,
+                    physical=elemmodel.physical,
+                    diagnostic=Camera_Diagnostic_Type(type=camtype),
+                    controls=None,
+                )
+            elemlist.update({elemmodel.diagnostic.camera_name: cameras[i]})
     # print('simframe',elemlist)
     return elemlist
 
 
+def read_SimFrame_YAML(filename, workers: int = 1):
+    # print('File:',filename)
+    return read_SimFrame_YAML_files([filename], workers=workers)
+
+
 SF_files = [
     r"../../masterlattice/MasterLattice/YAML/CLA_Gun400.yaml",
     r"../../masterlattice/MasterLattice/YAML/CLA_SP2.yaml",
@@ -0,0 +1,95 @@
+import os
+import glob
+import json
+import pickle
+import hashlib
+from typing import Any, Union
+
+# increment when the layout of the snapshot files changes
+SNAPSHOT_VERSION = 1
+
+_models_directory = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models"))
+
+
+def default_cache_directory() -> str:
+    """
+    Return the directory in which machine snapshots are stored
+
+    This is $PADANTIC_CACHE_DIR if set, else $XDG_CACHE_HOME/PAdantic or ~/.cache/PAdantic.
+    """
+    if "PADANTIC_CACHE_DIR" in os.environ:
+        return os.environ["PADANTIC_CACHE_DIR"]
+    cache_home = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(cache_home, "PAdantic")
+
+
+def _file_signature(filename: str) -> list:
+    stat = os.stat(filename)
+    return [os.path.abspath(filename), stat.st_mtime_ns, stat.st_size]
+
+
+def _source_signature(source: Any) -> Any:
+    """Describe a machine definition source so that any change to it changes the signature"""
+    if isinstance(source, str):
+        if os.path.isdir(source):
+            files = sorted(
+                glob.glob(os.path.abspath(source + "/**/*.yaml"), recursive=True)
+            )
+            return [_file_signature(f) for f in files]
+        if os.path.isfile(source):
+            return _file_signature(source)
+    return json.dumps(source, sort_keys=True, default=str)
+
+
+def snapshot_key(*sources: Any, options: Union[dict, None] = None) -> str:
+    """
+    Hash the definition of a machine
+
+    Files are identified by their path, modification time and size, and directories
+    by every YAML file below them. The model source files are included, so that
+    snapshots written by a different version of the models are not reused.
+
+    :param sources: Layout, section and element definitions (file names, directories or dicts)
+    :param dict options: Options the machine was built with (e.g. lazy, trusted); machines
+        built with different options have different keys
+    :returns: Hex digest identifying the definition
+    """
+    models = sorted(glob.glob(os.path.join(_models_directory, "*.py")))
+    signature = [
+        SNAPSHOT_VERSION,
+        [_file_signature(f) for f in models],
+        [_source_signature(source) for source in sources],
+    ]
+    if options:
+        signature.append(json.dumps(options, sort_keys=True, default=str))
+    return hashlib.sha256(json.dumps(signature).encode()).hexdigest()
+
+
+def snapshot_filename(key: str, directory: Union[str, None] = None) -> str:
+    """Return the file holding the snapshot with a given key"""
+    directory = default_cache_directory() if directory is None else directory
+    return os.path.join(directory, "machine-%s.pickle" % key)
+
+
+def read_snapshot(filename: str, key: str) -> Any:
+    """
+    Load a machine snapshot
+
+    :param str filename: Snapshot file
+    :param str key: Expected key of the snapshot (see :func:`snapshot_key`)
+    :returns: The machine, or None if the file is missing, unreadable or has a different key
+    """
+    try:
+        with open(filename, "rb") as stream:
+            snapshot = pickle.load(stream)
+    except Exception:
+        return None
+    if (
+        not isinstance(snapshot, dict)
+        or snapshot.get("version") != SNAPSHOT_VERSION
+        or snapshot.get("key") != key
+    ):
+        return None
+    return snapshot["machine"]
@@ -1,41 +1,206 @@
+import os
+import gzip
+import hashlib
 import yaml
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import IO, Dict, Iterator, List, Tuple, Union
+from pydantic import BaseModel
 from yaml import CSafeLoader as Loader
 
-from ..models.PV import (  # noqa
-    MagnetPV,
-    BPMPV,
-    CameraPV,
-    ScreenPV,
-    ChargeDiagnosticPV,
-    VacuumGaugePV,
-    LaserEnergyMeterPV,
-    LaserHWPPV,
-    LaserMirrorPV,
-    LightingPV,
-    PIDPV,
-    LLRFPV,
-    RFModulatorPV,
-    ShutterPV,
-    ValvePV,
-    RFProtectionPV,
-    RFHeartbeatPV,
-    PV,
-    elementTypes,
-    PVTypes,
-)
 from ..models.element import *  # noqa
+from ..models.construct import trusted_construct
+from ..models.elementRegistry import element_class, validate_elements
+from ..models.lazyElement import LazyElement
 
 
 def interpret_YAML_Element(elem):
-    if "hardware_type" in elem and elem["hardware_type"] in globals():
+    felem = element_class(elem.get("hardware_type"))
+    if felem is not None:
         try:
-            felem = globals()[elem["hardware_type"]]
             elemmodel = felem(**elem)
             return elemmodel
         except Exception as e:
             print("interpret_YAML_Element - Error", e)
 
 
+class ElementLoadError(BaseModel):
+    """An element document that could not be loaded"""
+
+    filename: str
+    # position of the document within the file
+    index: int
+    name: Union[str, None] = None
+    hardware_type: Union[str, None] = None
+    error: str
+
+
+class ManifestEntry(BaseModel):
+    """State of an element file when it was loaded"""
+
+    mtime_ns: int
+    size: int
+    # sha1 of the file contents
+    digest: str
+    # names of the elements loaded from the file
+    names: List[str] = []
+
+
+def file_changed(filename: str, entry: ManifestEntry) -> bool:
+    """
+    Check whether an element file differs from its manifest entry
+
+    The contents are only hashed if the modification time or size have changed; if the
+    contents are the same, the entry is updated to the new modification time.
+
+    :param str filename: Element file
+    :param ManifestEntry entry: State of the file when it was loaded
+    :returns: True if the contents of the file have changed
+    """
+    stat = os.stat(filename)
+    if stat.st_mtime_ns == entry.mtime_ns and stat.st_size == entry.size:
+        return False
+    with open(filename, "rb") as stream:
+        if hashlib.sha1(stream.read()).hexdigest() != entry.digest:
+            return True
+    entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+    return False
+
+
+def _YAML_Element_class(elem: dict):
+    """Return the model class for an element dictionary, raising an exception if there is none"""
+    if not isinstance(elem, dict):
+        raise ValueError("document is not a mapping")
+    felem = element_class(elem.get("hardware_type"))
+    if felem is None:
+        raise ValueError("unknown hardware_type %s" % elem.get("hardware_type"))
+    return felem
+
+
+def _validate_YAML_Element(elem: dict):
+    """Validate an element dictionary, raising an exception if it cannot be interpreted"""
+    return _YAML_Element_class(elem)(**elem)
+
+
+def _construct_YAML_Element(elem: dict):
+    """Build an element model from a trusted dictionary (see :func:`trusted_construct`)"""
+    return trusted_construct(_YAML_Element_class(elem), elem)
+
+
+def _stub_YAML_Element(elem: dict, statistics: Union[dict, None] = None) -> LazyElement:
+    """Build a stub for an element dictionary, deferring validation of the full model"""
+    _YAML_Element_class(elem)
+    return LazyElement.from_document(elem, _validate_YAML_Element, statistics)
+
+
+def iter_YAML_Element_Files(
+    filenames: list,
+    errors: Union[list, None] = None,
+    lazy: bool = False,
+    statistics: Union[dict, None] = None,
+    manifest: Union[Dict[str, ManifestEntry], None] = None,
+    trusted: bool = False,
+    documents: Union[list, None] = None,
+):
+    """
+    Parse and validate element files one at a time
+
+    :param list filenames: Element files to load
+    :param list errors: :class:`ElementLoadError` s for the documents that could not be
+        parsed or validated are appended to this list
+    :param bool lazy: Yield :class:`LazyElement` stubs, and validate the full models on first use
+    :param dict statistics: Materialization counters shared by the stubs (if *lazy*)
+    :param dict manifest: A :class:`ManifestEntry` is recorded here for each file that is read
+    :param bool trusted: Build the models with :func:`trusted_construct`; only for files
+        written by the exporters (ignored if *lazy*)
+    :param list documents: If *trusted*, (filename, index, document, element) is appended for
+        each element, for :func:`validate_trusted_YAML_Elements`
+    :returns: Generator of element models, in the order of the files and their documents
+    """
+    for filename in filenames:
+        index = 0
+        try:
+            with open(filename, "r" if manifest is None else "rb") as stream:
+                source, names = stream, []
+                if manifest is not None:
+                    source = stream.read()
+                    stat = os.fstat(stream.fileno())
+                    manifest[filename] = ManifestEntry(
+                        mtime_ns=stat.st_mtime_ns,
+                        size=stat.st_size,
+                        digest=hashlib.sha1(source).hexdigest(),
+                    )
+                    names = manifest[filename].names
+                for index, data in enumerate(yaml.load_all(source, Loader=Loader)):
+                    if data is None:
+                        continue
+                    try:
+                        if lazy:
+                            element = _stub_YAML_Element(data, statistics)
+                        elif trusted:
+                            element = _construct_YAML_Element(data)
+                            if documents is not None:
+                                documents.append((filename, index, data, element))
+                        else:
+                            element = _validate_YAML_Element(data)
+                    except Exception as e:
+                        if errors is not None:
+                            errors.append(
+                                ElementLoadError(
+                                    filename=filename,
+                                    index=index,
+                                    name=_document_field(data, "name"),
+                                    hardware_type=_document_field(data, "hardware_type"),
+                                    error=str(e),
+                                )
+                            )
+                        continue
+                    names.append(element.name)
+                    yield element
+        except (OSError, yaml.YAMLError) as e:
+            # the rest of the file cannot be read
+            if errors is not None:
+                errors.append(ElementLoadError(filename=filename, index=index, error=str(e)))
+
+
+def validate_trusted_YAML_Elements(documents: list, errors: list) -> None:
+    """
+    Validate elements that were loaded with *trusted*, and report any discrepancies
+
+    Each document is validated in full and the result compared with the trusted element,
+    as it is at the time of the check.
+
+    :param list documents: (filename, index, document, element) for each trusted element
+    :param list errors: An :class:`ElementLoadError` is appended for each document that
+        fails validation or validates to a different element
+    """
+    for filename, index, data, element in documents:
+        try:
+            validated = _validate_YAML_Element(data).base_model_dump()
+            trusted = element.base_model_dump()
+            differences = [k for k in validated if validated[k] != trusted.get(k)]
+            if len(differences) > 0:
+                raise ValueError(
+                    "trusted element differs from the validated element in %s"
+                    % ", ".join(differences)
+                )
+        except Exception as e:
+            errors.append(
+                ElementLoadError(
+                    filename=filename,
+                    index=index,
+                    name=_document_field(data, "name"),
+                    hardware_type=_document_field(data, "hardware_type"),
+                    error=str(e),
+                )
+            )
+
+
+def _document_field(data, field: str) -> Union[str, None]:
+    value = data.get(field) if isinstance(data, dict) else None
+    return value if isinstance(value, str) else None
+
+
 def read_YAML_Element_File(filename):
     with open(filename, "r") as stream:
         data = yaml.load(stream, Loader=Loader)
@@ -52,7 +217,238 @@ def read_YAML_Element_Files(filenames: list):
     return gen
 
 
-def read_YAML_Combined_File(filename):
-    with open(filename, "r") as stream:
-        elements = yaml.load(stream, Loader=Loader)
-    return [interpret_YAML_Element(element) for element in elements.values()]
+# number of elements validated together when reading a combined file
+COMBINED_FILE_BATCH = 1000
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _open_zstd(filename: str, mode: str) -> IO:
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            import zstandard as zstd
+        except ImportError:
+            raise ImportError(
+                "zstd compression requires Python 3.14 or the zstandard package; install padantic[zstd]"
+            ) from None
+    return zstd.open(filename, mode)
+
+
+def open_combined_file(filename: str, mode: str = "r", compression: Union[str, None] = None) -> IO:
+    """
+    Open a combined element file as text, compressed or not
+
+    :param str filename: Combined file
+    :param str mode: "r" or "w"
+    :param str compression: None, "gzip" or "zstd"; when reading, the compression is
+        detected from the contents of the file
+    :returns: Text stream
+    """
+    if mode == "r":
+        with open(filename, "rb") as stream:
+            magic = stream.read(4)
+        if magic.startswith(_GZIP_MAGIC):
+            compression = "gzip"
+        elif magic.startswith(_ZSTD_MAGIC):
+            compression = "zstd"
+        else:
+            compression = None
+    if compression is None:
+        return open(filename, mode)
+    if compression == "gzip":
+        return gzip.open(filename, mode + "t")
+    if compression == "zstd":
+        return _open_zstd(filename, mode + "t")
+    raise ValueError("unknown compression %s" % compression)
+
+
+def iter_YAML_Combined_File(filename: str) -> Iterator[Tuple[str, dict]]:
+    """
+    Read a combined element file one element at a time
+
+    The file must have been written by the exporters, where each element is a
+    top-level key whose definition is indented below it, so the file is split into
+    elements line by line and each element is parsed on its own. Only one element
+    is held in memory at a time. Compressed files are read transparently
+    (see :func:`open_combined_file`).
+
+    :param str filename: Combined file, e.g. summary.yaml
+    :returns: Generator of (name, element dictionary), in the order of the file
+    """
+    with open_combined_file(filename) as stream:
+        lines = []
+        for line in stream:
+            # complex keys ("? key") continue with ": value" at the same indentation
+            if lines and line[:1] not in (" ", "\n", ":", "#", ""):
+                yield from (yaml.load("".join(lines), Loader=Loader) or {}).items()
+                lines = []
+            lines.append(line)
+        if lines:
+            yield from (yaml.load("".join(lines), Loader=Loader) or {}).items()
+
+
+def _construct_Combined_Elements(
+    filename: str,
+    elements: Iterator[dict],
+    errors: Union[list, None] = None,
+    documents: Union[list, None] = None,
+) -> list:
+    """Build the elements read from a combined file with :func:`trusted_construct`"""
+    elems = []
+    for index, data in enumerate(elements):
+        try:
+            element = _construct_YAML_Element(data)
+        except Exception as e:
+            if errors is not None:
+                errors.append(
+                    ElementLoadError(
+                        filename=filename,
+                        index=index,
+                        name=_document_field(data, "name"),
+                        hardware_type=_document_field(data, "hardware_type"),
+                        error=str(e),
+                    )
+                )
+            continue
+        if documents is not None:
+            documents.append((filename, index, data, element))
+        elems.append(element)
+    return elems
+
+
+def _interpret_Combined_Elements(
+    filename: str,
+    elements: Iterator[dict],
+    errors: Union[list, None] = None,
+    trusted: bool = False,
+    documents: Union[list, None] = None,
+) -> list:
+    """
+    Validate the elements read from a combined file
+
+    :param str filename: File the elements were read from
+    :param elements: Element dictionaries, in the order of the file
+    :param list errors: :class:`ElementLoadError` s for the elements that could not be
+        validated are appended to this list
+    :param bool trusted: Build the models with :func:`trusted_construct` instead
+    :param list documents: If *trusted*, (filename, index, document, element) is appended for
+        each element, for :func:`validate_trusted_YAML_Elements`
+    :returns: List of the valid element models
+    """
+    if trusted:
+        return _construct_Combined_Elements(filename, elements, errors, documents)
+    elems = []
+    start = 0
+    # validate in batches, so that the whole file is never held in memory
+    while batch := list(islice(elements, COMBINED_FILE_BATCH)):
+        models, failures = validate_elements(batch)
+        if errors is not None:
+            for index, error in sorted(failures.items()):
+                errors.append(
+                    ElementLoadError(
+                        filename=filename,
+                        index=start + index,
+                        name=_document_field(batch[index], "name"),
+                        hardware_type=_document_field(batch[index], "hardware_type"),
+                        error=error,
+                    )
+                )
+        elems.extend(elemmodel for elemmodel in models if elemmodel is not None)
+        start += len(batch)
+    return elems
+
+
+def read_YAML_Combined_File(
+    filename,
+    streaming: bool = False,
+    errors: Union[list, None] = None,
+    trusted: bool = False,
+    documents: Union[list, None] = None,
+):
+    """
+    Load the elements of a combined element file
+
+    :param str filename: Combined file, e.g. summary.yaml; may be compressed
+        (see :func:`open_combined_file`)
+    :param bool streaming: Parse the file one element at a time with
+        :func:`iter_YAML_Combined_File`, which needs much less memory but only accepts
+        files written by the exporters
+    :param list errors: :class:`ElementLoadError` s for the elements that could not be
+        validated are appended to this list
+    :param bool trusted: Build the models with :func:`trusted_construct`; only for files
+        written by the exporters
+    :param list documents: If *trusted*, (filename, index, document, element) is appended for
+        each element, for :func:`validate_trusted_YAML_Elements`
+    :returns: List of element models
+    """
+    if streaming:
+        elements = (element for _, element in iter_YAML_Combined_File(filename))
+    else:
+        with open_combined_file(filename) as stream:
+            elements = iter(yaml.load(stream, Loader=Loader).values())
+    return _interpret_Combined_Elements(filename, elements, errors, trusted, documents)
+
+
+def _interpret_YAML_Element_Files(
+    filenames: list, with_manifest: bool = False, trusted: bool = False, with_documents: bool = False
+) -> tuple:
+    errors = []
+    manifest = {} if with_manifest else None
+    documents = [] if with_documents else None
+    elements = list(
+        iter_YAML_Element_Files(
+            filenames, errors, manifest=manifest, trusted=trusted, documents=documents
+        )
+    )
+    return elements, errors, manifest, documents
+
+
+def read_YAML_Element_Files_parallel(
+    filenames: list,
+    workers: int = None,
+    chunks_per_worker: int = 4,
+    errors: Union[list, None] = None,
+    manifest: Union[Dict[str, ManifestEntry], None] = None,
+    trusted: bool = False,
+    documents: Union[list, None] = None,
+) -> list:
+    """
+    Parse and validate element files in a pool of worker processes
+
+    The files are split into contiguous chunks, each loaded by one worker with
+    :func:`iter_YAML_Element_Files`, and the results are concatenated in the order of
+    *filenames*, so the output is the same as loading the files serially.
+
+    :param list filenames: Element files to load
+    :param int workers: Number of worker processes; defaults to the number of CPUs
+    :param int chunks_per_worker: Number of chunks to split the files into per worker
+    :param list errors: :class:`ElementLoadError` s are appended to this list
+    :param dict manifest: A :class:`ManifestEntry` is recorded here for each file that is read
+    :param bool trusted: Build the models with :func:`trusted_construct`
+    :param list documents: If *trusted*, (filename, index, document, element) is appended for
+        each element, for :func:`validate_trusted_YAML_Elements`
+    :returns: List of element models
+    """
+    workers = workers or os.cpu_count() or 1
+    size = max(1, -(-len(filenames) // (workers * chunks_per_worker)))
+    chunks = [filenames[i: i + size] for i in range(0, len(filenames), size)]
+    elements = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for elems, errs, entries, docs in executor.map(
+            _interpret_YAML_Element_Files,
+            chunks,
+            [manifest is not None] * len(chunks),
+            [trusted] * len(chunks),
+            [documents is not None] * len(chunks),
+        ):
+            elements.extend(elems)
+            if errors is not None:
+                errors.extend(errs)
+            if manifest is not None:
+                manifest.update(entries)
+            if documents is not None:
+                documents.extend(docs)
+    return elements
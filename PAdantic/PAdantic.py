@@ -1,19 +1,31 @@
 import os
 import glob
-from math import copysign
+import threading
+import warnings
+from copy import copy
+from functools import wraps
 from itertools import chain
-from typing import List
-from pydantic import field_validator
+from typing import Callable, Dict, List, Tuple
+from pydantic import Field, field_validator
 from yaml.constructor import Constructor
 
 from PAdantic.models.physical import PhysicalElement, Position
 from .models.elementList import MachineModel, _baseElement
 from .models.element import Drift
+from .models.lazyElement import LazyElementDict
 from .Importers.YAML_Loader import (
     read_YAML_Combined_File,
-    read_YAML_Element_Files,
-    interpret_YAML_Element,
+    read_YAML_Element_Files_parallel,
+    iter_YAML_Element_Files,
+    validate_trusted_YAML_Elements,
+    file_changed,
+    ElementLoadError,
+    ManifestEntry,
 )
+from .Importers.JSON_Loader import read_JSON_File
+from .Importers.Parquet_Loader import read_Parquet_File
+from .Importers.Snapshot_Loader import read_snapshot, snapshot_filename, snapshot_key
+from .Exporters.Snapshot import export_snapshot
 import numpy as np
 
 
@@ -39,8 +51,34 @@ def chunks(li, n):
         yield li[i: i + n]
 
 
+def generation_cached(func):
+    """Cache the result of a method until the machine generation changes"""
+
+    @wraps(func)
+    def wrapper(self):
+        # return a copy so callers cannot modify the cached value
+        return copy(self._cached(func.__name__, lambda: func(self)))
+
+    return wrapper
+
+
 class PAdantic(MachineModel):
     element_list: str | List[_baseElement]
+    # number of processes used to load an element directory; loaded serially if None or 1
+    workers: int | None = Field(default=None, exclude=True)
+    # only validate the full element models loaded from a directory when they are first used
+    lazy: bool = Field(default=False, exclude=True)
+    # build the elements read from files with trusted_construct; only for files written by
+    # the exporters (ignored if lazy)
+    trusted: bool = Field(default=False, exclude=True)
+    # validate trusted elements in a background thread, see PAdantic.validation_errors
+    validate_in_background: bool = Field(default=False, exclude=True)
+    _load_errors: List[ElementLoadError] = []
+    _validation_errors: List[ElementLoadError] = []
+    _validation_thread: threading.Thread | None = None
+    # state of each element file when it was read, for reload
+    _manifest: Dict[str, ManifestEntry] = {}
+    _watcher: Tuple[threading.Thread, threading.Event] | None = None
 
     @field_validator("element_list", mode="before")
     @classmethod
@@ -61,69 +99,288 @@ class PAdantic(MachineModel):
 
     def model_post_init(self, __context):
         super().model_post_init(__context)
+        documents = self._trusted_documents()
+        options = dict(errors=self._load_errors, trusted=self.trusted, documents=documents)
         if isinstance(self.element_list, str):
-            if os.path.isfile(self.element_list):
-                elems = read_YAML_Combined_File(self.element_list)
+            if os.path.isfile(self.element_list) and self.element_list.endswith(".parquet"):
+                elems = read_Parquet_File(self.element_list, **options)
+            elif os.path.isfile(self.element_list) and self.element_list.endswith(".json"):
+                elems = read_JSON_File(self.element_list, **options)
+            elif os.path.isfile(self.element_list):
+                elems = read_YAML_Combined_File(self.element_list, **options)
             elif os.path.isdir(self.element_list):
-                files = glob.glob(
-                    os.path.abspath(self.element_list + "/**/*.yaml"), recursive=True
+                if self.lazy:
+                    self.elements = LazyElementDict(self.elements)
+                elems = self._read_element_files(
+                    self._element_files(), self._load_errors, self._manifest, documents
                 )
-                data = read_YAML_Element_Files(files)
-                elems = [interpret_YAML_Element(data) for data in data]
         else:
             elems = self.element_list
         self.update({y.name: y for y in elems})
+        if documents:
+            self._start_validation(documents)
+        if len(self._load_errors) > 0:
+            warnings.warn(
+                "%d element(s) could not be loaded, see PAdantic.load_errors"
+                % len(self._load_errors)
+            )
+
+    def _element_files(self) -> List[str]:
+        """Return the element files in the element directory"""
+        # sort so that the element order does not depend on the file system
+        return sorted(
+            glob.glob(
+                os.path.abspath(self.element_list + "/**/*.yaml"),
+                recursive=True,
+            )
+        )
+
+    def _read_element_files(
+        self,
+        files: List[str],
+        errors: List[ElementLoadError],
+        manifest: Dict[str, ManifestEntry],
+        documents: list | None = None,
+    ):
+        """Read element files with the loader selected by lazy, workers and trusted"""
+        if self.lazy:
+            return iter_YAML_Element_Files(
+                files,
+                errors=errors,
+                lazy=True,
+                statistics=self.elements.statistics,
+                manifest=manifest,
+            )
+        elif self.workers is not None and self.workers > 1:
+            return read_YAML_Element_Files_parallel(
+                files,
+                workers=self.workers,
+                errors=errors,
+                manifest=manifest,
+                trusted=self.trusted,
+                documents=documents,
+            )
+        return iter_YAML_Element_Files(
+            files, errors=errors, manifest=manifest, trusted=self.trusted, documents=documents
+        )
+
+    def _trusted_documents(self) -> list | None:
+        """The list collecting the trusted documents to validate in the background, if any"""
+        if self.trusted and self.validate_in_background and not self.lazy:
+            return []
+        return None
+
+    def _start_validation(self, documents: list) -> None:
+        """Validate trusted element documents in a background thread"""
+        if self._validation_thread is not None:
+            self._validation_thread.join()
+        # the results of each pass replace those for the files it checks
+        filenames = {filename for filename, _, _, _ in documents}
+        errors = [e for e in self._validation_errors if e.filename not in filenames]
+        self._validation_errors = errors
+        self._validation_thread = threading.Thread(
+            target=validate_trusted_YAML_Elements, args=(documents, errors), daemon=True
+        )
+        self._validation_thread.start()
+
+    def reload(self) -> Dict[str, List[str]]:
+        """
+        Re-read the element files that have been added, changed or removed since they were read
+
+        Files are compared with the manifest recorded when they were loaded (modification
+        time and size, then a hash of the contents). Only the changed files are parsed;
+        their elements replace the old ones, elements no longer in any file are removed,
+        and only the sections and lattices containing them are rebuilt.
+
+        :returns: dict of the *added*, *changed* and *removed* files
+        """
+        if not (isinstance(self.element_list, str) and os.path.isdir(self.element_list)):
+            raise ValueError("reload is only supported when element_list is a directory")
+        files = self._element_files()
+        changes = {
+            "added": [f for f in files if f not in self._manifest],
+            "changed": [
+                f for f in files if f in self._manifest and file_changed(f, self._manifest[f])
+            ],
+            "removed": list(self._manifest.keys() - set(files)),
+        }
+        reread = changes["added"] + changes["changed"]
+        if len(reread) + len(changes["removed"]) == 0:
+            return changes
+        stale = set(changes["changed"] + changes["removed"])
+        old_names = set(chain.from_iterable(self._manifest[f].names for f in stale))
+        for f in changes["removed"]:
+            del self._manifest[f]
+        errors = []
+        documents = self._trusted_documents()
+        elems = {
+            y.name: y
+            for y in self._read_element_files(reread, errors, self._manifest, documents)
+        }
+        with self.batch_update():
+            self.remove([name for name in old_names if name not in elems])
+            self.update(elems)
+        # replace the load errors of the files that were read again
+        stale.update(reread)
+        self._load_errors = [e for e in self._load_errors if e.filename not in stale] + errors
+        if documents:
+            self._start_validation(documents)
+        if len(errors) > 0:
+            warnings.warn(
+                "%d element(s) could not be loaded, see PAdantic.load_errors" % len(errors)
+            )
+        return changes
+
+    def watch(
+        self,
+        interval: float = 2.0,
+        callback: Callable[[Dict[str, List[str]]], None] | None = None,
+    ) -> None:
+        """
+        Poll the element directory in a background thread, calling :meth:`reload` every *interval*
+
+        The machine is updated from the watcher thread, so readers in other threads may
+        see it between updates. Stop the watcher with :meth:`stop_watching`.
+
+        :param float interval: Time between polls, in seconds
+        :param Callable callback: Called with the changes returned by :meth:`reload`
+            whenever any files have changed
+        """
+        self.stop_watching()
+        stop = threading.Event()
+
+        def poll():
+            while not stop.wait(interval):
+                try:
+                    changes = self.reload()
+                except Exception as e:
+                    warnings.warn("reload failed: %s" % e)
+                    continue
+                if callback is not None and any(changes.values()):
+                    callback(changes)
+
+        self._watcher = (threading.Thread(target=poll, daemon=True), stop)
+        self._watcher[0].start()
+
+    def stop_watching(self) -> None:
+        """Stop the watcher started by :meth:`watch`, if any"""
+        if self._watcher is not None:
+            thread, stop = self._watcher
+            stop.set()
+            if thread is not threading.current_thread():
+                thread.join()
+            self._watcher = None
+
+    @classmethod
+    def load(
+        cls,
+        layout: str | dict | None = None,
+        section: str | dict | None = None,
+        element_list: str | None = None,
+        cache_directory: str | None = None,
+        use_cache: bool = True,
+        **kwargs,
+    ) -> "PAdantic":
+        """
+        Build a machine, reusing a snapshot of a previous build if its inputs are unchanged
+
+        Snapshots are keyed by a hash of the layout, section and element files (their
+        paths, modification times and sizes) and of the other keyword arguments, so that
+        e.g. a lazy or trusted build is only reused by callers asking for one; a machine
+        that loads (and, if validated in the background, validates) without errors is
+        written to a new snapshot. Snapshots are pickle files, so the
+        cache directory must not be writable by untrusted users.
+
+        :param str | dict layout: Layout file or definition
+        :param str | dict section: Section file or definition
+        :param str element_list: Element directory or combined element file
+        :param str cache_directory: Directory holding the snapshots; see
+            :func:`default_cache_directory`
+        :param bool use_cache: Whether to read and write snapshots
+        :returns: PAdantic machine
+        """
+        if not use_cache:
+            return cls(layout=layout, section=section, element_list=element_list, **kwargs)
+        sources = [
+            cls.validate_layout(layout) if layout is not None else None,
+            cls.validate_section(section) if section is not None else None,
+            cls.validate_element_list(element_list),
+        ]
+        key = snapshot_key(*sources, options=kwargs)
+        filename = snapshot_filename(key, cache_directory)
+        machine = read_snapshot(filename, key)
+        if isinstance(machine, cls):
+            return machine
+        machine = cls(layout=layout, section=section, element_list=element_list, **kwargs)
+        if len(machine.load_errors) == 0 and len(machine.validation_errors) == 0:
+            export_snapshot(filename, machine, key)
+        return machine
+
+    @property
+    def materialization_statistics(self) -> dict:
+        """Number of elements, and of those whose full model has been validated"""
+        if isinstance(self.elements, LazyElementDict):
+            return dict(self.elements.statistics)
+        return {"elements": len(self.elements), "materialized": len(self.elements)}
+
+    @property
+    def load_errors(self) -> List[ElementLoadError]:
+        """The element documents that could not be parsed or validated when loading"""
+        return list(self._load_errors)
+
+    @property
+    def validation_errors(self) -> List[ElementLoadError]:
+        """
+        The trusted element documents that failed the background validation, or that
+        validate to a different element; waits for the validation to finish
+        """
+        if self._validation_thread is not None:
+            self._validation_thread.join()
+        return list(self._validation_errors)
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        # threads cannot be pickled; the validation results are kept
+        if self._validation_thread is not None:
+            self._validation_thread.join()
+        state["__pydantic_private__"] = dict(
+            state["__pydantic_private__"], _watcher=None, _validation_thread=None
+        )
+        return state
+
+    def get_drifts(self, end: str = None, start: str = None, path: str = None) -> dict:
+        """
+        Compute the drifts and longitudinal positions of the elements along a beam path
+
+        :param str end: Name of the last element
+        :param str start: Name of the first element
+        :param str path: Name of the beam path
+        :returns: dict of arrays (see :meth:`LatticeTable.drifts`)
+        """
+        path_obj, first, last = self._get_path_range(end=end, start=start, path=path)
+        return path_obj.table.drifts(first, last)
 
     def createDrifts(self, end: str = None, start: str = None, path: str = None):
         """Insert drifts into a sequence of 'elements'"""
-        positions = []
-        originalelements = dict()
+        drifts = self.get_drifts(end=end, start=start, path=path)
         elementno = 0
         newelements = dict()
-
-        elements = self.elements_between(
-            start=start, end=end, element_class=None, path=path
-        )
-
-        for name in elements:
-            elem = self.elements[name]
-            originalelements[name] = elem
-            pos = elem.physical.start.array
-            positions.append(pos)
-            positions.append(elem.physical.end.array)
-        positions = positions[1:]
-        positions.append(positions[-1])
-        driftdata = list(
-            zip(iter(list(originalelements.items())), list(chunks(positions, 2)))
-        )
-
-        for e, d in driftdata:
-            newelements[e[0]] = e[1]
-            if len(d) > 1:
-                x1, y1, z1 = d[0]
-                x2, y2, z2 = d[1]
-                try:
-                    length = np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2 + (z2 - z1) ** 2)
-                    vector = dot((d[1] - d[0]), [0, 0, 1])
-                except Exception as exc:
-                    print("Element with error = ", e[0])
-                    print(d)
-                    raise exc
-                if round(length, 6) > 0:
-                    elementno += 1
-                    name = "drift" + str(elementno)
-                    x, y, z = [(a + b) / 2.0 for a, b in zip(d[0], d[1])]
-                    newdrift = Drift(
-                        name=name,
-                        machine_area=newelements[e[0]].machine_area,
-                        hardware_class="drift",
-                        physical=PhysicalElement(
-                            length=round(copysign(length, vector), 6),
-                            middle=Position(x=x, y=y, z=z),
-                            datum=Position(x=x, y=y, z=z),
-                        ),
-                    )
-                    newelements[name] = newdrift
+        for i, name in enumerate(drifts["name"]):
+            newelements[name] = self.elements[name]
+            if drifts["has_drift"][i]:
+                elementno += 1
+                drift_name = "drift" + str(elementno)
+                x, y, z = drifts["drift_middle"][i].tolist()
+                newelements[drift_name] = Drift(
+                    name=drift_name,
+                    machine_area=newelements[name].machine_area,
+                    hardware_class="drift",
+                    physical=PhysicalElement(
+                        length=float(drifts["drift_length"][i]),
+                        middle=Position(x=x, y=y, z=z),
+                        datum=Position(x=x, y=y, z=z),
+                    ),
+                )
         return newelements
 
     def get_elements(self, end: str = None, start: str = None, path: str = None):
@@ -135,18 +392,12 @@ class PAdantic(MachineModel):
         return np.linalg.norm(end - start)
 
     def get_elements_s_pos(self, end: str = None, start: str = None, path: str = None):
-        elements = self.createDrifts(start=start, end=end, path=path)
-        start_and_end = [
-            [name, elem.physical.length, elem.hardware_type == "Drift"]
-            for name, elem in elements.items()
-        ]
-        elem_s = {}
-        s_pos = 0
-        for elem, l, drift in start_and_end:
-            s_pos += l
-            if not drift:
-                elem_s[elem] = round(s_pos, 6)
-        return elem_s
+        path_obj, first, last = self._get_path_range(end=end, start=start, path=path)
+        drifts = path_obj.table.drifts(first, last)
+        # elements that are themselves drifts are not reported
+        keep = ~path_obj.table.mask("hardware_type", "Drift", slice(first, last))
+        s_pos = np.round(drifts["s"][keep], 6).tolist()
+        return dict(zip(np.array(drifts["name"], dtype=object)[keep].tolist(), s_pos))
 
     def get_rf_cavities(self, end: str = None, start: str = None, path: str = None):
         return self.elements_between(
@@ -298,15 +549,15 @@ class PAdantic(MachineModel):
             element_type=["combined_corrector", "horizontal_corrector"],
             path=path,
         )
-        return [
-            (
-                self[c].Horizontal_Corrector
-                if hasattr(self[c], "Horizontal_Corrector")
-                and self[c].Horizontal_Corrector is not None
-                else c
-            )
-            for c in horizontal_correctors
-        ]
+        return [self.__horizontal_corrector(c) for c in horizontal_correctors]
+
+    def __horizontal_corrector(self, elem: str) -> str:
+        return (
+            self[elem].Horizontal_Corrector
+            if hasattr(self[elem], "Horizontal_Corrector")
+            and self[elem].Horizontal_Corrector is not None
+            else elem
+        )
 
     def get_vertical_correctors(
         self, end: str = None, start: str = None, path: str = None
@@ -318,15 +569,15 @@ class PAdantic(MachineModel):
             element_type=["combined_corrector", "Vertical_Corrector"],
             path=path,
         )
-        return [
-            (
-                self[c].Vertical_Corrector
-                if hasattr(self[c], "Vertical_Corrector")
-                and self[c].Vertical_Corrector is not None
-                else c
-            )
-            for c in vertical_correctors
-        ]
+        return [self.__vertical_corrector(c) for c in vertical_correctors]
+
+    def __vertical_corrector(self, elem: str) -> str:
+        return (
+            self[elem].Vertical_Corrector
+            if hasattr(self[elem], "Vertical_Corrector")
+            and self[elem].Vertical_Corrector is not None
+            else elem
+        )
 
     def get_lattice_correctors(
         self, end: str = None, start: str = None, path: str = None
@@ -392,35 +643,29 @@ class PAdantic(MachineModel):
         self, element_class: str | None = None, element_type: str | None = None
     ) -> set:
         return set(
-            [
-                elem
-                for pathelems in [
-                    self.elements_between(
-                        start=None,
-                        end=None,
-                        element_class=element_class,
-                        element_type=element_type,
-                        path=path,
-                    )
-                    for path in self.lattices.keys()
-                ]
-                for elem in pathelems
-            ]
+            self.elements_in_paths(
+                element_class=element_class,
+                element_type=element_type,
+            )
         )
 
     @property
+    @generation_cached
     def all_elements(self):
         return self.__all_elements()
 
     @property
+    @generation_cached
     def all_rf_cavities(self):
         return self.__all_elements(element_class="rf")
 
     @property
+    @generation_cached
     def all_diagnostics(self):
         return self.__all_elements(element_class="diagnostic")
 
     @property
+    @generation_cached
     def all_charge_diagnostics(self) -> set:
         return self.__all_elements(
             element_class="diagnostic",
@@ -428,6 +673,7 @@ class PAdantic(MachineModel):
         )
 
     @property
+    @generation_cached
     def all_beam_position_monitors(self) -> set:
         return self.__all_elements(
             element_class="diagnostic",
@@ -435,6 +681,7 @@ class PAdantic(MachineModel):
         )
 
     @property
+    @generation_cached
     def all_position_diagnostics(self) -> set:
         return self.__all_elements(
             element_class="diagnostic",
@@ -442,6 +689,7 @@ class PAdantic(MachineModel):
         )
 
     @property
+    @generation_cached
     def all_cameras(self) -> set:
         return [
             self[scr].diagnostic.camera_name
@@ -452,6 +700,7 @@ class PAdantic(MachineModel):
         ]
 
     @property
+    @generation_cached
     def all_screens_and_cameras(self) -> set:
         return {
             scr: self[scr].diagnostic.camera_name
@@ -462,10 +711,12 @@ class PAdantic(MachineModel):
         }
 
     @property
+    @generation_cached
     def all_magnets(self) -> set:
         return self.__all_elements(element_class="magnet")
 
     @property
+    @generation_cached
     def all_quadrupoles(self) -> set:
         return self.__all_elements(
             element_class="magnet",
@@ -473,6 +724,7 @@ class PAdantic(MachineModel):
         )
 
     @property
+    @generation_cached
     def all_dipoles(self) -> set:
         return self.__all_elements(
             element_class="magnet",
@@ -480,6 +732,7 @@ class PAdantic(MachineModel):
         )
 
     @property
+    @generation_cached
     def all_combined_correctors(self) -> set:
         return self.__all_elements(
             element_class="magnet",
@@ -487,70 +740,60 @@ class PAdantic(MachineModel):
         )
 
     @property
+    @generation_cached
     def all_separate_magnets(self) -> set:
         return set(
-            [
-                elem
-                for pathelems in [
-                    self.get_separate_magnets(start=None, end=None, path=path)
-                    for path in self.lattices.keys()
+            flatten(
+                [
+                    self.__get_combined_corrector_sub_correctors(c)
+                    for c in self.__all_elements(element_class="magnet")
                 ]
-                for elem in pathelems
-            ]
+            )
         )
 
     @property
+    @generation_cached
     def all_correctors(self) -> set:
         return set(
-            [
-                elem
-                for pathelems in [
-                    self.get_correctors(
-                        start=None,
-                        end=None,
-                        path=path,
+            flatten(
+                [
+                    self.__get_combined_corrector_sub_correctors(c)
+                    for c in self.__all_elements(
+                        element_class="magnet",
+                        element_type=[
+                            "combined_corrector",
+                            "horizontal_corrector",
+                            "vertical_corrector",
+                        ],
                     )
-                    for path in self.lattices.keys()
                 ]
-                for elem in pathelems
-            ]
+            )
         )
 
     @property
+    @generation_cached
     def all_horizontal_correctors(self) -> set:
         return set(
-            [
-                elem
-                for pathelems in [
-                    self.get_horizontal_correctors(
-                        start=None,
-                        end=None,
-                        path=path,
-                    )
-                    for path in self.lattices.keys()
-                ]
-                for elem in pathelems
-            ]
+            self.__horizontal_corrector(c)
+            for c in self.__all_elements(
+                element_class="magnet",
+                element_type=["combined_corrector", "horizontal_corrector"],
+            )
         )
 
     @property
+    @generation_cached
     def all_vertical_correctors(self) -> set:
         return set(
-            [
-                elem
-                for pathelems in [
-                    self.get_vertical_correctors(
-                        start=None,
-                        end=None,
-                        path=path,
-                    )
-                    for path in self.lattices.keys()
-                ]
-                for elem in pathelems
-            ]
+            self.__vertical_corrector(c)
+            for c in self.__all_elements(
+                element_class="magnet",
+                element_type=["combined_corrector", "Vertical_Corrector"],
+            )
         )
 
     @property
+    @generation_cached
     def all_sextupoles(self) -> set:
         return self.__all_elements(
             element_class="magnet",
@@ -558,6 +801,7 @@ class PAdantic(MachineModel):
         )
 
     @property
+    @generation_cached
     def all_solenoids(self) -> set:
         return self.__all_elements(
             element_class="magnet",
@@ -565,10 +809,12 @@ class PAdantic(MachineModel):
         )
 
     @property
+    @generation_cached
     def all_vacuum_components(self) -> set:
         return self.__all_elements(element_class="vacuum")
 
     @property
+    @generation_cached
     def all_shutters(self) -> set:
         return self.__all_elements(
             element_class="vacuum",
@@ -7,24 +7,31 @@ from pydantic import (
     create_model,
     computed_field,
 )
-from typing import Dict, Any, List, Union
+from functools import lru_cache
+from typing import Dict, Any, List, Type, Union
 import yaml
 
 from .baseModels import T, RootModel
 
-# Load PV definitions from yaml file
-# This creates some flake8 F821 warnings that are ignored manually
-with open(
-    os.path.abspath(os.path.dirname(__file__)) + "/../PV_Values.yaml", "r"
-) as stream:
-    data = yaml.load(stream, Loader=yaml.Loader)
-    for k, v in data.items():
-        globals()[k] = v
-    machineNames = globals()["machineNames"]
-    areaNames = globals()["areaNames"]
-    classTypes = globals()["classTypes"]
-    classPVRecords = globals()["classPVRecords"]
-    classPVNames = globals()["classPVNames"]
+PV_VALUES_FILENAME = os.path.abspath(os.path.dirname(__file__)) + "/../PV_Values.yaml"
+
+# keys of PV_Values.yaml, which are also readable as attributes of this module
+PV_VALUE_NAMES = (
+    "machineNames",
+    "areaNames",
+    "classTypes",
+    "classPVRecords",
+    "classPVNames",
+    "elementTypes",
+    "PVTypes",
+)
+
+
+@lru_cache(maxsize=None)
+def pv_values() -> Dict[str, Any]:
+    """Load the PV definitions from PV_Values.yaml on first use"""
+    with open(PV_VALUES_FILENAME, "r") as stream:
+        return yaml.load(stream, Loader=yaml.Loader)
 
 
 class PVSet(RootModel):
@@ -102,8 +109,9 @@ class PV(PVSet):
 
     def validate_machine(cls) -> str:
         v = cls._pv_dict["machine"]
-        if v.upper() not in map(str.upper, machineNames):  # noqa F821
-            print("PV - Validate Machine Error:", machineNames, v)  # noqa F821
+        machineNames = pv_values()["machineNames"]
+        if v.upper() not in map(str.upper, machineNames):
+            print("PV - Validate Machine Error:", machineNames, v)
             raise ValueError("Invalid Machine", v.upper())
         return v.upper()
 
@@ -117,8 +125,9 @@ class PV(PVSet):
         if v is None:
             return v
         else:
-            if v.upper() not in map(str.upper, areaNames) and not v == "":  # noqa F821
-                print("PV - Validate Area Error:", areaNames, v)  # noqa F821
+            areaNames = pv_values()["areaNames"]
+            if v.upper() not in map(str.upper, areaNames) and not v == "":
+                print("PV - Validate Area Error:", areaNames, v)
                 raise ValueError("Invalid Area")
             return v.upper()
 
@@ -132,8 +141,9 @@ class PV(PVSet):
         if v is None:
             return v
         else:
-            if v.upper() not in map(str.upper, classTypes.keys()):  # noqa F821
-                print("PV - Validate Class Error:", classTypes.keys(), v)  # noqa F821
+            classTypes = pv_values()["classTypes"]
+            if v.upper() not in map(str.upper, classTypes.keys()):
+                print("PV - Validate Class Error:", classTypes.keys(), v)
                 raise ValueError("Invalid Class Name")
             return v.upper()
 
@@ -149,10 +159,9 @@ class PV(PVSet):
             return v
         else:
             classname = cls._pv_dict["classname"]
-            if v.upper() not in map(str.upper, classTypes[classname]):  # noqa F821
-                print(
-                    "PV - Validate Type Error:", classTypes[classname], v  # noqa F821
-                )
+            classTypes = pv_values()["classTypes"]
+            if v.upper() not in map(str.upper, classTypes[classname]):
+                print("PV - Validate Type Error:", classTypes[classname], v)
                 raise ValueError("Invalid Type Name")
             return v.upper()
 
@@ -185,13 +194,14 @@ class PV(PVSet):
             typename = cls._pv_dict["typename"]
         else:
             raise ValueError("typename missing")
-        if typename in classPVRecords:  # noqa F821
-            records = classPVRecords[typename]  # noqa F821
+        classPVRecords = pv_values()["classPVRecords"]
+        if typename in classPVRecords:
+            records = classPVRecords[typename]
         else:
             raise ValueError(f"Invalid Record typename {typename} [{cls._pv_dict}]")
-        if isinstance(classPVRecords[typename], str):  # noqa F821
+        if isinstance(classPVRecords[typename], str):
             # If we are referencing another record class!
-            records = classPVRecords[classPVRecords[typename]]  # noqa F821
+            records = classPVRecords[classPVRecords[typename]]
         # print(f'validate_record {typename}', records)
         if v.upper() not in map(str.upper, records):
             # print(f'validate_record {v}','    -',v)
@@ -264,7 +274,7 @@ class ElementPV(RootModel):
     def ser_model(self) -> Dict[str, Any]:
         return {
             k: getattr(self, k)
-            for k in self.model_fields.keys()
+            for k in type(self).model_fields.keys()
             if getattr(self, k) is not None
         }
 
@@ -314,15 +324,38 @@ PVMappings = {
     "RFHeartbeat": "RFHeartbeat",
 }
 
-for k, v in PVMappings.items():
+# the ElementPV model for each mapping is created on first use; where several
+# mappings share a model name, the last one defines it
+_PV_MODEL_MAPPINGS = {v + "PV": k for k, v in PVMappings.items()}
+
+
+@lru_cache(maxsize=None)
+def element_pv_model(name: str) -> Type[ElementPV]:
+    """
+    Return the ElementPV model with a given name (e.g. "MagnetPV"), creating it on first use
+
+    :param str name: Name of the model
+    :returns: ElementPV subclass with a PV field for each PV name of the class
+    """
+    if name not in _PV_MODEL_MAPPINGS:
+        raise KeyError(f"No PV model named {name}")
     pvs = {}
-    for p in classPVNames[k]:  # noqa F821
+    for p in pv_values()["classPVNames"][_PV_MODEL_MAPPINGS[name]]:
         if isinstance(p, str):
             pvs[p] = (PV, Field(postfixdefault=p))
         if isinstance(p, dict):
             for pd, vd in p.items():
                 pvs[pd] = (PV, Field(postfixdefault=vd))
-    PVData = create_model(v + "PV", **pvs, __base__=ElementPV)
-    # print(PVData)
-    # print(pvs)
-    globals()[v + "PV"] = type(v + "PV", (PVData,), {})
+    PVData = create_model(name, **pvs, __base__=ElementPV)
+    model = type(name, (PVData,), {"__module__": __name__})
+    # cache as a module attribute, so that the model can be pickled
+    globals()[name] = model
+    return model
+
+
+def __getattr__(name: str) -> Any:
+    if name in _PV_MODEL_MAPPINGS:
+        return element_pv_model(name)
+    if name in PV_VALUE_NAMES:
+        return pv_values()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, model_serializer, ConfigDict
+from pydantic import BaseModel, model_serializer, ConfigDict, SerializationInfo
 from typing import TypeVar, Any, Type, List, Union
 import yaml
 import numpy as np
@@ -25,6 +25,8 @@ def quoted_presenter(dumper, data):
 
 yaml.add_representer(string_with_quotes, quoted_presenter)
 yaml.add_representer(flow_list, flow_list_rep)
+yaml.add_representer(string_with_quotes, quoted_presenter, Dumper=yaml.CDumper)
+yaml.add_representer(flow_list, flow_list_rep, Dumper=yaml.CDumper)
 
 
 def convert_numpy_types(v):
@@ -100,15 +102,16 @@ class NumpyModel(RootModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     @model_serializer
-    def ser_model(self) -> np.ndarray:
+    def ser_model(self, info: SerializationInfo) -> Union[np.ndarray, list]:
         try:
-            return self.array
+            # JSON output is written by pydantic-core, which does not know numpy types
+            return self.array.tolist() if info.mode_is_json() else self.array
         except Exception:
             return self
 
     @property
     def array(self) -> np.ndarray:
-        return np.array([getattr(self, a) for a in self.model_fields.keys()])
+        return np.array([getattr(self, a) for a in type(self).model_fields.keys()])
 
     @classmethod
     def from_list(cls: Type[T], vec: List[Union[float, int]]) -> T:
@@ -0,0 +1,303 @@
+import copy
+import inspect
+import types
+import typing
+from functools import lru_cache
+from typing import Annotated, Any, Callable, Dict, List, Tuple, Type, Union
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from pydantic_core import PydanticUndefined
+
+from .baseModels import T
+
+_ATOMIC = (type(None), bool, int, float, complex, str, bytes)
+_object_setattr = object.__setattr__
+
+
+def _model_class(annotation: Any) -> Tuple[Union[Type[BaseModel], None], bool]:
+    """Return the model class of a field annotation (unwrapping Optional), and whether it allows None"""
+    optional = False
+    if typing.get_origin(annotation) in (Union, types.UnionType):
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if len(args) != 1:
+            return None, False
+        annotation, optional = args[0], True
+    if (
+        isinstance(annotation, type)
+        and issubclass(annotation, BaseModel)
+        and not annotation.__pydantic_root_model__
+    ):
+        return annotation, optional
+    return None, False
+
+
+def _exact_types(annotation: Any) -> Tuple[type, ...]:
+    """
+    Classes whose instances pydantic keeps as they are for a field annotation
+
+    These are the annotation itself, or the members of a union, if they are all plain
+    classes; pydantic picks a union member whose class matches the value exactly.
+    """
+    members = (annotation,)
+    if typing.get_origin(annotation) in (Union, types.UnionType):
+        members = typing.get_args(annotation)
+    if all(isinstance(member, type) for member in members):
+        return tuple(members)
+    return ()
+
+
+def _field_keys(name: str, field, by_name: bool) -> Tuple[str, ...]:
+    """Keys under which pydantic accepts a field, in order of precedence"""
+    alias = field.validation_alias if field.validation_alias is not None else field.alias
+    if isinstance(alias, str):
+        keys = [alias]
+    else:
+        keys = [a for a in getattr(alias, "choices", []) if isinstance(a, str)]
+    if by_name or alias is None:
+        keys.append(name)
+    return tuple(dict.fromkeys(keys))
+
+
+def _new_model(cls: Type[T], values: dict, fields_set: set, extra: Union[dict, None] = None) -> T:
+    """Create a model instance from its field values, as :meth:`BaseModel.model_construct` does"""
+    instance = cls.__new__(cls)
+    _object_setattr(instance, "__dict__", values)
+    _object_setattr(instance, "__pydantic_fields_set__", fields_set)
+    _object_setattr(instance, "__pydantic_extra__", extra)
+    _object_setattr(instance, "__pydantic_private__", None)
+    if cls.__pydantic_post_init__:
+        instance.model_post_init(None)
+    return instance
+
+
+def _copy_default(value: Any) -> Any:
+    """
+    Deep copy a default value
+
+    Models, lists and dicts are rebuilt directly, which is several times faster than
+    :func:`copy.deepcopy` for the nested model defaults used throughout the element models.
+    """
+    if isinstance(value, _ATOMIC):
+        return value
+    if isinstance(value, BaseModel):
+        instance = value.__class__.__new__(value.__class__)
+        _object_setattr(
+            instance, "__dict__", {k: _copy_default(v) for k, v in value.__dict__.items()}
+        )
+        _object_setattr(instance, "__pydantic_fields_set__", set(value.__pydantic_fields_set__))
+        for attribute in ("__pydantic_extra__", "__pydantic_private__"):
+            state = getattr(value, attribute, None)
+            _object_setattr(instance, attribute, None if state is None else _copy_default(state))
+        return instance
+    if type(value) is list:
+        return [_copy_default(v) for v in value]
+    if type(value) is dict:
+        return {k: _copy_default(v) for k, v in value.items()}
+    return copy.deepcopy(value)
+
+
+def _default_copier(value: Any) -> Callable[[], Any]:
+    """
+    Return a function producing a fresh copy of a default value
+
+    For models the copy is planned once, as a copier for each field, so that the many
+    nested defaults of the element models (e.g. the Multipoles of each magnet) are not
+    walked again for every element.
+    """
+    if isinstance(value, _ATOMIC):
+        return lambda: value
+    if (
+        isinstance(value, BaseModel)
+        and getattr(value, "__pydantic_extra__", None) is None
+        and getattr(value, "__pydantic_private__", None) is None
+    ):
+        cls, fields_set = value.__class__, value.__pydantic_fields_set__
+        if all(isinstance(v, _ATOMIC) for v in value.__dict__.values()):
+            # a model of plain values only needs its field dictionary copied
+            state = value.__dict__
+            return lambda: _new_model(cls, dict(state), set(fields_set))
+        copiers = [(k, _default_copier(v)) for k, v in value.__dict__.items()]
+        return lambda: _new_model(cls, {k: copy() for k, copy in copiers}, set(fields_set))
+    return lambda: _copy_default(value)
+
+
+def _field_validator(field) -> Callable[[Any], Any]:
+    """Return a function validating a value of a field with pydantic, building the validator on first use"""
+    adapter = None
+
+    def validate(value: Any) -> Any:
+        nonlocal adapter
+        if adapter is None:
+            annotation = field.annotation
+            if field.metadata:
+                # constraints, e.g. the Ge(0) of NonNegativeFloat
+                annotation = Annotated[(annotation, *field.metadata)]
+            adapter = TypeAdapter(annotation, config=ConfigDict(arbitrary_types_allowed=True))
+        return adapter.validate_python(value)
+
+    return validate
+
+
+def _field_converter(field, validators: List[Callable]) -> Callable[[Any], Any]:
+    """
+    Return a function converting an input value of a field into the field value
+
+    The "before" validators of the field are applied first. Dictionaries for a nested
+    model are built with :func:`trusted_construct`, and values that already have the
+    type of the field are kept; anything else is validated by pydantic, so that values
+    of the wrong type raise a ValidationError as they would when validating the model.
+    """
+    model, optional = _model_class(field.annotation)
+    if model is not None:
+
+        def check(value: Any) -> Any:
+            if type(value) is dict:
+                return trusted_construct(model, value)
+            if isinstance(value, model) or (optional and value is None):
+                return value
+            return model.model_validate(value)
+
+    elif field.annotation is Any:
+
+        def check(value: Any) -> Any:
+            return value
+
+    elif _exact_types(field.annotation) and len(field.metadata) == 0:
+        kinds, validate = _exact_types(field.annotation), _field_validator(field)
+
+        def check(value: Any) -> Any:
+            return value if type(value) in kinds else validate(value)
+
+    else:
+        check = _field_validator(field)
+    if len(validators) == 0:
+        return check
+
+    def convert(value: Any) -> Any:
+        for validator in validators:
+            value = validator(value)
+        return check(value)
+
+    return convert
+
+
+def _takes_value_only(function: Callable) -> bool:
+    return len(inspect.signature(function).parameters) == 1
+
+
+def _field_validators(cls: Type[BaseModel]) -> Union[Dict[str, List[Callable]], None]:
+    """
+    Collect the field validators of a model class
+
+    :returns: dict of field name -> list of bound validator functions, in the order
+        pydantic applies them; None if any validator is not a "before" validator taking
+        only the value
+    """
+    validators = {}
+    for decorator in cls.__pydantic_decorators__.field_validators.values():
+        function = getattr(cls, decorator.cls_var_name)
+        if decorator.info.mode != "before" or not _takes_value_only(function):
+            return None
+        fields = cls.model_fields if "*" in decorator.info.fields else decorator.info.fields
+        for name in fields:
+            # before validators run in reverse order of definition
+            validators.setdefault(name, []).insert(0, function)
+    return validators
+
+
+def _model_validators(cls: Type[BaseModel]) -> Union[List[Callable], None]:
+    """The "before" model validators of a model class, in the order pydantic applies them"""
+    validators = []
+    for decorator in cls.__pydantic_decorators__.model_validators.values():
+        function = getattr(cls, decorator.cls_var_name)
+        if decorator.info.mode != "before" or not _takes_value_only(function):
+            return None
+        validators.insert(0, function)
+    return validators
+
+
+@lru_cache(maxsize=None)
+def _construction_plan(cls: Type[BaseModel]) -> Union[tuple, None]:
+    """
+    Describe how to build a model class without validating it in full
+
+    :returns: The input keys, as key -> (field name, precedence, converter); the fields in
+        order of definition, as (name, function returning a fresh copy of the default, or
+        None to use the default factory); the required fields; the "before" model
+        validators; for models with a custom __init__, the keys that may be built without
+        it (None otherwise); and the extra setting. None if the model must always be
+        validated by pydantic.
+    """
+    decorators = cls.__pydantic_decorators__
+    if cls.__pydantic_root_model__ or decorators.root_validators or decorators.validators:
+        return None
+    validators = _field_validators(cls)
+    before = _model_validators(cls)
+    if validators is None or before is None:
+        return None
+    config = cls.model_config
+    by_name = bool(config.get("populate_by_name") or config.get("validate_by_name"))
+    keys = {}
+    for name, field in cls.model_fields.items():
+        convert = _field_converter(field, validators.get(name, []))
+        for rank, key in enumerate(_field_keys(name, field, by_name)):
+            keys.setdefault(key, (name, rank, convert))
+    fields = [
+        (name, None if field.default is PydanticUndefined else _default_copier(field.default))
+        for name, field in cls.model_fields.items()
+    ]
+    required = frozenset(name for name, field in cls.model_fields.items() if field.is_required())
+    init_keys = None
+    if any("__init__" in vars(base) for base in cls.__mro__[: cls.__mro__.index(BaseModel)]):
+        # custom __init__ methods handle inputs that are not fields (e.g. k1l), so such
+        # inputs are validated in full
+        init_keys = frozenset(keys)
+    return keys, fields, required, before, init_keys, config.get("extra")
+
+
+def trusted_construct(cls: Type[T], data: Dict[str, Any]) -> T:
+    """
+    Build a model from data that is known to be valid, skipping most of the validation
+
+    Nested models given as dictionaries are built recursively in the same way, and
+    default values are copied structurally rather than with :func:`copy.deepcopy`. The
+    "before" validators are called directly, so the compact forms written by the
+    exporters (e.g. positions as lists) are still converted. Values that do not already
+    have the type of their field are validated by pydantic, so invalid documents raise
+    a ValidationError; models with other validators, and models with a custom __init__
+    given inputs that are not fields, are validated in full.
+
+    :param cls: Model class to build
+    :param dict data: Field values, as accepted by the model
+    :returns: Instance of *cls*
+    """
+    plan = _construction_plan(cls)
+    if plan is None or type(data) is not dict:
+        return cls.model_validate(data)
+    keys, fields, required, before, init_keys, extra = plan
+    for validator in before:
+        data = validator(data)
+    if init_keys is not None and not init_keys.issuperset(data):
+        return cls(**data)
+    inputs = {}
+    unknown = {}
+    for key, value in data.items():
+        spec = keys.get(key)
+        if spec is None:
+            unknown[key] = value
+        elif spec[0] not in inputs or spec[1] < inputs[spec[0]][0]:
+            inputs[spec[0]] = (spec[1], spec[2], value)
+    if (unknown and extra == "forbid") or not required.issubset(inputs):
+        # let pydantic report the error
+        return cls.model_validate(data)
+    values = {}
+    for name, copier in fields:
+        if name in inputs:
+            _, convert, value = inputs[name]
+            values[name] = convert(value)
+        elif copier is not None:
+            values[name] = copier()
+        else:
+            values[name] = cls.model_fields[name].get_default(
+                call_default_factory=True, validated_data=values
+            )
+    return _new_model(cls, values, set(inputs), unknown if extra == "allow" else None)
@@ -74,6 +74,8 @@ def quoted_presenter(dumper, data):
 
 yaml.add_representer(string_with_quotes, quoted_presenter)
 yaml.add_representer(flow_list, flow_list_rep)
+yaml.add_representer(string_with_quotes, quoted_presenter, Dumper=yaml.CDumper)
+yaml.add_representer(flow_list, flow_list_rep, Dumper=yaml.CDumper)
 
 
 class _baseElement(IgnoreExtra):
@@ -1,11 +1,15 @@
 import os
-from typing import List, Dict, Any, Union
+from contextlib import contextmanager
+from itertools import count
+from typing import List, Dict, Any, Union, Callable
 from pydantic import field_validator, BaseModel, ValidationInfo
 from warnings import warn
 from ._functions import read_yaml, merge_two_dicts
 from .element import _baseElement
-from .baseModels import RootModel
+from .baseModels import RootModel, Aliases
 from .exceptions import LatticeError
+from .latticeTable import LatticeTable, element_geometry
+import numpy as np
 import warnings
 
 
@@ -130,7 +134,8 @@ class SectionLattice(BaseLatticeModel):
             return getattr(self.elements, a)
 
     def _get_all_elements(self) -> ElementList:
-        return [self.elements[e] for e in self.order if e in self.elements.names()]
+        elements = self.elements.elements
+        return [elements[e] for e in self.order if e in elements]
 
 
 class MachineLayout(BaseLatticeModel):
@@ -140,26 +145,42 @@ class MachineLayout(BaseLatticeModel):
     def model_post_init(self, __context):
         matrix = [v._get_all_elements() for v in self.sections.values()]
         all_elems = [item for row in matrix for item in row]
+        geometry = element_geometry(all_elems)
         if len(all_elems) > 0:
-            all_elems_reversed = reversed(all_elems)
             superelem = all_elems[-1].name
-            start_pos = all_elems[-1].physical.start
-            all_elem_corrected = []
-            for elem in all_elems_reversed:
-                vector = (
-                    not elem.physical.end.vector_angle(start_pos, [0, 0, -1]) < -5e-6
-                )
+            start_z = geometry[-1, 0, 2]
+            keep = []
+            for i in range(len(all_elems) - 1, -1, -1):
+                elem = all_elems[i]
+                # the element must not end downstream of the start of the next element
+                vector = not (geometry[i, 2, 2] - start_z) * -1 < -5e-6
                 if not elem.is_subelement():
                     superelem = elem.name
                 subelem = (
                     elem.subelement == superelem if elem.is_subelement() else False
                 )
                 if vector or subelem:
-                    all_elem_corrected += [elem]
-                    start_pos = elem.physical.start
-            self._all_elements = list(reversed(all_elem_corrected))
+                    keep.append(i)
+                    start_z = geometry[i, 0, 2]
+            keep.reverse()
+            self._all_elements = [all_elems[i] for i in keep]
+            geometry = geometry[keep]
         else:
             self._all_elements = {}
+        self._build_name_index()
+        self._table = LatticeTable(self._get_all_elements(), geometry=geometry)
+
+    def _build_name_index(self) -> None:
+        """Cache the ordered element names and a name -> position lookup table"""
+        self._element_names = [e.name for e in self._get_all_elements()]
+        self._name_index = {}
+        for index, name in enumerate(self._element_names):
+            # first occurrence wins, matching list.index
+            self._name_index.setdefault(name, index)
+        # aliases never shadow a canonical name
+        for index, elem in enumerate(self._get_all_elements()):
+            for alias in _element_aliases(elem):
+                self._name_index.setdefault(alias, index)
 
     def names(self):
         return [e.name for e in getattr(self, self._basename).values()]
@@ -177,7 +198,7 @@ class MachineLayout(BaseLatticeModel):
         return self._all_elements
 
     def _get_all_element_names(self) -> list:
-        return [e.name for e in self._get_all_elements()]
+        return self._element_names
 
     def get_element(self, name: str) -> _baseElement:
         """
@@ -186,9 +207,8 @@ class MachineLayout(BaseLatticeModel):
         :param str name: Name of the element to look up
         :returns: LatticeElement instance for that element
         """
-        if name in self._get_all_element_names():
-            index = self._get_all_element_names().index(name)
-            return self._get_all_elements()[index]
+        if name in self._name_index:
+            return self._get_all_elements()[self._name_index[name]]
         else:
             message = "Element %s does not exist along the beam path" % name
             raise LatticeError(message)
@@ -211,30 +231,37 @@ class MachineLayout(BaseLatticeModel):
         """
         try:
             # fetch the index of the element
-            return self._get_all_element_names().index(name)
-        except ValueError:
+            return self._name_index[name]
+        except KeyError:
             message = "Element %s does not exist along the beam path" % name
             raise LatticeError(message)
 
     @property
     def elements(self):
-        return self._get_all_element_names()
+        return list(self._get_all_element_names())
+
+    @property
+    def table(self) -> LatticeTable:
+        """
+        Columnar (NumPy structured array) view of the elements along this beam path
+
+        Built with the beam path; see :class:`LatticeTable` for keeping it up to date.
+        """
+        return self._table
 
-    def _filter_element_list(self, result, filter, attrib):
+    def _filter_element_list(
+        self, result: np.ndarray, filter: Union[str, list, None], attrib: str
+    ) -> np.ndarray:
+        """
+        Filter an array of element positions on the value of a coded table column
+
+        :param np.ndarray result: Positions of the elements along the beam path
+        :param str | list filter: Value(s) to match (case-insensitive); None applies no filter
+        :param str attrib: Name of the column to filter on
+        :returns: The subset of *result* matching the filter
+        """
         if isinstance(filter, (str, list)):
-            # make list of valid types
-            if isinstance(filter, str):
-                filter_list = [filter.lower()]
-            elif isinstance(filter, list):
-                filter_list = [_type.lower() for _type in filter]
-            # apply search criteria
-            return [
-                ele
-                for ele in result
-                if (
-                    hasattr(ele, attrib) and getattr(ele, attrib).lower() in filter_list
-                )
-            ]
+            return result[self._table.mask(attrib, filter, result)]
         return result
 
     def get_all_elements(
@@ -279,13 +306,93 @@ class MachineLayout(BaseLatticeModel):
         # truncate the list between the start and end elements
         first = self._lookup_index(start)
         last = self._lookup_index(end) + 1
-        result = self._get_all_elements()[first:last]
+        result = self._filtered_positions(
+            element_type, element_model, element_class, first, last
+        )
+        if result is None:
+            return element_names[first:last]
+        return self._table.names(result)
+
+    def element_at(self, s: float) -> Union[str, None]:
+        """
+        Return the element occupying a longitudinal position along the beam path
+
+        :param float s: Longitudinal position
+        :returns: Name of the first element with length whose extent contains *s*, or None
+            if *s* lies in a drift
+        """
+        for position in self._table.overlapping(s, s):
+            start, end = self._table.s_intervals[position]
+            if start <= s < end:
+                return self._element_names[position]
+        return None
+
+    def elements_overlapping(self, s0: float, s1: float) -> List[str]:
+        """
+        Returns an ordered list of all elements whose longitudinal extent overlaps [*s0*, *s1*]
+
+        :param float s0: Start of the longitudinal region
+        :param float s1: End of the longitudinal region
+        :returns: List of element names, including zero-length elements inside the region
+        """
+        return self._table.names(self._table.overlapping(min(s0, s1), max(s0, s1)))
+
+    def _filtered_positions(
+        self,
+        element_type: Union[str, list, None] = None,
+        element_model: Union[str, list, None] = None,
+        element_class: Union[str, list, None] = None,
+        first: int = 0,
+        last: Union[int, None] = None,
+    ) -> Union[np.ndarray, None]:
+        """
+        Positions of the elements in rows *first* to *last* (exclusive) matching the filters
+
+        :returns: Sorted array of positions, or None if no filter is given
+        """
+        return self._table.filter(
+            element_type, element_model, element_class, first, last
+        )
+
+
+# shared by all machines so that a generation is never reused, even after re-initialisation
+_generations = count(1)
+
 
-        result = self._filter_element_list(result, element_type, "hardware_type")
-        result = self._filter_element_list(result, element_model, "hardware_model")
-        result = self._filter_element_list(result, element_class, "hardware_class")
+_QUERY_KEYWORDS = ("end", "start", "element_type", "element_model", "element_class", "path")
 
-        return self._get_element_names(result)
+
+def _filter_key(_filter: Union[str, list, None]) -> Union[tuple, None]:
+    """Normalise an element filter so that equivalent filters compare equal"""
+    if isinstance(_filter, str):
+        return (_filter.lower(),)
+    if isinstance(_filter, list):
+        return tuple(sorted({f.lower() for f in _filter}))
+    return None
+
+
+def _element_attribute(elem: Union[_baseElement, dict], attribute: str) -> Any:
+    """Read an attribute from an element model or an element dictionary"""
+    if isinstance(elem, dict):
+        return elem.get(attribute)
+    return getattr(elem, attribute, None)
+
+
+def _element_aliases(elem: Union[_baseElement, dict]) -> list:
+    """Return the aliases of an element model or an element dictionary"""
+    if isinstance(elem, dict):
+        aliases = elem.get("alias", elem.get("name_alias"))
+    else:
+        aliases = getattr(elem, "alias", None)
+    if aliases is None:
+        return []
+    if isinstance(aliases, str):
+        return [a.strip() for a in aliases.split(",") if a.strip()]
+    if isinstance(aliases, Aliases):
+        return list(aliases.aliases)
+    if isinstance(aliases, dict):
+        return list(aliases.get("aliases", []))
+    return list(aliases)
 
 
 class MachineModel(RootModel):
@@ -297,6 +404,15 @@ class MachineModel(RootModel):
     _layouts: List[str]
     _section_definitions: List[str]
     _default_path: str = None
+    _generation: int = 0
+    _cache: Dict[str, tuple] = {}
+    _cache_hits: int = 0
+    _cache_misses: int = 0
+    _update_depth: int = 0
+    _pending_areas: set = set()
+    _needs_full_rebuild: bool = True
+    _section_index: Union[Dict[str, set], None] = None
+    _alias_index: Dict[str, str] = {}
 
     @field_validator("layout", mode="before")
     @classmethod
@@ -369,11 +485,14 @@ class MachineModel(RootModel):
             if "sections" not in self.section:
                 raise KeyError("section must specify sections with a list of sections")
             self._section_definitions = self.section["sections"]
+        self._alias_index = {}
+        self._index_aliases(self.elements)
         if len(self.elements) > 0:
             if self.section:
                 self._build_layouts(self.elements)
             if self.section is None:
                 self._build_sections_from_elements(self.elements)
+        self._bump_generation()
 
     def __add__(self, other) -> dict:
         copy = self.elements.copy()
@@ -392,22 +511,205 @@ class MachineModel(RootModel):
         return str(list(self.elements.keys()))
 
     def append(self, values: dict) -> None:
+        """
+        Add or replace elements, rebuilding only the sections and lattices that contain them
+
+        :param dict values: Elements to add, keyed by name
+        """
+        self._pending_areas |= self._affected_areas(values)
+        self._index_aliases(values)
         self.elements = merge_two_dicts(values, self.elements)
-        self._build_sections_from_elements(self.elements)
-        self._build_layouts(self.elements)
+        if self._update_depth == 0:
+            self._commit_updates()
 
     def update(self, values: dict) -> None:
+        """
+        Add or replace elements; see :meth:`append`
+
+        Filtered queries such as :meth:`elements_between` read the element attributes
+        from tables built with the lattices, so an element changed in place must be
+        passed back through this method for the queries to see the change.
+
+        :param dict values: Elements to add, keyed by name
+        """
         return self.append(values)
 
+    def update_many(self, values: List[dict]) -> None:
+        """
+        Add or replace several sets of elements, rebuilding sections and lattices once
+
+        :param list values: List of dictionaries of elements keyed by name
+        """
+        with self.batch_update():
+            for value in values:
+                self.append(value)
+
+    def remove(self, names: List[str]) -> None:
+        """
+        Remove elements, rebuilding only the sections and lattices that contained them
+
+        :param list names: Keys of the elements to remove; unknown keys are ignored
+        """
+        removed = {
+            name: dict.get(self.elements, name) for name in names if name in self.elements
+        }
+        if len(removed) == 0:
+            return
+        self._pending_areas |= self._affected_areas(removed)
+        for key, elem in removed.items():
+            for alias in _element_aliases(elem):
+                if self._alias_index.get(alias) == key:
+                    del self._alias_index[alias]
+            dict.__delitem__(self.elements, key)
+        if self._update_depth == 0:
+            self._commit_updates()
+
+    @contextmanager
+    def batch_update(self):
+        """
+        Defer rebuilding sections and lattices until the end of the block
+
+        Inside the block, :meth:`append` and :meth:`update` only merge the elements;
+        the affected sections and lattices are rebuilt once on exit.
+        """
+        self._update_depth += 1
+        try:
+            yield self
+        finally:
+            self._update_depth -= 1
+            if self._update_depth == 0:
+                self._commit_updates()
+
+    def _affected_areas(self, values: dict) -> set:
+        """Return the sections containing the new elements or the elements they replace"""
+        areas = set()
+        for key, elem in values.items():
+            for e in (elem, dict.get(self.elements, key)):
+                if e is None:
+                    continue
+                area = _element_attribute(e, "machine_area")
+                if area is not None:
+                    areas.add(area)
+                areas.update(self._sections_containing(_element_attribute(e, "name")))
+        return areas
+
+    def _sections_containing(self, name: str) -> set:
+        """Return the names of the defined sections that list a given element"""
+        if self._section_index is None:
+            self._section_index = {}
+            for _area, names in self._section_definitions.items():
+                for _name in names:
+                    self._section_index.setdefault(_name, set()).add(_area)
+        return self._section_index.get(name, set())
+
+    def _index_aliases(self, values: dict) -> None:
+        """Point the aliases of new elements at their keys, dropping those of the elements they replace"""
+        for key, elem in values.items():
+            old = dict.get(self.elements, key)
+            if old is not None:
+                for alias in _element_aliases(old):
+                    if self._alias_index.get(alias) == key:
+                        del self._alias_index[alias]
+            for alias in _element_aliases(elem):
+                # the first element to claim an alias keeps it
+                self._alias_index.setdefault(alias, key)
+
+    def resolve_name(self, name: str) -> str:
+        """
+        Return the key of the element with a given name or alias
+
+        Canonical names take precedence over aliases.
+
+        :param str name: Name or alias of the element
+        :returns: Key of the element in :attr:`elements`, or *name* if it is not known
+        """
+        if name in self.elements:
+            return name
+        return self._alias_index.get(name, name)
+
+    def _commit_updates(self) -> None:
+        """Rebuild the sections and lattices affected by the pending updates"""
+        if self._needs_full_rebuild:
+            areas = None
+        elif not self._pending_areas:
+            return
+        else:
+            areas = self._pending_areas
+        self._build_sections_from_elements(self.elements, areas=areas)
+        self._build_layouts(self.elements, areas=areas)
+        self._pending_areas = set()
+        self._needs_full_rebuild = False
+        self._bump_generation()
+
     def __getitem__(
         self, item: str | list[str] | tuple[str]
     ) -> BaseModel | list[BaseModel]:
         if isinstance(item, (list, tuple)):
-            return [self.elements[subitem] for subitem in item]
-        return self.elements[item]
+            return [self.elements[self.resolve_name(subitem)] for subitem in item]
+        return self.elements[self.resolve_name(item)]
 
     def __setitem__(self, item: str, value: Any) -> None:
+        hits, misses = self._cache_hits, self._cache_misses
         super().__init__(elements=self + {item: value})
+        self._cache_hits, self._cache_misses = hits, misses
+        self._bump_generation()
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        # derived values are recomputed on demand after unpickling
+        private = dict(state["__pydantic_private__"] or {})
+        private.update(_cache={}, _cache_hits=0, _cache_misses=0)
+        state["__pydantic_private__"] = private
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        super().__setstate__(state)
+        # generations are only unique within a process
+        self._bump_generation()
+
+    @property
+    def generation(self) -> int:
+        """Counter that changes every time the elements, sections or lattices are rebuilt"""
+        return self._generation
+
+    def _bump_generation(self) -> None:
+        self._generation = next(_generations)
+        self._cache = {}
+
+    def _cached(self, key: str, factory: Callable[[], Any]) -> Any:
+        """
+        Return a value derived from the machine, computing it only once per generation
+
+        :param str key: Name of the cached value
+        :param Callable factory: Function computing the value on a cache miss
+        :returns: The cached value
+        """
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == self._generation:
+            self._cache_hits += 1
+            return entry[1]
+        self._cache_misses += 1
+        value = factory()
+        self._cache[key] = (self._generation, value)
+        return value
+
+    def clear_cache(self) -> None:
+        """Drop all cached derived values and reset the cache statistics"""
+        self._cache = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    @property
+    def cache_statistics(self) -> dict:
+        """Hits, misses, hit rate and number of entries of the derived value cache"""
+        lookups = self._cache_hits + self._cache_misses
+        return {
+            "generation": self._generation,
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "hit_rate": self._cache_hits / lookups if lookups else 0.0,
+            "entries": len(self._cache),
+        }
 
     @property
     def default_path(self) -> str:
@@ -417,66 +719,66 @@ class MachineModel(RootModel):
     def default_path(self, path: str):
         self._default_path = path
 
-    def _build_sections_from_elements(self, elements: dict) -> None:
-        """build sections from the elements if no section definition is provided"""
-        # Build a unique list of machine areas from the elements
-        areas = set()
-        for elem in elements.values():
-            area = (
-                elem.get("machine_area")
-                if isinstance(elem, dict)
-                else getattr(
-                    elem,
-                    "machine_area",
-                    None,
-                )
-            )
-            if area is not None:
-                areas.add(area)
-        areas = list(areas)
-        for area in areas:
-            # collect list of elements from this machine area
-            new_elements = [
-                x
-                for x in elements.values()
-                if (
-                    x.get("machine_area")
-                    if isinstance(x, dict)
-                    else getattr(x, "machine_area", None)
-                )
-                == area
-            ]
+    def _build_sections_from_elements(
+        self, elements: dict, areas: Union[set, None] = None
+    ) -> None:
+        """
+        build sections from the elements if no section definition is provided
+
+        :param dict elements: All elements in the machine
+        :param set areas: Only rebuild these machine areas; all areas are rebuilt if None
+        """
+        rebuild = areas
+        # group the elements by machine area in a single pass; the stored values are
+        # read directly so that lazily loaded elements are not validated
+        grouped = {}
+        for elem in dict.values(elements):
+            area = _element_attribute(elem, "machine_area")
+            if area is not None and (rebuild is None or area in rebuild):
+                grouped.setdefault(area, []).append(elem)
+        if rebuild is not None:
+            # sections whose elements have all been removed
+            for area in rebuild.difference(grouped):
+                self.sections.pop(area, None)
+        for area, new_elements in grouped.items():
+            names = [_element_attribute(e, "name") for e in new_elements]
             self.sections[area] = SectionLattice(
                 name=area,
                 elements=new_elements,
-                order=[
-                    e["name"] if isinstance(e, dict) else e.name for e in new_elements
-                ],
+                order=names,
             )
-            if not self._section_definitions or area not in self._section_definitions:
-                self._section_definitions[area] = [
-                    e["name"] if isinstance(e, dict) else e.name for e in new_elements
-                ]
-        self.lattices = {}
-
-    def _build_layouts(self, elements: dict) -> None:
-        """build lists defining the lattice elements along each possible beam path"""
+            if area not in self._section_definitions:
+                self._section_definitions[area] = list(names)
+                self._section_index = None
+        if rebuild is None:
+            self.lattices = {}
+
+    def _build_layouts(self, elements: dict, areas: Union[set, None] = None) -> None:
+        """
+        build lists defining the lattice elements along each possible beam path
+
+        :param dict elements: All elements in the machine
+        :param set areas: Only rebuild these sections and the beam paths containing them;
+            everything is rebuilt if None
+        """
+        rebuild = areas
+        elements_by_name = {x.name: x for x in dict.values(elements)}
         # build dictionary with a lattice for each beam path
         if self._layouts:
+            built = set()
             for path, areas in self._layouts.items():
+                if (
+                    rebuild is not None
+                    and path in self.lattices
+                    and rebuild.isdisjoint(areas)
+                ):
+                    continue
                 for _area in areas:
+                    if _area in built or (rebuild is not None and _area not in rebuild):
+                        continue
+                    built.add(_area)
                     if _area in self._section_definitions:
-                        # collect list of elements from this machine area
-                        new_elements = [
-                            x
-                            for x in elements.values()
-                            if (x.name in self._section_definitions[_area])
-                        ]
-                        self.sections[_area] = SectionLattice(
-                            name=_area,
-                            elements=new_elements,
-                            order=self._section_definitions[_area],
-                        )
+                        self._build_defined_section(_area, elements_by_name)
                     else:
                         print("MachineModel", "_build_layouts", _area, "missing")
 
@@ -491,29 +793,36 @@ class MachineModel(RootModel):
             if len(self.lattices) == 1 and self._default_path is None:
                 self._default_path = list(self.lattices.keys())[0]
         else:
-            for _area, elem_names in self._section_definitions.items():
-                # collect list of elements from this machine area
-                new_elements = [
-                    x
-                    for x in elements.values()
-                    if (x.name in self._section_definitions[_area])
-                ]
-                self.sections[_area] = SectionLattice(
-                    name=_area,
-                    elements=new_elements,
-                    order=elem_names,
-                )
+            for _area in self._section_definitions:
+                if rebuild is not None and _area not in rebuild:
+                    continue
+                self._build_defined_section(_area, elements_by_name)
             self.lattices = {}
 
+    def _build_defined_section(self, area: str, elements_by_name: dict) -> None:
+        """
+        build a section from its definition
+
+        :param str area: Name of the section
+        :param dict elements_by_name: All elements in the machine, keyed by element name
+        """
+        order = self._section_definitions[area]
+        self.sections[area] = SectionLattice(
+            name=area,
+            elements=[elements_by_name[n] for n in order if n in elements_by_name],
+            order=order,
+        )
+
     def get_element(self, name: str) -> _baseElement:
         """
         Return the LatticeElement object corresponding to a given machine element
 
-        :param str name: Name of the element to look up
+        :param str name: Name or alias of the element to look up
         :returns: LatticeElement instance for that element
         """
-        if name in self.elements:
-            return self.elements[name]
+        key = self.resolve_name(name)
+        if key in self.elements:
+            return self.elements[key]
         else:
             message = (
                 "Element %s does not exist anywhere in the accelerator lattice" % name
@@ -547,11 +856,208 @@ class MachineModel(RootModel):
         Returns an ordered list of all lattice elements (of a specific type) between
         any two points along the accelerator.
 
+        The filters are evaluated on the element attributes as of the last rebuild of
+        the lattice; apply changes to the elements through :meth:`update`.
+
         :param str end: Name of the last element. This element is used to determine the beam path.
         :param str start: Name of the first element.
         :param str | list type: Type(s) of elements to include in the list
         :returns: List of all element names between *start* and *end* (inclusive)
         """
+        path_obj = self._get_path_layout(end=end, path=path)
+        if end is None:
+            end = path_obj._get_all_element_names()[-1]
+
+        # find the start of the search area
+        if start is None:
+            start = path_obj._get_all_element_names()[0]
+
+        # return a list of elements along this beam path
+        elements = path_obj.elements_between(
+            start=start,
+            end=end,
+            element_type=element_type,
+            element_class=element_class,
+            element_model=element_model,
+        )
+        return elements
+
+    def elements_between_many(self, queries: List[dict]) -> List[List[str]]:
+        """
+        Answer many :meth:`elements_between` queries at once.
+
+        Each beam path is resolved once per distinct (*end*, *path*), and each distinct
+        set of filters is evaluated once per beam path; every query then only
+        slices the shared result between its *start* and *end*.
+
+        :param list queries: dicts of keyword arguments for :meth:`elements_between`
+            (*end*, *start*, *element_type*, *element_model*, *element_class* and *path*)
+        :returns: List of the results of each query, in the same order as *queries*
+        """
+        layouts = {}
+        matches = {}
+        results = []
+        for query in queries:
+            unexpected = set(query) - set(_QUERY_KEYWORDS)
+            if unexpected:
+                raise TypeError(
+                    "elements_between() got unexpected keyword argument(s) %s"
+                    % ", ".join(sorted(unexpected))
+                )
+            end, start = query.get("end"), query.get("start")
+            layout_key = (end, query.get("path"))
+            if layout_key not in layouts:
+                layouts[layout_key] = self._get_path_layout(end=end, path=query.get("path"))
+            path_obj = layouts[layout_key]
+            element_names = path_obj._get_all_element_names()
+            first = 0 if start is None else path_obj._lookup_index(start)
+            last = (
+                len(element_names) if end is None else path_obj._lookup_index(end) + 1
+            )
+
+            filters = tuple(
+                _filter_key(query.get(k))
+                for k in ("element_type", "element_model", "element_class")
+            )
+            if all(f is None for f in filters):
+                results.append(element_names[first:last])
+                continue
+            match_key = (id(path_obj), filters)
+            if match_key not in matches:
+                matches[match_key] = path_obj._filtered_positions(
+                    *[None if f is None else list(f) for f in filters]
+                )
+            positions = matches[match_key]
+            lower, upper = np.searchsorted(positions, [first, last])
+            results.append(path_obj.table.names(positions[lower:upper]))
+        return results
+
+    def element_at(self, s: float, path: str = None) -> Union[str, None]:
+        """
+        Return the element at a longitudinal position along a beam path
+
+        :param float s: Longitudinal position
+        :param str path: Name of the beam path; the default path is used if None
+        :returns: Name of the element whose extent contains *s*, or None if *s* lies in a drift
+        """
+        return self._get_path_layout(path=path).element_at(s)
+
+    def elements_overlapping(self, s0: float, s1: float, path: str = None) -> List[str]:
+        """
+        Returns an ordered list of the elements overlapping a longitudinal region of a beam path
+
+        :param float s0: Start of the longitudinal region
+        :param float s1: End of the longitudinal region
+        :param str path: Name of the beam path; the default path is used if None
+        :returns: List of element names
+        """
+        return self._get_path_layout(path=path).elements_overlapping(s0, s1)
+
+    def nearest_elements(self, xyz: Union[list, np.ndarray], k: int = 1) -> List[str]:
+        """
+        Return the elements nearest to a point in space, across all beam paths
+
+        :param list xyz: Global (x, y, z) position
+        :param int k: Number of elements to return
+        :returns: List of up to *k* element names, ordered by the distance of their middle from *xyz*
+        """
+        names, tree = self._cached("spatial_index", self._build_spatial_index)
+        if tree is None or k < 1:
+            return []
+        _, found = tree.query(np.asarray(xyz, dtype=float), k=min(k, len(names)))
+        return [names[i] for i in np.atleast_1d(found)]
+
+    def _build_spatial_index(self) -> tuple:
+        """KD-tree over the middle of every element in all of the lattices"""
+        names = []
+        middles = []
+        seen = set()
+        for lattice in self.lattices.values():
+            table = lattice.table
+            valid = ~np.isnan(table["middle"][:, 0])
+            for name, middle in zip(table["name"][valid], table["middle"][valid]):
+                if name not in seen:
+                    seen.add(name)
+                    names.append(name)
+                    middles.append(middle)
+        if len(names) == 0:
+            return names, None
+        # scipy.spatial is slow to import, so only load it when the index is built
+        from scipy.spatial import cKDTree
+
+        return names, cKDTree(np.array(middles))
+
+    def paths_containing(self, element: str) -> List[str]:
+        """
+        Return the beam paths that an element lies on
+
+        :param str element: Name or alias of the element
+        :returns: List of the names of the beam paths, in the order of :attr:`lattices`
+        """
+        key = self.resolve_name(element)
+        name = dict.get(self.elements, key).name if key in self.elements else element
+        paths, membership, _ = self._cached("path_membership", self._build_path_membership)
+        bits = membership.get(name, 0)
+        return [path for i, path in enumerate(paths) if bits >> i & 1]
+
+    def elements_in_paths(
+        self,
+        element_type: Union[str, list, None] = None,
+        element_model: Union[str, list, None] = None,
+        element_class: Union[str, list, None] = None,
+    ) -> List[str]:
+        """
+        Returns a list of the elements (of a specified type) on any beam path
+
+        Equivalent to the union of :meth:`elements_between` over every beam path, but each
+        section shared between beam paths is only evaluated once.
+
+        :param str | list element_type: Type(s) of elements to include in the list
+        :param str | list element_model: Model(s) of elements to include in the list
+        :param str | list element_class: Class(es) of elements to include in the list
+        :returns: List of element names, in the order they are first found along the beam paths
+        """
+        _, _, table = self._cached("path_membership", self._build_path_membership)
+        positions = table.filter(element_type, element_model, element_class)
+        return table.names(slice(None) if positions is None else positions)
+
+    def _build_path_membership(self) -> tuple:
+        """
+        Record which beam paths each element lies on
+
+        :returns: (list of path names, dict of element name -> bitset of path indices,
+            LatticeTable of the elements on any path, built once per distinct section)
+        """
+        paths = list(self.lattices.keys())
+        membership = {}
+        for i, lattice in enumerate(self.lattices.values()):
+            bit = 1 << i
+            for name in lattice._get_all_element_names():
+                membership[name] = membership.get(name, 0) | bit
+        seen_sections = set()
+        seen_elements = set()
+        elements = []
+        for lattice in self.lattices.values():
+            for section in lattice.sections.values():
+                if id(section) in seen_sections:
+                    continue
+                seen_sections.add(id(section))
+                for elem in section._get_all_elements():
+                    if elem.name in membership and elem.name not in seen_elements:
+                        seen_elements.add(elem.name)
+                        elements.append(elem)
+        # only the coded columns are queried, so the geometry is not computed
+        table = LatticeTable(elements, geometry=np.full((len(elements), 3, 3), np.nan))
+        return paths, membership, table
+
+    def _get_path_layout(self, end: str = None, path: str = None) -> MachineLayout:
+        """
+        Return the beam path searched by a query ending at a given element
+
+        :param str end: Name of the last element. This element is used to determine the beam path.
+        :param str path: Name of the beam path; the default path is used if None
+        :returns: MachineLayout for the beam path
+        """
         # determine the beam path
         if path is None:
             if hasattr(self, "_default_path") and self._default_path in self.lattices:
@@ -565,27 +1071,26 @@ class MachineModel(RootModel):
             raise Exception('"path" = %s is not defined' % path)
 
         if end is None:
-            path_obj = self.lattices[path]
-            end = path_obj.elements[-1]
-        else:
-            end_obj = self.get_element(end)
-            beam_path = (
-                end_obj.machine_area
-                if (end_obj.machine_area in self.lattices)
-                else path
-            )
-            path_obj = self.lattices[beam_path]
+            return self.lattices[path]
+        end_obj = self.get_element(end)
+        beam_path = (
+            end_obj.machine_area if (end_obj.machine_area in self.lattices) else path
+        )
+        return self.lattices[beam_path]
 
-        # find the start of the search area
-        if start is None:
-            start = path_obj.elements[0]
+    def _get_path_range(
+        self, end: str = None, start: str = None, path: str = None
+    ) -> tuple:
+        """
+        Resolve a query to a beam path and the range of row positions between two elements
 
-        # return a list of elements along this beam path
-        elements = path_obj.elements_between(
-            start=start,
-            end=end,
-            element_type=element_type,
-            element_class=element_class,
-            element_model=element_model,
+        :returns: (MachineLayout, first, last) with *last* exclusive
+        """
+        path_obj = self._get_path_layout(end=end, path=path)
+        first = 0 if start is None else path_obj._lookup_index(start)
+        last = (
+            len(path_obj._get_all_element_names())
+            if end is None
+            else path_obj._lookup_index(end) + 1
         )
-        return elements
+        return path_obj, first, last
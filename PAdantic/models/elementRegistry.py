@@ -0,0 +1,139 @@
+from functools import lru_cache
+from typing import Annotated, Any, Dict, List, Tuple, Type, Union
+from pydantic import Discriminator, Tag, TypeAdapter, ValidationError
+
+from . import element
+from .element import _baseElement
+
+# exceptions raised when validating an element; validators may raise TypeError, which
+# pydantic does not wrap in a ValidationError
+VALIDATION_EXCEPTIONS = (ValidationError, TypeError, ValueError)
+
+# element model classes, keyed by the hardware_type of the element documents
+ELEMENT_CLASSES: Dict[str, Type[_baseElement]] = {
+    name: value
+    for name, value in vars(element).items()
+    if not name.startswith("_") and isinstance(value, type) and issubclass(value, _baseElement)
+}
+
+
+def register_element(cls: Type[_baseElement], hardware_type: Union[str, None] = None) -> Type[_baseElement]:
+    """
+    Add an element class to the registry
+
+    Can be used as a class decorator.
+
+    :param cls: Element model class
+    :param str hardware_type: Key of the class; defaults to the class name
+    :returns: *cls*
+    """
+    ELEMENT_CLASSES[hardware_type or cls.__name__] = cls
+    element_list_adapter.cache_clear()
+    element_dict_adapter.cache_clear()
+    return cls
+
+
+def element_class(hardware_type: str) -> Union[Type[_baseElement], None]:
+    """Return the element class for a hardware_type, or None if it is not registered"""
+    return ELEMENT_CLASSES.get(hardware_type)
+
+
+def _hardware_type(value: Any) -> Union[str, None]:
+    if isinstance(value, dict):
+        return value.get("hardware_type")
+    if isinstance(value, _baseElement):
+        return type(value).__name__
+    return None
+
+
+def _element_union() -> Any:
+    """Union of the registered classes, discriminated by hardware_type"""
+    union = Union[tuple(Annotated[cls, Tag(name)] for name, cls in ELEMENT_CLASSES.items())]
+    return Annotated[union, Discriminator(_hardware_type)]
+
+
+@lru_cache(maxsize=None)
+def element_list_adapter() -> TypeAdapter:
+    """
+    Return a TypeAdapter validating a list of element dictionaries
+
+    The elements are a union of the registered classes, discriminated by hardware_type,
+    so that each dictionary is validated against its own class only and the whole list
+    is validated in a single call into pydantic-core.
+    """
+    return TypeAdapter(List[_element_union()])
+
+
+@lru_cache(maxsize=None)
+def element_dict_adapter() -> TypeAdapter:
+    """
+    Return a TypeAdapter for a dict of element name -> element
+
+    Like :func:`element_list_adapter`, but for the combined files; it also serializes
+    elements of any registered class, e.g. with dump_json.
+    """
+    return TypeAdapter(Dict[str, _element_union()])
+
+
+def validate_elements(
+    elements: List[dict],
+) -> Tuple[List[Union[_baseElement, None]], Dict[int, str]]:
+    """
+    Validate many element dictionaries at once
+
+    The result is the same as calling the class of each element on its dictionary.
+    If any element is invalid, the others are validated again in a second call. If a
+    validator raises an exception that pydantic does not report per element (e.g. a
+    TypeError), every element is validated on its own instead.
+
+    :param list elements: Element dictionaries, with a hardware_type naming a registered class
+    :returns: List of element models, with None for the elements that failed validation,
+        and a dict of position -> error message for those elements
+    """
+    adapter = element_list_adapter()
+    try:
+        return adapter.validate_python(elements), {}
+    except ValidationError as e:
+        failures = _validation_failures(e, elements)
+    except VALIDATION_EXCEPTIONS:
+        return _validate_each(adapter, elements)
+    valid = [i for i in range(len(elements)) if i not in failures]
+    models = [None] * len(elements)
+    try:
+        validated = adapter.validate_python([elements[i] for i in valid])
+    except VALIDATION_EXCEPTIONS:
+        return _validate_each(adapter, elements)
+    for i, model in zip(valid, validated):
+        models[i] = model
+    return models, failures
+
+
+def _validation_failures(error: ValidationError, elements: List[dict]) -> Dict[int, str]:
+    """Return the error message of each element that failed a list validation"""
+    failures = {}
+    for e in error.errors(include_url=False):
+        index = e["loc"][0]
+        location = ".".join(str(loc) for loc in e["loc"][2:])
+        if e["type"] in ("union_tag_invalid", "union_tag_not_found"):
+            message = "unknown hardware_type %s" % _hardware_type(elements[index])
+        elif location:
+            message = "%s: %s" % (location, e["msg"])
+        else:
+            message = e["msg"]
+        failures[index] = failures[index] + "; " + message if index in failures else message
+    return failures
+
+
+def _validate_each(
+    adapter: TypeAdapter, elements: List[dict]
+) -> Tuple[List[Union[_baseElement, None]], Dict[int, str]]:
+    """Validate the elements one at a time, so that an exception only fails its own element"""
+    models, failures = [None] * len(elements), {}
+    for i, elem in enumerate(elements):
+        try:
+            models[i] = adapter.validate_python([elem])[0]
+        except ValidationError as e:
+            failures[i] = _validation_failures(e, [elem])[0]
+        except VALIDATION_EXCEPTIONS as e:
+            failures[i] = str(e)
+    return models, failures
@@ -0,0 +1,293 @@
+import numpy as np
+from typing import List, Union
+
+CODED_COLUMNS = ("hardware_class", "hardware_type", "hardware_model", "machine_area")
+
+LATTICE_TABLE_DTYPE = np.dtype(
+    [
+        ("index", np.int64),
+        ("name", object),
+        ("hardware_class", np.int32),
+        ("hardware_type", np.int32),
+        ("hardware_model", np.int32),
+        ("machine_area", np.int32),
+        ("length", np.float64),
+        ("start", np.float64, (3,)),
+        ("middle", np.float64, (3,)),
+        ("end", np.float64, (3,)),
+        ("subelement", np.bool_),
+    ]
+)
+
+
+def element_geometry(elements: list) -> np.ndarray:
+    """
+    Compute the start, middle and end positions of a list of elements
+
+    Equivalent to :attr:`PhysicalElement.start`, :attr:`PhysicalElement.middle` and
+    :attr:`PhysicalElement.end` for every element, evaluated as array operations.
+
+    :param list elements: Elements with a `physical` attribute
+    :returns: Array of shape (len(elements), 3, 3) holding start, middle and end; rows
+        for elements without physical information are NaN
+    """
+    geometry = np.full((len(elements), 3, 3), np.nan)
+    length = np.zeros(len(elements))
+    theta = np.zeros(len(elements))
+    for i, elem in enumerate(elements):
+        physical = getattr(elem, "physical", None)
+        if physical is None:
+            continue
+        if hasattr(physical, "angle"):
+            geometry[i] = [
+                physical.start.array,
+                physical.middle.array,
+                physical.end.array,
+            ]
+            continue
+        middle = physical.middle
+        geometry[i, 1] = [middle.x, middle.y, middle.z]
+        length[i] = physical.length
+        theta[i] = physical.rotation.theta + physical.global_rotation.theta
+    straight = ~np.isnan(geometry[:, 1, 0]) & np.isnan(geometry[:, 0, 0])
+    # vec . R for vec = [0, 0, l] and R the rotation matrix about y
+    direction = np.column_stack(
+        [-1 * np.sin(theta), np.zeros(len(theta)), np.cos(theta)]
+    )
+    half = (1.0 * length / 2.0)[:, np.newaxis]
+    geometry[straight, 0] = geometry[straight, 1] - (half * direction)[straight]
+    geometry[straight, 2] = (
+        geometry[straight, 0] + (length[:, np.newaxis] * direction)[straight]
+    )
+    return geometry
+
+
+class LatticeTable:
+    """
+    Columnar view of the elements along a beam path.
+
+    String columns (class, type, model and machine area) are stored as integer
+    codes into :attr:`categories`, which hold the lower-cased values, so that
+    filters can be evaluated as vectorized boolean masks. Each coded column also
+    has an inverted index (code -> sorted row positions), so that filtered range
+    queries are dictionary lookups plus a binary search on the row range.
+
+    The columns are copied from the elements when the table is built, so the table
+    does not follow changes made to the elements in place; such changes must be
+    applied through :meth:`MachineModel.update`, which rebuilds the affected tables.
+    """
+
+    def __init__(self, elements: list, geometry: Union[np.ndarray, None] = None):
+        self.categories = {column: [] for column in CODED_COLUMNS}
+        self._codes = {column: {} for column in CODED_COLUMNS}
+        self.array = np.zeros(len(elements), dtype=LATTICE_TABLE_DTYPE)
+        self.array["index"] = np.arange(len(elements))
+        self.array["name"] = [elem.name for elem in elements]
+        for column in CODED_COLUMNS:
+            self.array[column] = [
+                self._encode(column, getattr(elem, column, None)) for elem in elements
+            ]
+        self.array["subelement"] = [elem.is_subelement() for elem in elements]
+        self.array["length"] = [
+            elem.physical.length if getattr(elem, "physical", None) is not None else 0.0
+            for elem in elements
+        ]
+        if geometry is None:
+            geometry = element_geometry(elements)
+        self.array["start"] = geometry[:, 0]
+        self.array["middle"] = geometry[:, 1]
+        self.array["end"] = geometry[:, 2]
+        self._index = {column: self._build_index(column) for column in CODED_COLUMNS}
+        self._s_intervals = None
+        self._s_sorted = True
+
+    def _build_index(self, column: str) -> dict:
+        """Map each code of a coded column to the sorted positions of the rows holding it"""
+        codes = self.array[column]
+        order = np.argsort(codes, kind="stable")
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        return {
+            int(codes[group[0]]): group
+            for group in np.split(order, boundaries)
+            if len(group) > 0 and codes[group[0]] >= 0
+        }
+
+    def _encode(self, column: str, value: Union[str, None]) -> int:
+        if not isinstance(value, str):
+            return -1
+        value = value.lower()
+        codes = self._codes[column]
+        if value not in codes:
+            codes[value] = len(self.categories[column])
+            self.categories[column].append(value)
+        return codes[value]
+
+    def codes(self, column: str, values: Union[str, List[str]]) -> np.ndarray:
+        """
+        Return the integer codes of the (case-insensitive) values in a coded column
+
+        :param str column: Name of the coded column
+        :param str | list values: Value(s) to look up
+        :returns: Array of codes; values not present in the table are skipped
+        """
+        if isinstance(values, str):
+            values = [values]
+        codes = self._codes[column]
+        return np.array(
+            [codes[v.lower()] for v in values if v.lower() in codes], dtype=np.int32
+        )
+
+    def mask(
+        self,
+        column: str,
+        values: Union[str, List[str]],
+        positions: Union[np.ndarray, slice] = slice(None),
+    ) -> np.ndarray:
+        """
+        Boolean mask of the rows (restricted to `positions`) whose `column` matches `values`
+        """
+        return np.isin(self.array[column][positions], self.codes(column, values))
+
+    def positions(
+        self,
+        column: str,
+        values: Union[str, List[str]],
+        first: int = 0,
+        last: Union[int, None] = None,
+    ) -> np.ndarray:
+        """
+        Look up the rows whose `column` matches `values` in the inverted index
+
+        :param str column: Name of the coded column
+        :param str | list values: Value(s) to match (case-insensitive)
+        :param int first: First row of the range to search
+        :param int last: Row after the end of the range to search; the end of the table if None
+        :returns: Sorted array of matching row positions within [first, last)
+        """
+        groups = [self._index[column][c] for c in np.unique(self.codes(column, values))]
+        if len(groups) == 0:
+            return np.array([], dtype=np.int64)
+        positions = groups[0] if len(groups) == 1 else np.sort(np.concatenate(groups))
+        lower = np.searchsorted(positions, first)
+        upper = len(positions) if last is None else np.searchsorted(positions, last)
+        return positions[lower:upper]
+
+    def filter(
+        self,
+        element_type: Union[str, List[str], None] = None,
+        element_model: Union[str, List[str], None] = None,
+        element_class: Union[str, List[str], None] = None,
+        first: int = 0,
+        last: Union[int, None] = None,
+    ) -> Union[np.ndarray, None]:
+        """
+        Positions of the rows in *first* to *last* (exclusive) matching the element filters
+
+        :returns: Sorted array of positions, or None if no filter is given
+        """
+        filters = [
+            (values, column)
+            for values, column in (
+                (element_type, "hardware_type"),
+                (element_model, "hardware_model"),
+                (element_class, "hardware_class"),
+            )
+            if isinstance(values, (str, list))
+        ]
+        if len(filters) == 0:
+            return None
+
+        # look up the first filter in the inverted index, and mask the others
+        result = self.positions(filters[0][1], filters[0][0], first, last)
+        for values, column in filters[1:]:
+            result = result[self.mask(column, values, result)]
+        return result
+
+    def inverted_index(self, column: str) -> dict:
+        """Return the inverted index of a coded column: lower-cased value -> sorted row positions"""
+        return {self.categories[column][c]: p for c, p in self._index[column].items()}
+
+    def decode(self, column: str, positions: Union[np.ndarray, slice] = slice(None)) -> list:
+        """Return the lower-cased string values of a coded column"""
+        categories = self.categories[column]
+        return [
+            categories[c] if c >= 0 else None for c in self.array[column][positions]
+        ]
+
+    def names(self, positions: Union[np.ndarray, slice] = slice(None)) -> list:
+        return self.array["name"][positions].tolist()
+
+    def drifts(self, first: int = 0, last: Union[int, None] = None) -> dict:
+        """
+        Compute the drifts between consecutive elements in rows *first* to *last* (exclusive)
+
+        The gap after each element runs from its end to the start of the next element;
+        the drift length is signed by the direction of the gap along z and rounded to
+        1 micron, and gaps shorter than that are not drifts. The longitudinal position
+        *s* of each element is the cumulative length of elements and drifts up to and
+        including that element.
+
+        :returns: dict of arrays: *name*, *length*, *s*, *has_drift*, *drift_length* and *drift_middle*
+        """
+        rows = self.array[first:last]
+        gap_start = rows["end"]
+        gap_end = np.concatenate([rows["start"][1:], rows["end"][-1:]])
+        gap = gap_end - gap_start
+        length = np.sqrt(np.sum(gap**2, axis=1))
+        has_drift = np.round(length, 6) > 0
+        drift_length = np.where(
+            has_drift, np.round(np.copysign(length, gap[:, 2]), 6), 0.0
+        )
+        # interleave element and drift lengths so the running sum matches a walk along the path
+        steps = np.column_stack([rows["length"], drift_length]).ravel()
+        s = np.cumsum(steps)[::2]
+        return {
+            "name": rows["name"].tolist(),
+            "length": rows["length"],
+            "s": s,
+            "has_drift": has_drift,
+            "drift_length": drift_length,
+            "drift_middle": (gap_start + gap_end) / 2.0,
+        }
+
+    @property
+    def s_intervals(self) -> np.ndarray:
+        """
+        Longitudinal extent of each element along the path
+
+        :returns: Array of shape (len(table), 2) holding the *s* of the start and end of each element
+        """
+        if self._s_intervals is None:
+            s_end = self.drifts()["s"] if len(self) > 0 else np.zeros(0)
+            self._s_intervals = np.column_stack([s_end - self.array["length"], s_end])
+            # the intervals are sorted unless the path doubles back on itself
+            self._s_sorted = bool(
+                np.all(np.diff(self._s_intervals[:, 0]) >= 0)
+                and np.all(np.diff(self._s_intervals[:, 1]) >= 0)
+            )
+        return self._s_intervals
+
+    def overlapping(self, s0: float, s1: float) -> np.ndarray:
+        """
+        Positions of the rows whose *s* interval overlaps [*s0*, *s1*]
+
+        :param float s0: Start of the search interval
+        :param float s1: End of the search interval
+        :returns: Sorted array of row positions
+        """
+        intervals = self.s_intervals
+        if self._s_sorted:
+            # only rows ending after s0 and starting before s1 can overlap
+            lower = np.searchsorted(intervals[:, 1], s0, side="left")
+            upper = np.searchsorted(intervals[:, 0], s1, side="right")
+            candidates = np.arange(lower, max(lower, upper))
+        else:
+            candidates = np.arange(len(self))
+        rows = intervals[candidates]
+        return candidates[(rows[:, 0] <= s1) & (rows[:, 1] >= s0)]
+
+    def __getitem__(self, item):
+        return self.array[item]
+
+    def __len__(self) -> int:
+        return len(self.array)
@@ -0,0 +1,138 @@
+from typing import Any, Callable, Dict, Union
+from .element import PhysicalBaseElement, _baseElement
+
+# fields needed to build sections, lattices and their geometry
+STUB_FIELDS = (
+    "name",
+    "hardware_class",
+    "hardware_type",
+    "hardware_model",
+    "machine_area",
+    "virtual_name",
+    "alias",
+    "name_alias",
+    "subelement",
+    "physical",
+)
+
+
+class LazyElement(PhysicalBaseElement):
+    """
+    Lightweight stand-in for an element that has not been validated yet.
+
+    Only the fields in :data:`STUB_FIELDS` are validated; the full element model is
+    validated from the raw document the first time it is needed, either through
+    :class:`LazyElementDict` or by reading an attribute the stub does not have.
+    The stub then becomes the full model in place, so the machine, its sections and
+    its lattices keep sharing one object per element.
+    """
+
+    _document: Union[dict, None] = None
+    _factory: Union[Callable[[dict], _baseElement], None] = None
+    _statistics: Union[Dict[str, int], None] = None
+
+    @classmethod
+    def from_document(
+        cls,
+        document: dict,
+        factory: Callable[[dict], _baseElement],
+        statistics: Union[Dict[str, int], None] = None,
+    ) -> "LazyElement":
+        """
+        Build a stub from a raw element document
+
+        :param dict document: Element definition, as read from YAML
+        :param Callable factory: Function validating the full element model from *document*
+        :param dict statistics: Counters shared by the stubs of a machine
+        :returns: LazyElement for the document
+        """
+        stub = cls(**{k: document[k] for k in STUB_FIELDS if k in document})
+        stub._document = document
+        stub._factory = factory
+        stub._statistics = statistics
+        if statistics is not None:
+            statistics["elements"] = statistics.get("elements", 0) + 1
+        return stub
+
+    def materialize(self) -> _baseElement:
+        """
+        Validate the full element model and turn the stub into it
+
+        The class and state of the stub are replaced by those of the model, so every
+        reference to the stub now refers to the full element.
+
+        :returns: The stub, now an instance of its element class
+        """
+        model = self._factory(self._document)
+        statistics = self._statistics
+        for name in ("__dict__", "__pydantic_fields_set__", "__pydantic_extra__", "__pydantic_private__"):
+            object.__setattr__(self, name, getattr(model, name))
+        object.__setattr__(self, "__class__", type(model))
+        if statistics is not None:
+            statistics["materialized"] = statistics.get("materialized", 0) + 1
+        return self
+
+    def __getattr__(self, item: str) -> Any:
+        try:
+            return super().__getattr__(item)
+        except AttributeError:
+            if item.startswith("_"):
+                raise
+            return getattr(self.materialize(), item)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith("_"):
+            super().__setattr__(name, value)
+        else:
+            # materialize first, or the change would be lost when the stub is replaced
+            setattr(self.materialize(), name, value)
+
+
+class LazyElementDict(dict):
+    """
+    Dictionary of elements that materializes :class:`LazyElement` stubs when they are
+    looked up.
+
+    Iteration yields the keys without validating anything; :meth:`values`, :meth:`items`
+    and :meth:`get` return full models. Use ``dict.values(d)`` to read the stored stubs.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statistics = {"elements": 0, "materialized": 0}
+
+    def __getitem__(self, key: str) -> _baseElement:
+        value = super().__getitem__(key)
+        if isinstance(value, LazyElement):
+            value.materialize()
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def values(self):
+        self.materialize_all()
+        return super().values()
+
+    def items(self):
+        self.materialize_all()
+        return super().items()
+
+    def materialize_all(self) -> None:
+        """Validate every element that has not been validated yet"""
+        for value in super().values():
+            if isinstance(value, LazyElement):
+                value.materialize()
+
+    def __reduce__(self):
+        # keep the stubs unvalidated when pickling
+        return (
+            LazyElementDict,
+            (list(super().items()),),
+            {"statistics": self.statistics},
+        )
+
+    def copy(self) -> "LazyElementDict":
+        copy = LazyElementDict(super().items())
+        copy.statistics = self.statistics
+        return copy
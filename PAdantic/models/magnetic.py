@@ -1,5 +1,5 @@
 import numpy as np
-from scipy.constants import speed_of_light, pi
+from math import pi
 from pydantic import (
     BaseModel,
     model_serializer,
@@ -21,6 +21,8 @@ def Sqrt(a):
     return Power(a, 0.5)
 
 
+# exact (SI) value, as scipy.constants.speed_of_light, without importing scipy
+speed_of_light = 299792458.0
 Pi = pi
 Degree = pi / 180.0
 
@@ -79,7 +81,7 @@ class Multipoles(MultipolesData):
     def ser_model(self) -> Dict[str, Any]:
         return {
             k: getattr(self, k)
-            for k in self.model_fields.keys()
+            for k in type(self).model_fields.keys()
             if abs(getattr(self, k).normal) > 0 or abs(getattr(self, k).skew) > 0
         }
 
@@ -374,7 +376,7 @@ class SolenoidFields(solenoidFieldsData):
     def ser_model(self) -> Dict[str, Any]:
         return {
             k: getattr(self, k)
-            for k in self.model_fields.keys()
+            for k in type(self).model_fields.keys()
             if abs(getattr(self, k)) > 0
         }
 
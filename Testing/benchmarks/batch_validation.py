@@ -0,0 +1,29 @@
+"""Benchmark validating element dictionaries one at a time against a single batch call."""
+import time
+
+from synthetic import synthetic_element_dicts
+
+from PAdantic.Importers.YAML_Loader import interpret_YAML_Element
+from PAdantic.models.elementRegistry import element_list_adapter, validate_elements
+
+N_ELEMENTS = 3000
+REPEATS = 3
+
+if __name__ == "__main__":
+    dicts = synthetic_element_dicts(N_ELEMENTS, n_sections=20)
+    element_list_adapter()  # build the schema outside the timings
+    timings = {}
+    for label, function in [
+        ("per element", lambda: [interpret_YAML_Element(d) for d in dicts]),
+        ("batch", lambda: validate_elements(dicts)[0]),
+    ]:
+        best = None
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            models = function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[label] = (best, [m.base_model_dump() for m in models])
+    assert timings["per element"][1] == timings["batch"][1]
+    for label, (elapsed, _) in timings.items():
+        print("%-12s %.3f s (%d elements)" % (label + ":", elapsed, N_ELEMENTS))
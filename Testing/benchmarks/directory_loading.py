@@ -0,0 +1,40 @@
+"""Benchmark loading an element directory serially and with a process pool."""
+import os
+import tempfile
+import time
+
+import yaml
+from synthetic import synthetic_definitions, synthetic_element_dicts
+
+from PAdantic.PAdantic import PAdantic
+
+N_ELEMENTS = 3000
+WORKERS = [1, 2, 4, 8]
+
+
+def write_element_files(directory: str, elements: list) -> None:
+    """Write one YAML file per element, grouped in a directory per machine area."""
+    for elem in elements:
+        area = os.path.join(directory, elem["machine_area"])
+        os.makedirs(area, exist_ok=True)
+        with open(os.path.join(area, elem["name"] + ".yaml"), "w") as stream:
+            yaml.dump(elem, stream)
+
+
+if __name__ == "__main__":
+    dicts = synthetic_element_dicts(N_ELEMENTS, n_sections=20)
+    layout, section = synthetic_definitions(dicts)
+    print("%d elements, %d CPUs" % (N_ELEMENTS, os.cpu_count()))
+    with tempfile.TemporaryDirectory() as directory:
+        write_element_files(directory, dicts)
+        reference = None
+        for workers in WORKERS:
+            start = time.perf_counter()
+            machine = PAdantic(
+                layout=layout, section=section, element_list=directory, workers=workers
+            )
+            elapsed = time.perf_counter() - start
+            names = list(machine.elements.keys())
+            reference = reference or names
+            assert names == reference
+            print("workers=%d: %.2f s" % (workers, elapsed))
@@ -0,0 +1,50 @@
+"""Benchmark MachineModel.elements_between_many against a loop of elements_between calls."""
+import random
+import time
+
+from synthetic import synthetic_machine
+
+N_ELEMENTS = 10000
+N_PANELS = 50
+N_REFRESHES = 20
+
+FILTERS = [
+    {},
+    {"element_type": "bpm"},
+    {"element_type": ["horizontal_corrector", "vertical_corrector"]},
+    {"element_class": "magnet"},
+    {"element_type": "quadrupole", "element_class": "magnet"},
+]
+
+
+def dashboard_queries(names: list) -> list:
+    """One query per dashboard panel: a random range of the path with one of a few filters."""
+    random.seed(0)
+    queries = []
+    for _ in range(N_PANELS):
+        first, last = sorted(random.sample(range(len(names)), 2))
+        queries.append(
+            dict(start=names[first], end=names[last], **random.choice(FILTERS))
+        )
+    return queries
+
+
+if __name__ == "__main__":
+    machine = synthetic_machine(N_ELEMENTS, n_sections=20)
+    queries = dashboard_queries(machine.lattices["line0"]._get_all_element_names())
+
+    start = time.perf_counter()
+    for _ in range(N_REFRESHES):
+        looped = [machine.elements_between(**query) for query in queries]
+    loop = (time.perf_counter() - start) / N_REFRESHES
+
+    start = time.perf_counter()
+    for _ in range(N_REFRESHES):
+        batched = machine.elements_between_many(queries)
+    batch = (time.perf_counter() - start) / N_REFRESHES
+
+    assert looped == batched
+    print(
+        "%d queries: loop %.2f ms/refresh, batch %.2f ms/refresh (%.1fx)"
+        % (N_PANELS, 1e3 * loop, 1e3 * batch, loop / batch)
+    )
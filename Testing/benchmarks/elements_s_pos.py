@@ -0,0 +1,34 @@
+"""Benchmark drift generation and s-positions along a synthetic path."""
+import time
+
+from synthetic import synthetic_machine
+from PAdantic.PAdantic import PAdantic
+
+N_ELEMENTS = 5000
+N_QUERIES = 50
+
+if __name__ == "__main__":
+    machine = synthetic_machine(N_ELEMENTS, n_sections=10, cls=PAdantic)
+
+    start = time.perf_counter()
+    for _ in range(N_QUERIES):
+        machine.get_elements_s_pos()
+    print(
+        "get_elements_s_pos: %8.3f ms/call"
+        % (1e3 * (time.perf_counter() - start) / N_QUERIES)
+    )
+
+    start = time.perf_counter()
+    for _ in range(N_QUERIES):
+        machine.get_drifts()
+    print("get_drifts:         %8.3f ms/call" % (1e3 * (time.perf_counter() - start) / N_QUERIES))
+
+    start = time.perf_counter()
+    drifts = machine.createDrifts()
+    print(
+        "createDrifts:       %8.3f ms/call (%d Drift models)"
+        % (
+            1e3 * (time.perf_counter() - start),
+            len(drifts) - N_ELEMENTS,
+        )
+    )
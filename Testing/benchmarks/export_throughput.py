@@ -0,0 +1,40 @@
+"""Benchmark exporting a full machine with the serial and the parallel, change-aware exporters."""
+import contextlib
+import io
+import tempfile
+import time
+
+from synthetic import synthetic_machine
+
+from PAdantic.Exporters.YAML import export_machine, export_machine_parallel
+
+N_ELEMENTS = 3000
+N_CHANGED = 30
+
+if __name__ == "__main__":
+    machine = synthetic_machine(N_ELEMENTS, n_sections=20)
+    with tempfile.TemporaryDirectory() as serial, tempfile.TemporaryDirectory() as parallel:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            export_machine(serial, machine, overwrite=True)
+        timings = [("export_machine", time.perf_counter() - start, N_ELEMENTS)]
+        for changed, label in [
+            (0, "parallel, empty directory"),
+            (0, "parallel, unchanged"),
+            (N_CHANGED, "parallel, %d changed" % N_CHANGED),
+        ]:
+            if changed:
+                for elem in list(machine.elements.values())[:: N_ELEMENTS // changed]:
+                    elem.physical.length += 0.01
+            start = time.perf_counter()
+            written = export_machine_parallel(parallel, machine)
+            timings.append((label, time.perf_counter() - start, len(written)))
+            if label.endswith("empty directory"):
+                for filename in written:
+                    with open(filename) as a, open(filename.replace(parallel, serial)) as b:
+                        assert a.read() == b.read()
+        for label, elapsed, written in timings:
+            print(
+                "%-26s %.2f s, %6.0f elements/s, %d files written"
+                % (label + ":", elapsed, N_ELEMENTS / elapsed, written)
+            )
@@ -0,0 +1,49 @@
+"""Time importing PAdantic in a fresh interpreter and check it stays within a budget.
+
+Usage: python import_time.py [budget in seconds]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+N_RUNS = 5
+BUDGET = 0.5
+# loaded on first use, so importing PAdantic must not pull them in
+DEFERRED_MODULES = ["pandas", "scipy.spatial", "scipy.constants"]
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import PAdantic.PAdantic
+import PAdantic.models.PV as PV
+elapsed = time.perf_counter() - start
+loaded = [m for m in %r if m in sys.modules]
+print(elapsed, PV.pv_values.cache_info().currsize, ",".join(loaded))
+""" % (DEFERRED_MODULES,)
+
+
+def time_import() -> tuple:
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT], cwd=root, capture_output=True, text=True, check=True
+    ).stdout.split(" ")
+    loaded = output[2].strip()
+    return float(output[0]), int(output[1]), loaded.split(",") if loaded else []
+
+
+if __name__ == "__main__":
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET
+    runs = [time_import() for _ in range(N_RUNS)]
+    elapsed = statistics.median(run[0] for run in runs)
+    print("import PAdantic.PAdantic: %.3f s (median of %d, budget %.3f s)" % (elapsed, N_RUNS, budget))
+    failures = []
+    if elapsed > budget:
+        failures.append("import time over budget")
+    if runs[0][1] > 0:
+        failures.append("PV_Values.yaml read at import")
+    if runs[0][2]:
+        failures.append("deferred modules imported: %s" % ", ".join(runs[0][2]))
+    for failure in failures:
+        print("FAIL:", failure)
+    sys.exit(1 if failures else 0)
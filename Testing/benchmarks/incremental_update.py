@@ -0,0 +1,41 @@
+"""Benchmark loading a machine file by file with MachineModel.update."""
+import time
+import warnings
+
+from synthetic import synthetic_elements, synthetic_definitions, synthetic_element_dicts
+from PAdantic.models.elementList import MachineModel
+
+N_ELEMENTS = 2000
+N_SECTIONS = 20
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore")
+    layout, section = synthetic_definitions(
+        synthetic_element_dicts(N_ELEMENTS, N_SECTIONS), paths=2
+    )
+    elements = synthetic_elements(N_ELEMENTS, N_SECTIONS)
+    # one "file" per section, as in Testing/save_machine.py
+    per_file = N_ELEMENTS // N_SECTIONS
+    files = [
+        {e.name: e for e in elements[i: i + per_file]}
+        for i in range(0, N_ELEMENTS, per_file)
+    ]
+
+    machine = MachineModel(layout=layout, section=section)
+    start = time.perf_counter()
+    for f in files:
+        # force the previous behaviour of rebuilding everything on every update
+        machine._needs_full_rebuild = True
+        machine.update(f)
+    print("full rebuild per update:  %8.2f s" % (time.perf_counter() - start))
+
+    machine = MachineModel(layout=layout, section=section)
+    start = time.perf_counter()
+    for f in files:
+        machine.update(f)
+    print("incremental update:       %8.2f s" % (time.perf_counter() - start))
+
+    machine = MachineModel(layout=layout, section=section)
+    start = time.perf_counter()
+    machine.update_many(files)
+    print("batched update_many:      %8.2f s" % (time.perf_counter() - start))
@@ -0,0 +1,43 @@
+"""Benchmark JSON export and import against the base_model_dump / YAML combined-file path."""
+import os
+import tempfile
+import time
+
+from synthetic import synthetic_machine
+
+from PAdantic.Exporters.JSON import export_machine_json
+from PAdantic.Exporters.YAML import export_machine_combined_file_streaming
+from PAdantic.Importers.JSON_Loader import read_JSON_File
+from PAdantic.Importers.YAML_Loader import read_YAML_Combined_File
+from PAdantic.models.elementRegistry import element_dict_adapter
+
+N_ELEMENTS = 3000
+
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print("%-36s %.2f s" % (label + ":", time.perf_counter() - start))
+    return result
+
+
+if __name__ == "__main__":
+    machine = synthetic_machine(N_ELEMENTS, n_sections=20)
+    elements = dict(machine.elements.items())
+    element_dict_adapter()  # build the schema outside the timings
+    timed("base_model_dump", lambda: [e.base_model_dump() for e in elements.values()])
+    timed("model_dump_json", lambda: [e.model_dump_json() for e in elements.values()])
+    timed("dump_json, whole machine", lambda: element_dict_adapter().dump_json(elements))
+    with tempfile.TemporaryDirectory() as directory:
+        summary = timed(
+            "summary.yaml export",
+            lambda: export_machine_combined_file_streaming(directory, machine),
+        )
+        filename = os.path.join(directory, "machine.json")
+        timed("JSON export", lambda: export_machine_json(filename, machine))
+        from_yaml = timed("summary.yaml import", lambda: read_YAML_Combined_File(summary))
+        from_json = timed("JSON import", lambda: read_JSON_File(filename))
+        # summary.yaml is sorted by name
+        assert {e.name: e.base_model_dump() for e in from_json} == {
+            e.name: e.base_model_dump() for e in from_yaml
+        }
@@ -0,0 +1,36 @@
+"""Benchmark loading an element directory eagerly and lazily, then using a few elements."""
+import random
+import tempfile
+import time
+
+from directory_loading import write_element_files
+from synthetic import synthetic_definitions, synthetic_element_dicts
+
+from PAdantic.PAdantic import PAdantic
+
+N_ELEMENTS = 3000
+N_USED = 50
+
+if __name__ == "__main__":
+    dicts = synthetic_element_dicts(N_ELEMENTS, n_sections=20)
+    layout, section = synthetic_definitions(dicts)
+    random.seed(0)
+    used = [d["name"] for d in random.sample(dicts, N_USED)]
+    reference = None
+    with tempfile.TemporaryDirectory() as directory:
+        write_element_files(directory, dicts)
+        for lazy in [False, True]:
+            start = time.perf_counter()
+            machine = PAdantic(
+                layout=layout, section=section, element_list=directory, lazy=lazy
+            )
+            loaded = time.perf_counter() - start
+            s_pos = machine.get_elements_s_pos()
+            dumps = [machine[name].base_model_dump() for name in used]
+            total = time.perf_counter() - start
+            print(
+                "lazy=%-5s load %.2f s, load + %d elements %.2f s, %s"
+                % (lazy, loaded, N_USED, total, machine.materialization_statistics)
+            )
+            reference = reference or (s_pos, dumps)
+            assert (s_pos, dumps) == reference
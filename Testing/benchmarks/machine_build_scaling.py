@@ -0,0 +1,25 @@
+"""Benchmark how building sections and layouts scales with machine size."""
+import sys
+import time
+import warnings
+
+from synthetic import synthetic_elements, synthetic_definitions, synthetic_element_dicts
+from PAdantic.models.elementList import MachineModel
+
+SIZES = [5000, 10000, 20000, 50000]
+N_SECTIONS = 200
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore")
+    sizes = [int(n) for n in sys.argv[1:]] or SIZES
+    print("%10s %10s %12s %14s" % ("elements", "sections", "build [s]", "per elem [us]"))
+    for n in sizes:
+        layout, section = synthetic_definitions(
+            synthetic_element_dicts(n, N_SECTIONS), paths=2
+        )
+        elements = {e.name: e for e in synthetic_elements(n, N_SECTIONS)}
+        machine = MachineModel(layout=layout, section=section)
+        start = time.perf_counter()
+        machine.update(elements)
+        elapsed = time.perf_counter() - start
+        print("%10d %10d %12.3f %14.2f" % (n, N_SECTIONS, elapsed, 1e6 * elapsed / n))
@@ -0,0 +1,72 @@
+"""Benchmark MachineLayout name lookups on a synthetic 10k-element path."""
+import random
+import time
+
+from synthetic import synthetic_machine
+
+N_ELEMENTS = 10000
+N_QUERIES = 500
+
+
+def naive_lookup(layout, name):
+    """The previous implementation: rebuild the name list for every lookup."""
+    return [e.name for e in layout._get_all_elements()].index(name)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    machine = synthetic_machine(N_ELEMENTS, n_sections=20)
+    print("Built %d element machine in %.2f s" % (N_ELEMENTS, time.perf_counter() - start))
+    layout = machine.lattices["line0"]
+    names = layout._get_all_element_names()
+    random.seed(0)
+    queries = [
+        sorted(random.sample(range(len(names)), 2)) for _ in range(N_QUERIES)
+    ]
+
+    start = time.perf_counter()
+    for first, _ in queries:
+        naive_lookup(layout, names[first])
+    naive = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for first, _ in queries:
+        layout._lookup_index(names[first])
+    indexed = time.perf_counter() - start
+    print(
+        "_lookup_index:    naive %8.2f us/query, indexed %8.2f us/query"
+        % (1e6 * naive / N_QUERIES, 1e6 * indexed / N_QUERIES)
+    )
+
+    start = time.perf_counter()
+    for first, _ in queries:
+        layout.get_element(names[first])
+    print("get_element:      %8.2f us/query" % (1e6 * (time.perf_counter() - start) / N_QUERIES))
+
+    short = [(names[i], names[min(i + 10, len(names) - 1)]) for i, _ in queries]
+    start = time.perf_counter()
+    for s, e in short:
+        layout.elements_between(start=s, end=e)
+    print(
+        "elements_between: %8.2f us/query (k=11)"
+        % (1e6 * (time.perf_counter() - start) / N_QUERIES)
+    )
+
+    start = time.perf_counter()
+    for _ in range(N_QUERIES):
+        layout.elements_between(element_class="magnet", element_type=["quadrupole", "horizontal_corrector"])
+    print(
+        "filtered path:    %8.2f us/query (k=%d)"
+        % (
+            1e6 * (time.perf_counter() - start) / N_QUERIES,
+            len(layout.elements_between(element_class="magnet")),
+        )
+    )
+
+    start = time.perf_counter()
+    for s, e in short:
+        layout.elements_between(start=s, end=e, element_type="bpm")
+    print(
+        "filtered range:   %8.2f us/query (k=11)"
+        % (1e6 * (time.perf_counter() - start) / N_QUERIES)
+    )
@@ -0,0 +1,36 @@
+"""Benchmark loading a machine from one Parquet file against a directory of element YAML files."""
+import os
+import tempfile
+import time
+
+from synthetic import synthetic_definitions, synthetic_element_dicts, synthetic_elements
+
+from PAdantic.Exporters.Parquet import export_machine_parquet
+from PAdantic.Exporters.YAML import export_elements
+from PAdantic.Importers.Parquet_Loader import read_Parquet_Element_Dicts
+from PAdantic.PAdantic import PAdantic
+
+N_ELEMENTS = 3000
+
+if __name__ == "__main__":
+    dicts = synthetic_element_dicts(N_ELEMENTS, n_sections=20)
+    layout, section = synthetic_definitions(dicts)
+    with tempfile.TemporaryDirectory() as directory:
+        export_elements(directory, synthetic_elements(N_ELEMENTS, n_sections=20))
+        start = time.perf_counter()
+        machine = PAdantic(layout=layout, section=section, element_list=directory)
+        print("YAML directory:          %.2f s" % (time.perf_counter() - start))
+        filename = os.path.join(directory, "machine.parquet")
+        start = time.perf_counter()
+        export_machine_parquet(filename, machine)
+        elapsed = time.perf_counter() - start
+        print("Parquet export:          %.2f s (%d kB)" % (elapsed, os.path.getsize(filename) // 1024))
+        start = time.perf_counter()
+        read_Parquet_Element_Dicts(filename)
+        print("Parquet element dicts:   %.2f s" % (time.perf_counter() - start))
+        start = time.perf_counter()
+        loaded = PAdantic(layout=layout, section=section, element_list=filename)
+        print("Parquet:                 %.2f s" % (time.perf_counter() - start))
+        assert [e.base_model_dump() for e in loaded.elements.values()] == [
+            e.base_model_dump() for e in machine.elements.values()
+        ]
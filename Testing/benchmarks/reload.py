@@ -0,0 +1,42 @@
+"""Benchmark reloading a few edited element files against rebuilding the machine."""
+import os
+import random
+import tempfile
+import time
+
+import yaml
+from directory_loading import write_element_files
+from synthetic import synthetic_definitions, synthetic_element_dicts
+
+from PAdantic.PAdantic import PAdantic
+
+N_ELEMENTS = 3000
+N_EDITED = 5
+
+if __name__ == "__main__":
+    dicts = synthetic_element_dicts(N_ELEMENTS, n_sections=20)
+    layout, section = synthetic_definitions(dicts, paths=2)
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        write_element_files(directory, dicts)
+        machine = PAdantic(layout=layout, section=section, element_list=directory)
+
+        start = time.perf_counter()
+        machine.reload()
+        print("reload, nothing changed: %8.3f s" % (time.perf_counter() - start))
+
+        for elem in random.sample(dicts, N_EDITED):
+            elem["physical"]["length"] = 0.2
+            filename = os.path.join(directory, elem["machine_area"], elem["name"] + ".yaml")
+            with open(filename, "w") as stream:
+                yaml.dump(elem, stream)
+        start = time.perf_counter()
+        changes = machine.reload()
+        print(
+            "reload, %d files changed: %6.3f s" % (len(changes["changed"]), time.perf_counter() - start)
+        )
+
+        start = time.perf_counter()
+        rebuilt = PAdantic(layout=layout, section=section, element_list=directory)
+        print("full rebuild:            %8.3f s" % (time.perf_counter() - start))
+        assert machine.get_elements_s_pos() == rebuilt.get_elements_s_pos()
@@ -0,0 +1,27 @@
+"""Benchmark building a machine from an element directory against loading its snapshot."""
+import os
+import tempfile
+import time
+
+from directory_loading import write_element_files
+from synthetic import synthetic_definitions, synthetic_element_dicts
+
+from PAdantic.PAdantic import PAdantic
+
+N_ELEMENTS = 3000
+
+if __name__ == "__main__":
+    dicts = synthetic_element_dicts(N_ELEMENTS, n_sections=20)
+    layout, section = synthetic_definitions(dicts)
+    with tempfile.TemporaryDirectory() as directory:
+        elements = os.path.join(directory, "elements")
+        write_element_files(elements, dicts)
+        cache = os.path.join(directory, "cache")
+        for label in ["build and write snapshot", "load snapshot"]:
+            start = time.perf_counter()
+            PAdantic.load(
+                layout=layout, section=section, element_list=elements, cache_directory=cache
+            )
+            print("%-25s %.2f s" % (label + ":", time.perf_counter() - start))
+        size = sum(os.path.getsize(os.path.join(cache, f)) for f in os.listdir(cache))
+        print("snapshot size: %.1f MB" % (size / 1e6))
@@ -0,0 +1,45 @@
+"""Benchmark the spatial queries against a scan over every element's geometry."""
+import random
+import time
+
+import numpy as np
+from synthetic import synthetic_machine
+
+N_ELEMENTS = 10000
+N_QUERIES = 1000
+
+
+def naive_nearest(machine, xyz):
+    """Scan every element and recompute its geometry."""
+    distances = {
+        name: np.linalg.norm(np.array(elem.physical.middle.array) - xyz)
+        for name, elem in machine.elements.items()
+    }
+    return min(distances, key=distances.get)
+
+
+if __name__ == "__main__":
+    machine = synthetic_machine(N_ELEMENTS, n_sections=20)
+    s_max = machine.lattices["line0"].table.s_intervals[-1, 1]
+    random.seed(0)
+    positions = [random.uniform(0, s_max) for _ in range(N_QUERIES)]
+    points = [np.array([0.0, 0.0, s]) for s in positions]
+
+    start = time.perf_counter()
+    for xyz in points[:10]:
+        naive_nearest(machine, xyz)
+    naive = (time.perf_counter() - start) / 10
+    print("naive nearest:        %10.2f us/query" % (1e6 * naive))
+
+    start = time.perf_counter()
+    machine.nearest_elements(points[0])
+    print("build KD-tree:        %10.2f ms" % (1e3 * (time.perf_counter() - start)))
+    for name, queries, method in (
+        ("nearest_elements", points, lambda xyz: machine.nearest_elements(xyz, k=5)),
+        ("element_at", positions, machine.element_at),
+        ("elements_overlapping", positions, lambda s: machine.elements_overlapping(s, s + 2.0)),
+    ):
+        start = time.perf_counter()
+        for query in queries:
+            method(query)
+        print("%-21s %10.2f us/query" % (name + ":", 1e6 * (time.perf_counter() - start) / N_QUERIES))
@@ -0,0 +1,87 @@
+"""Synthetic machines used by the benchmark scripts in this directory."""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from PAdantic.models.element import (  # noqa E402
+    BPM,
+    Horizontal_Corrector,
+    Marker,
+    Quadrupole,
+    Vertical_Corrector,
+)
+from PAdantic.models.elementList import MachineModel  # noqa E402
+
+ELEMENT_CYCLE = [
+    ("Quadrupole", "Magnet"),
+    ("Marker", "Simulation"),
+    ("BPM", "Diagnostic"),
+    ("Horizontal_Corrector", "Magnet"),
+    ("Vertical_Corrector", "Magnet"),
+    ("Marker", "Simulation"),
+]
+ELEMENT_CLASSES = {
+    "Quadrupole": Quadrupole,
+    "Marker": Marker,
+    "BPM": BPM,
+    "Horizontal_Corrector": Horizontal_Corrector,
+    "Vertical_Corrector": Vertical_Corrector,
+}
+
+
+def synthetic_element_dicts(n_elements: int, n_sections: int = 10) -> list:
+    """Element dictionaries along a straight line, spread over `n_sections` areas."""
+    per_section = max(1, n_elements // n_sections)
+    elements = []
+    for i in range(n_elements):
+        hardware_type, hardware_class = ELEMENT_CYCLE[i % len(ELEMENT_CYCLE)]
+        area = "A%03d" % min(i // per_section, n_sections - 1)
+        elem = {
+            "name": "SYN-%s-%s-%05d" % (area, hardware_type.upper(), i),
+            "hardware_class": hardware_class,
+            "hardware_type": hardware_type,
+            "machine_area": area,
+            "physical": {
+                "middle": [0.0, 0.0, 0.5 * i + 0.05],
+                "length": 0.1,
+            },
+        }
+        if hardware_type == "BPM":
+            elem["diagnostic"] = {}
+        elements.append(elem)
+    return elements
+
+
+def synthetic_definitions(elements: list, paths: int = 1) -> tuple:
+    """Layout and section definitions for a list of synthetic element dictionaries."""
+    sections = {}
+    for elem in elements:
+        sections.setdefault(elem["machine_area"], []).append(elem["name"])
+    areas = list(sections.keys())
+    layouts = {"line%d" % p: areas[: len(areas) - p] or areas for p in range(paths)}
+    return (
+        {"layouts": layouts, "default_layout": "line0"},
+        {"sections": sections},
+    )
+
+
+def synthetic_elements(n_elements: int, n_sections: int = 10) -> list:
+    """Validated element models for a synthetic machine."""
+    return [
+        ELEMENT_CLASSES[e["hardware_type"]](**e)
+        for e in synthetic_element_dicts(n_elements, n_sections)
+    ]
+
+
+def synthetic_machine(
+    n_elements: int, n_sections: int = 10, paths: int = 1, cls=MachineModel
+):
+    """A machine of `n_elements` elements split over `n_sections` sections."""
+    dicts = synthetic_element_dicts(n_elements, n_sections)
+    layout, section = synthetic_definitions(dicts, paths)
+    elements = {
+        e["name"]: ELEMENT_CLASSES[e["hardware_type"]](**e) for e in dicts
+    }
+    if cls is MachineModel:
+        return cls(layout=layout, section=section, elements=elements)
+    return cls(layout=layout, section=section, element_list=list(elements.values()))
@@ -0,0 +1,47 @@
+"""Benchmark loading an element directory validated, trusted, and trusted with background validation."""
+import glob
+import os
+import tempfile
+import time
+
+import yaml
+
+from directory_loading import write_element_files
+from synthetic import synthetic_definitions, synthetic_element_dicts
+
+from PAdantic.PAdantic import PAdantic
+
+N_ELEMENTS = 3000
+REPEATS = 3
+OPTIONS = [
+    ("validated", {}),
+    ("trusted", {"trusted": True}),
+    ("trusted + background", {"trusted": True, "validate_in_background": True}),
+]
+
+if __name__ == "__main__":
+    dicts = synthetic_element_dicts(N_ELEMENTS, n_sections=20)
+    layout, section = synthetic_definitions(dicts)
+    reference = None
+    with tempfile.TemporaryDirectory() as directory:
+        write_element_files(directory, dicts)
+        start = time.perf_counter()
+        for filename in glob.glob(os.path.join(directory, "**", "*.yaml"), recursive=True):
+            with open(filename) as stream:
+                list(yaml.load_all(stream, Loader=yaml.CSafeLoader))
+        print("%-22s %.2f s" % ("parsing only:", time.perf_counter() - start))
+        for label, options in OPTIONS:
+            best = None
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                machine = PAdantic(
+                    layout=layout, section=section, element_list=directory, **options
+                )
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            # waits for the background validation, outside the timing
+            assert machine.validation_errors == []
+            dumps = [e.base_model_dump() for e in machine.elements.values()]
+            reference = reference or dumps
+            assert dumps == reference
+            print("%-22s %.2f s (%d elements)" % (label + ":", best, N_ELEMENTS))
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from PAdantic.Importers.Magnet_Table import (
+    MagnetTable,
+    add_magnet_table_parameters,
+    add_magnet_table_parameters_batch,
+    load_magnet_table,
+    magnet_key,
+    magnet_table_cache_filename,
+)
+from PAdantic.models.element import Quadrupole
+
+
+class TestMagnetTable(unittest.TestCase):
+    def setUp(self):
+        self.table = MagnetTable(
+            keys=["CLA|S01|QUAD|1", "CLA|GUN|SOL|1", "CLA|S01|QUAD|2"],
+            values=[
+                [1.0, 10.0, 0.0, 0.0, 0.0, 0.0, 100.0, 12.5],
+                [2.0, 20.0, 0.0, 0.0, 0.0, 0.0, 200.0, 5.0],
+                [3.0, 30.0, 0.0, 0.0, 0.0, 0.0, 300.0, 30.0],
+            ],
+            labels=[["QUAD-A", "001"], ["SOL-A", "002"], ["QUAD-A", "003"]],
+        )
+
+    def quadrupole(self, name):
+        return Quadrupole(name=name, machine_area="S01", hardware_type="Quadrupole")
+
+    def test_magnet_key(self):
+        self.assertEqual(magnet_key("EBT-HRG1-MAG-SOL-01"), "CLA|GUN|SOL|1")
+        self.assertIsNone(magnet_key("CLA-S01-MAG-QUAD"))
+
+    def test_rows(self):
+        rows = self.table.rows(
+            ["CLA|S01|QUAD|2", None, "CLA|S02|QUAD|1", "CLA|S01|QUAD|1"]
+        )
+        self.assertListEqual(
+            [self.table.labels[r][1] if r >= 0 else None for r in rows],
+            ["003", None, None, "001"],
+        )
+
+    def test_add_magnet_table_parameters(self):
+        quad = add_magnet_table_parameters(
+            "CLA-S01-MAG-QUAD-02",
+            self.quadrupole("CLA-S01-MAG-QUAD-02"),
+            "CLA-S01-MAG-QUAD-02",
+            table=self.table,
+        )
+        self.assertEqual(quad.manufacturer.serial_number, "003")
+        self.assertEqual(quad.magnetic.linear_saturation_coefficients.m, 3.0)
+        self.assertEqual(quad.electrical.maxI, 30)
+        self.assertEqual(quad.degauss.values[0], 29.94)
+
+    def test_batch_matches_single_lookups(self):
+        names = ["CLA-S01-MAG-QUAD-01", "CLA-S01-MAG-QUAD-02", "CLA-S02-MAG-QUAD-01"]
+        batch = {name: self.quadrupole(name) for name in names}
+        missing = add_magnet_table_parameters_batch(batch, table=self.table)
+        self.assertListEqual(missing, ["CLA-S02-MAG-QUAD-01"])
+        for name in names[:2]:
+            single = add_magnet_table_parameters(
+                name, self.quadrupole(name), name, table=self.table
+            )
+            for field in ["manufacturer", "electrical", "degauss"]:
+                self.assertEqual(getattr(batch[name], field), getattr(single, field))
+            self.assertEqual(
+                batch[name].magnetic.linear_saturation_coefficients,
+                single.magnetic.linear_saturation_coefficients,
+            )
+
+    def test_cache_is_invalidated_when_workbook_changes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "table.xlsx")
+            with open(source, "w") as stream:
+                stream.write("workbook")
+            cache = magnet_table_cache_filename(source, directory)
+            self.table.save(cache, source)
+            loaded = load_magnet_table(source, directory)
+            self.assertListEqual(loaded.keys.tolist(), self.table.keys.tolist())
+            self.assertListEqual(loaded.labels.tolist(), self.table.labels.tolist())
+            stat = os.stat(source)
+            os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertIsNone(MagnetTable.load(cache, source))
+            self.assertIsNotNone(MagnetTable.load(cache))
+
+
+if __name__ == "__main__":
+    unittest.main()
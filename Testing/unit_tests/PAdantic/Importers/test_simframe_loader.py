@@ -0,0 +1,112 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+import yaml
+from PAdantic.Importers import SimFrame_Loader
+from PAdantic.Importers.SimFrame_Loader import (
+    _parse_SimFrame_YAML,
+    read_SimFrame_YAML,
+    read_SimFrame_YAML_files,
+)
+
+NAMES = [
+    "CLA-S01-BPM-01",
+    "CLA-S01-SCR-01",
+    "CLA-S01-CAM-01",
+    "CLA-S01-MARK-01",
+    "CLA-S02-APER-01",
+    "CLA-S03-MARK-01",
+]
+
+
+class TestSimFrameLoader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.directory.name, "YAML"))
+        self.write(
+            "common.yaml",
+            {
+                "CLA-S01-BPM-01": {"type": "beam_position_monitor", "middle": [0, 0, 1.0]},
+                "CLA-S01-SCR-01": {
+                    "type": "screen",
+                    "middle": [0, 0, 2.0],
+                    "camera_name": "CLA-S01-CAM-01",
+                    "sub_elements": {
+                        "CLA-S01-MARK-01": {"type": "marker", "middle": [0, 0, 2.0]}
+                    },
+                },
+            },
+        )
+        self.write(
+            "line1.yaml",
+            {
+                "filename": "YAML/common.yaml",
+                "CLA-S02-APER-01": {"type": "aperture", "middle": [0, 0, 3.0]},
+            },
+        )
+        self.write(
+            "line2.yaml",
+            {
+                "filename": ["YAML/common.yaml"],
+                "CLA-S03-MARK-01": {"type": "marker", "middle": [0, 0, 4.0]},
+            },
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, filename, elements):
+        with open(os.path.join(self.directory.name, "YAML", filename), "w") as stream:
+            yaml.dump({"elements": elements}, stream, sort_keys=False)
+
+    def filenames(self):
+        return [os.path.join(self.directory.name, "YAML", f) for f in ("line1.yaml", "line2.yaml")]
+
+    def test_read_SimFrame_YAML_files(self):
+        convert = mock.Mock(wraps=SimFrame_Loader._convert_SimFrame_Element)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _parse_SimFrame_YAML.cache_clear()
+            with mock.patch.object(SimFrame_Loader, "_convert_SimFrame_Element", convert):
+                serial = read_SimFrame_YAML_files(self.filenames())
+            pooled = read_SimFrame_YAML_files(self.filenames(), workers=2)
+            single = read_SimFrame_YAML(self.filenames()[0])
+        self.assertEqual(list(serial), NAMES)
+        self.assertEqual(
+            [serial[name].physical.middle.z for name in NAMES], [1.0, 2.0, 2.0, 2.0, 3.0, 4.0]
+        )
+        self.assertEqual(serial["CLA-S01-BPM-01"].hardware_type, "BPM")
+        self.assertEqual(serial["CLA-S01-CAM-01"].hardware_model, "PCO")
+        self.assertTrue(serial["CLA-S01-MARK-01"].subelement)
+        self.assertEqual(list(pooled), NAMES)
+        for name, element in serial.items():
+            self.assertEqual(repr(pooled[name]), repr(element))
+        self.assertEqual(list(single), NAMES[:5])
+        # each file is parsed and its elements converted once, however often it is included
+        self.assertEqual(_parse_SimFrame_YAML.cache_info().misses, 3)
+        self.assertEqual(convert.call_count, 5)
+
+    def test_override_through_repeated_include(self):
+        self.write(
+            "override.yaml",
+            {
+                "filename": "YAML/override.yaml",
+                "CLA-S01-BPM-01": {"type": "beam_position_monitor", "middle": [0, 0, 5.0]},
+            },
+        )
+        override = os.path.join(self.directory.name, "YAML", "override.yaml")
+        filenames = self.filenames()
+        with contextlib.redirect_stdout(io.StringIO()):
+            between = read_SimFrame_YAML_files([filenames[0], override, filenames[1]])
+            last = read_SimFrame_YAML_files(filenames + [override])
+        self.assertEqual(list(between), NAMES)
+        self.assertEqual(list(last), NAMES)
+        # line2.yaml includes common.yaml again, which restores the original definition
+        self.assertEqual(between["CLA-S01-BPM-01"].physical.middle.z, 1.0)
+        self.assertEqual(last["CLA-S01-BPM-01"].physical.middle.z, 5.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
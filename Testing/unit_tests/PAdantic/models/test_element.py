@@ -1,5 +1,14 @@
 import unittest
-from PAdantic.models.element import Element, ElectricalElement, ManufacturerElement
+from pydantic import ValidationError
+from PAdantic.Importers.YAML_Loader import validate_trusted_YAML_Elements
+from PAdantic.models.construct import trusted_construct
+from PAdantic.models.elementRegistry import ELEMENT_CLASSES, validate_elements
+from PAdantic.models.element import (
+    Element,
+    ElectricalElement,
+    ManufacturerElement,
+    Quadrupole,
+)
 
 
 class TestElement(unittest.TestCase):
@@ -118,6 +127,83 @@ class TestElement(unittest.TestCase):
             "A float variable for voltage",
         )
 
+    def test_validate_elements(self):
+        self.assertIs(ELEMENT_CLASSES["Quadrupole"], Quadrupole)
+        quad = Quadrupole(
+            machine_area="AREA-01",
+            hardware_type="Quadrupole",
+            name="CLA-A1-QUAD-01",
+            magnetic={"length": 0.1, "k1l": 1.0},
+            physical={"middle": [0, 0, 1.0], "length": 0.1},
+        ).base_model_dump()
+        marker = {
+            "name": "CLA-A1-MARK-01",
+            "hardware_class": "Simulation",
+            "hardware_type": "Marker",
+            "machine_area": "AREA-01",
+        }
+        unknown = dict(marker, hardware_type="Unknown")
+        models, failures = validate_elements([quad, unknown, marker, dict(marker, name=1)])
+        self.assertEqual(sorted(failures), [1, 3])
+        self.assertIn("unknown hardware_type Unknown", failures[1])
+        self.assertIsNone(models[1])
+        self.assertIsInstance(models[0], Quadrupole)
+        self.assertEqual(models[0].base_model_dump(), Quadrupole(**quad).base_model_dump())
+        self.assertEqual(models[2].hardware_type, "Marker")
+
+    def test_validate_elements_validator_exception(self):
+        marker = {
+            "name": "CLA-A1-MARK-01",
+            "hardware_class": "Simulation",
+            "hardware_type": "Marker",
+            "machine_area": "AREA-01",
+        }
+        # the controls validator raises a TypeError, which pydantic does not wrap
+        quad = {
+            "name": "CLA-A1-QUAD-01",
+            "hardware_class": "Magnet",
+            "hardware_type": "Quadrupole",
+            "machine_area": "AREA-01",
+            "magnetic": {"length": 0.1},
+            "controls": {"variables": 5},
+        }
+        unknown = dict(marker, hardware_type="Unknown")
+        models, failures = validate_elements([marker, quad, unknown, dict(marker, name="M2")])
+        self.assertEqual(sorted(failures), [1, 2])
+        self.assertIn("variables must be a dict", failures[1])
+        self.assertIn("unknown hardware_type Unknown", failures[2])
+        self.assertEqual([m.name for m in models if m is not None], ["CLA-A1-MARK-01", "M2"])
+
+    def test_trusted_construct(self):
+        quad = Quadrupole(
+            name="CLA-A1-QUAD-01",
+            machine_area="AREA-01",
+            magnetic={"length": 0.1, "k1l": 2.0},
+            physical={"middle": [0, 0, 1.0], "length": 0.1},
+        )
+        data = quad.base_model_dump()
+        trusted = trusted_construct(Quadrupole, data)
+        self.assertIsInstance(trusted, Quadrupole)
+        self.assertEqual(
+            trusted.base_model_dump(), Quadrupole.model_validate(data).base_model_dump()
+        )
+        self.assertEqual(trusted.physical.middle.z, 1.0)
+        # defaults are copied for each element
+        other = trusted_construct(Quadrupole, data)
+        self.assertIsNot(trusted.magnetic.multipoles, other.magnetic.multipoles)
+        self.assertIsNot(trusted.electrical, other.electrical)
+        documents = [("quad.yaml", 0, data, trusted), ("other.yaml", 0, data, other)]
+        other.magnetic.length = 0.2
+        errors = []
+        validate_trusted_YAML_Elements(documents, errors)
+        self.assertEqual([e.filename for e in errors], ["other.yaml"])
+        self.assertIn("magnetic", errors[0].error)
+        broken = dict(data, physical=dict(data["physical"], length="long"))
+        with self.assertRaises(ValidationError):
+            trusted_construct(Quadrupole, broken)
+        with self.assertRaises(ValidationError):
+            trusted_construct(Quadrupole, {"name": "CLA-A1-QUAD-01"})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -6,6 +6,8 @@ from PAdantic.models.elementList import (
     _baseElement,
 )
 from PAdantic.models.element import Element
+from PAdantic.models.exceptions import LatticeError
+from PAdantic.models.latticeTable import element_geometry
 import unittest
 
 
@@ -321,3 +323,286 @@ class TestMachineModel(unittest.TestCase):
             list(mm.lattices["line1"].sections.keys()),
             ["AREA-01", "AREA-02"],
         )
+
+    def test_machine_layout_name_lookup(self):
+        sections = {
+            "sections": {
+                "AREA-01": ["MAG-01", "BPM-01"],
+                "AREA-02": ["CAV-01"],
+            }
+        }
+        layout = {
+            "layouts": {
+                "line1": ["AREA-01", "AREA-02"],
+            }
+        }
+        mm = MachineModel(
+            elements={name: Element(**info) for name, info in self.elements.items()},
+            section=sections,
+            layout=layout,
+        )
+        line = mm.lattices["line1"]
+        self.assertEqual(line._lookup_index("BPM-01"), 1)
+        self.assertEqual(line.get_element("CAV-01").name, "CAV-01")
+        self.assertListEqual(
+            line.elements_between(start="BPM-01", end="CAV-01"),
+            ["BPM-01", "CAV-01"],
+        )
+        with self.assertRaises(LatticeError):
+            line._lookup_index("MISSING")
+        with self.assertRaises(LatticeError):
+            line.get_element("MISSING")
+
+    def test_machine_layout_table(self):
+        sections = {
+            "sections": {
+                "AREA-01": ["MAG-01", "BPM-01"],
+                "AREA-02": ["CAV-01"],
+            }
+        }
+        layout = {
+            "layouts": {
+                "line1": ["AREA-01", "AREA-02"],
+            }
+        }
+        mm = MachineModel(
+            elements={name: Element(**info) for name, info in self.elements.items()},
+            section=sections,
+            layout=layout,
+        )
+        table = mm.lattices["line1"].table
+        self.assertEqual(len(table), 3)
+        self.assertListEqual(table.names(), ["MAG-01", "BPM-01", "CAV-01"])
+        self.assertListEqual(
+            table.decode("machine_area"), ["area-01", "area-01", "area-02"]
+        )
+        self.assertListEqual(
+            mm.elements_between(path="line1", element_class="MONITOR"), ["BPM-01"]
+        )
+        self.assertListEqual(
+            mm.elements_between(path="line1", element_type=["quadrupole", "cavity"]),
+            ["MAG-01", "CAV-01"],
+        )
+        self.assertListEqual(
+            mm.elements_between(path="line1", element_type="Unknown"), []
+        )
+        index = table.inverted_index("hardware_type")
+        self.assertListEqual(sorted(index.keys()), ["bpm", "cavity", "quadrupole"])
+        self.assertListEqual(index["bpm"].tolist(), [1])
+        self.assertListEqual(
+            table.positions("machine_area", "AREA-01", first=1).tolist(), [1]
+        )
+        self.assertListEqual(
+            table.positions("hardware_type", ["Cavity", "quadrupole"], last=2).tolist(),
+            [0],
+        )
+
+    def test_elements_between_many(self):
+        sections = {
+            "sections": {
+                "AREA-01": ["MAG-01", "BPM-01"],
+                "AREA-02": ["CAV-01"],
+            }
+        }
+        layout = {
+            "layouts": {
+                "line1": ["AREA-01", "AREA-02"],
+            }
+        }
+        mm = MachineModel(
+            elements={name: Element(**info) for name, info in self.elements.items()},
+            section=sections,
+            layout=layout,
+        )
+        queries = [
+            {"path": "line1"},
+            {"path": "line1", "start": "BPM-01", "element_type": ["Cavity", "BPM"]},
+            {"path": "line1", "start": "MAG-01", "element_type": ["bpm", "cavity"]},
+            {"path": "line1", "element_class": "magnet", "element_type": "Quadrupole"},
+            {"path": "line1", "element_type": "Unknown"},
+        ]
+        self.assertListEqual(
+            mm.elements_between_many(queries),
+            [mm.elements_between(**query) for query in queries],
+        )
+        with self.assertRaises(TypeError):
+            mm.elements_between_many([{"path": "line1", "element": "MAG-01"}])
+
+    def test_update_only_rebuilds_affected_sections(self):
+        sections = {
+            "sections": {
+                "AREA-01": ["MAG-01", "BPM-01"],
+                "AREA-02": ["CAV-01"],
+            }
+        }
+        layout = {
+            "layouts": {
+                "line1": ["AREA-01", "AREA-02"],
+                "line2": ["AREA-02"],
+            }
+        }
+        elements = {info["name"]: Element(**info) for info in self.elements.values()}
+        mm = MachineModel(section=sections, layout=layout)
+        mm.update(elements)
+        area1 = mm.sections["AREA-01"]
+        area2 = mm.sections["AREA-02"]
+        line2 = mm.lattices["line2"]
+        mm.update({"CAV-01": Element(**self.elements["elem3"])})
+        self.assertIs(mm.sections["AREA-01"], area1)
+        self.assertIsNot(mm.sections["AREA-02"], area2)
+        self.assertIs(
+            mm.lattices["line1"].sections["AREA-02"],
+            mm.lattices["line2"].sections["AREA-02"],
+        )
+        self.assertIsNot(mm.lattices["line2"], line2)
+        self.assertListEqual(
+            mm.lattices["line1"].elements, ["MAG-01", "BPM-01", "CAV-01"]
+        )
+
+    def test_batch_update(self):
+        sections = {
+            "sections": {
+                "AREA-01": ["MAG-01", "BPM-01"],
+                "AREA-02": ["CAV-01"],
+            }
+        }
+        layout = {
+            "layouts": {
+                "line1": ["AREA-01", "AREA-02"],
+            }
+        }
+        mm = MachineModel(section=sections, layout=layout)
+        generation = mm.generation
+        with mm.batch_update():
+            for info in self.elements.values():
+                mm.update({info["name"]: Element(**info)})
+            self.assertEqual(mm.generation, generation)
+            self.assertDictEqual(mm.lattices, {})
+        self.assertNotEqual(mm.generation, generation)
+        self.assertListEqual(
+            mm.lattices["line1"].elements, ["MAG-01", "BPM-01", "CAV-01"]
+        )
+        generation = mm.generation
+        mm.update_many(
+            [{info["name"]: Element(**info)} for info in self.elements.values()]
+        )
+        self.assertNotEqual(mm.generation, generation)
+        self.assertListEqual(
+            mm.lattices["line1"].elements, ["MAG-01", "BPM-01", "CAV-01"]
+        )
+
+    def test_update_in_place_change(self):
+        sections = {
+            "sections": {
+                "AREA-01": ["MAG-01", "BPM-01"],
+                "AREA-02": ["CAV-01"],
+            }
+        }
+        layout = {
+            "layouts": {
+                "line1": ["AREA-01", "AREA-02"],
+            }
+        }
+        mm = MachineModel(
+            elements={info["name"]: Element(**info) for info in self.elements.values()},
+            section=sections,
+            layout=layout,
+        )
+        magnet = mm["MAG-01"]
+        magnet.hardware_type = "BPM"
+        # the lattice tables are only rebuilt when the change goes through update
+        self.assertListEqual(
+            mm.elements_between(path="line1", element_type="BPM"), ["BPM-01"]
+        )
+        generation = mm.generation
+        mm.update({"MAG-01": magnet})
+        self.assertNotEqual(mm.generation, generation)
+        self.assertListEqual(
+            mm.elements_between(path="line1", element_type="BPM"),
+            ["MAG-01", "BPM-01"],
+        )
+        self.assertListEqual(
+            mm.elements_between(path="line1", element_type="Quadrupole"), []
+        )
+        self.assertEqual(mm.lattices["line1"].get_element("MAG-01").hardware_type, "BPM")
+
+    def test_lookup_by_alias(self):
+        sections = {
+            "sections": {
+                "AREA-01": ["MAG-01", "BPM-01"],
+                "AREA-02": ["CAV-01"],
+            }
+        }
+        layout = {
+            "layouts": {
+                "line1": ["AREA-01", "AREA-02"],
+            }
+        }
+        mm = MachineModel(
+            elements={info["name"]: Element(**info) for info in self.elements.values()},
+            section=sections,
+            layout=layout,
+        )
+        self.assertEqual(mm["bpm1"].name, "BPM-01")
+        self.assertEqual(mm.get_element("cav1").name, "CAV-01")
+        self.assertListEqual([e.name for e in mm[["elem1", "CAV-01"]]], ["MAG-01", "CAV-01"])
+        self.assertListEqual(
+            mm.elements_between(path="line1", start="bpm1", end="cav1"),
+            ["BPM-01", "CAV-01"],
+        )
+        self.assertEqual(mm.lattices["line1"].get_element("elem1").name, "MAG-01")
+        # replacing an element replaces its aliases
+        cavity = dict(self.elements["elem3"], alias=["cav2"])
+        mm.update({"CAV-01": Element(**cavity)})
+        self.assertEqual(mm.get_element("cav2").name, "CAV-01")
+        with self.assertRaises(LatticeError):
+            mm.get_element("cav1")
+        # canonical names take precedence over aliases
+        marker = dict(self.elements["elem1"], name="bpm1", alias=[])
+        mm.update({"bpm1": Element(**marker)})
+        self.assertEqual(mm["bpm1"].name, "bpm1")
+        self.assertEqual(mm.resolve_name("elem2"), "BPM-01")
+
+    def test_paths_containing(self):
+        sections = {
+            "sections": {
+                "AREA-01": ["MAG-01", "BPM-01"],
+                "AREA-02": ["CAV-01"],
+            }
+        }
+        layout = {
+            "layouts": {
+                "line1": ["AREA-01", "AREA-02"],
+                "line2": ["AREA-01"],
+            }
+        }
+        mm = MachineModel(
+            elements={info["name"]: Element(**info) for info in self.elements.values()},
+            section=sections,
+            layout=layout,
+        )
+        self.assertListEqual(mm.paths_containing("MAG-01"), ["line1", "line2"])
+        self.assertListEqual(mm.paths_containing("cav1"), ["line1"])
+        self.assertListEqual(mm.paths_containing("Unknown"), [])
+        self.assertListEqual(mm.elements_in_paths(), ["MAG-01", "BPM-01", "CAV-01"])
+        self.assertListEqual(
+            mm.elements_in_paths(element_type=["cavity", "bpm"]), ["BPM-01", "CAV-01"]
+        )
+        union = set(mm.elements_between(path="line1", element_class="magnet"))
+        union |= set(mm.elements_between(path="line2", element_class="magnet"))
+        self.assertSetEqual(set(mm.elements_in_paths(element_class="magnet")), union)
+
+    def test_element_geometry_matches_physical(self):
+        elements = [
+            Element(
+                **self.elements["elem1"],
+                physical={"middle": [0.1, 0.0, 2.0], "length": 0.3, "rotation": 0.2},
+            ),
+            Element(**self.elements["elem2"]),
+        ]
+        geometry = element_geometry(elements)
+        for elem, (start, middle, end) in zip(elements, geometry):
+            with self.subTest(name=elem.name):
+                self.assertListEqual(list(start), list(elem.physical.start.array))
+                self.assertListEqual(list(middle), list(elem.physical.middle.array))
+                self.assertListEqual(list(end), list(elem.physical.end.array))
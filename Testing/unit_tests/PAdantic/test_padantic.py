@@ -1,6 +1,28 @@
+import glob
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
 from PAdantic.PAdantic import PAdantic
-from PAdantic.models.element import Quadrupole
+from PAdantic.Exporters.JSON import export_machine_json
+from PAdantic.Exporters.Parquet import export_machine_parquet
+from PAdantic.Exporters.YAML import (
+    dump_element_yaml,
+    export_elements,
+    export_machine_combined_file,
+    export_machine_combined_file_streaming,
+    export_machine_parallel,
+)
+from PAdantic.Exporters.Snapshot import export_snapshot
+from PAdantic.Importers.Snapshot_Loader import snapshot_filename, snapshot_key
+from PAdantic.Importers.YAML_Loader import iter_YAML_Combined_File, read_YAML_Combined_File
+from PAdantic.models.control import ControlsInformation
+from PAdantic.models.element import Marker, Quadrupole
+from PAdantic.models.lazyElement import LazyElementDict
 from PAdantic.models.magnetic import Quadrupole_Magnet
 from PAdantic.models.physical import PhysicalElement, Position
 
@@ -62,6 +84,513 @@ class TestPAdantic(unittest.TestCase):
         self.assertIsInstance(elements_s_pos, dict)
         self.assertGreater(len(elements_s_pos), 0)
 
+    def _machine_with_end_marker(self):
+        q3 = Quadrupole(
+            name="QUAD3",
+            machine_area="NODO",
+            physical=PhysicalElement(
+                middle=Position(
+                    x=0,
+                    y=0,
+                    z=0.8,
+                ),
+                length=0.0,
+            ),
+        )
+        sections = {
+            "sections": {
+                "FODO": ["QUAD1"],
+                "NODO": ["QUAD2", "QUAD3"],
+            }
+        }
+        return PAdantic(
+            layout=self.layouts,
+            section=sections,
+            element_list=[self.q1, self.q2, q3],
+        )
+
+    def test_get_elements_s_pos_values(self):
+        machine = self._machine_with_end_marker()
+        elements_s_pos = machine.get_elements_s_pos()
+        self.assertDictEqual(
+            elements_s_pos, {"QUAD1": 0.1, "QUAD2": 0.5, "QUAD3": 0.75}
+        )
+        elements_s_pos = machine.get_elements_s_pos(start="QUAD2")
+        self.assertDictEqual(elements_s_pos, {"QUAD2": 0.1, "QUAD3": 0.35})
+
+    def test_get_drifts(self):
+        drifts = self._machine_with_end_marker().get_drifts()
+        self.assertListEqual(drifts["name"], ["QUAD1", "QUAD2", "QUAD3"])
+        self.assertListEqual(drifts["has_drift"].tolist(), [True, True, False])
+        self.assertAlmostEqual(drifts["drift_length"][0], 0.3)
+        self.assertAlmostEqual(drifts["drift_middle"][0][2], 0.3)
+        self.assertAlmostEqual(drifts["drift_length"][1], 0.25)
+
+    def test_create_drifts(self):
+        elements = self._machine_with_end_marker().createDrifts()
+        self.assertListEqual(
+            list(elements.keys()), ["QUAD1", "drift1", "QUAD2", "drift2", "QUAD3"]
+        )
+        self.assertEqual(elements["drift1"].hardware_type, "Drift")
+        self.assertEqual(elements["drift1"].machine_area, "FODO")
+        self.assertAlmostEqual(elements["drift1"].physical.length, 0.3)
+
+    def test_spatial_queries(self):
+        machine = self._machine_with_end_marker()
+        self.assertEqual(machine.element_at(0.05), "QUAD1")
+        self.assertIsNone(machine.element_at(0.2))
+        self.assertEqual(machine.element_at(0.45), "QUAD2")
+        self.assertListEqual(machine.elements_overlapping(0.05, 0.45), ["QUAD1", "QUAD2"])
+        self.assertListEqual(machine.elements_overlapping(1.0, 0.6), ["QUAD3"])
+        self.assertListEqual(machine.elements_overlapping(0.2, 0.3), [])
+        self.assertListEqual(
+            machine.nearest_elements([0, 0, 0.75], k=2), ["QUAD3", "QUAD2"]
+        )
+        self.assertListEqual(machine.nearest_elements([0, 0, 0], k=10)[:1], ["QUAD1"])
+
+    def test_all_properties_are_cached_until_update(self):
+        self.machine.clear_cache()
+        generation = self.machine.generation
+        quadrupoles = self.machine.all_quadrupoles
+        self.assertSetEqual(quadrupoles, {"QUAD1"})
+        quadrupoles.add("QUAD9")
+        self.assertSetEqual(self.machine.all_quadrupoles, {"QUAD1"})
+        stats = self.machine.cache_statistics
+        # all_quadrupoles is built from the cached path membership table: one miss each
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["generation"], generation)
+        self.machine.update({"QUAD2": self.q2})
+        self.assertNotEqual(self.machine.generation, generation)
+        _ = self.machine.all_quadrupoles
+        self.assertEqual(self.machine.cache_statistics["misses"], 4)
+
+    def test_parallel_directory_loading(self):
+        q3 = self.q2.model_copy(update={"name": "QUAD3"})
+        with tempfile.TemporaryDirectory() as directory:
+            export_elements(directory, [self.q2, q3, self.q1])
+            serial = PAdantic(
+                layout=self.layouts, section=self.sections, element_list=directory
+            )
+            parallel = PAdantic(
+                layout=self.layouts,
+                section=self.sections,
+                element_list=directory,
+                workers=2,
+            )
+        self.assertListEqual(list(serial.elements), ["QUAD1", "QUAD2", "QUAD3"])
+        self.assertListEqual(list(parallel.elements), list(serial.elements))
+        for name in serial.elements:
+            self.assertEqual(
+                parallel[name].base_model_dump(), serial[name].base_model_dump()
+            )
+        self.assertNotIn("workers", parallel.model_dump())
+
+    def test_load_errors(self):
+        with tempfile.TemporaryDirectory() as directory:
+            export_elements(directory, [self.q1, self.q2])
+            with open(os.path.join(directory, "broken.yaml"), "w") as stream:
+                stream.write("name: [unclosed\n")
+            with open(os.path.join(directory, "multiple.yaml"), "w") as stream:
+                stream.write("name: QUAD4\nhardware_type: Unknown\n---\n")
+                stream.write("name: QUAD5\nhardware_type: Quadrupole\nmachine_area: 1\n")
+            for workers in [None, 2]:
+                with self.assertWarns(UserWarning):
+                    machine = PAdantic(
+                        layout=self.layouts,
+                        section=self.sections,
+                        element_list=directory,
+                        workers=workers,
+                    )
+                self.assertListEqual(list(machine.elements), ["QUAD1", "QUAD2"])
+                errors = machine.load_errors
+                self.assertListEqual(
+                    [(os.path.basename(e.filename), e.index, e.name) for e in errors],
+                    [
+                        ("broken.yaml", 0, None),
+                        ("multiple.yaml", 0, "QUAD4"),
+                        ("multiple.yaml", 1, "QUAD5"),
+                    ],
+                )
+                self.assertIn("Unknown", errors[1].error)
+                self.assertEqual(errors[2].hardware_type, "Quadrupole")
+
+    def test_trusted_loading(self):
+        with tempfile.TemporaryDirectory() as directory, tempfile.TemporaryDirectory() as other:
+            export_elements(directory, [self.q1, self.q2])
+            export_machine_combined_file(other, self.machine)
+            combined = os.path.join(other, "summary.yaml")
+            eager = PAdantic(
+                layout=self.layouts, section=self.sections, element_list=directory
+            )
+            for element_list, workers in [(directory, None), (directory, 2), (combined, None)]:
+                machine = PAdantic(
+                    layout=self.layouts,
+                    section=self.sections,
+                    element_list=element_list,
+                    workers=workers,
+                    trusted=True,
+                    validate_in_background=True,
+                )
+                self.assertListEqual(list(machine.elements), list(eager.elements))
+                for name in eager.elements:
+                    self.assertEqual(
+                        machine[name].base_model_dump(), eager[name].base_model_dump()
+                    )
+                self.assertListEqual(machine.validation_errors, [])
+                self.assertNotIn("trusted", machine.model_dump())
+            with open(os.path.join(directory, "broken.yaml"), "w") as stream:
+                stream.write("name: QUAD3\nhardware_type: Quadrupole\nmachine_area: NODO\n")
+                stream.write("physical:\n  length: long\n")
+            with self.assertWarns(UserWarning):
+                machine = PAdantic(
+                    layout=self.layouts,
+                    section=self.sections,
+                    element_list=directory,
+                    trusted=True,
+                    validate_in_background=True,
+                )
+        self.assertListEqual(list(machine.elements), ["QUAD1", "QUAD2"])
+        self.assertListEqual([e.name for e in machine.load_errors], ["QUAD3"])
+        self.assertListEqual(machine.validation_errors, [])
+
+    def test_load_from_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            elements = os.path.join(directory, "elements")
+            cache = os.path.join(directory, "cache")
+            export_elements(elements, [self.q1, self.q2])
+            machine = PAdantic.load(
+                layout=self.layouts,
+                section=self.sections,
+                element_list=elements,
+                cache_directory=cache,
+            )
+            self.assertListEqual(list(machine.elements), ["QUAD1", "QUAD2"])
+            self.assertEqual(len(os.listdir(cache)), 1)
+            snapshot = PAdantic.load(
+                layout=self.layouts,
+                section=self.sections,
+                element_list=elements,
+                cache_directory=cache,
+            )
+            self.assertListEqual(list(snapshot.elements), ["QUAD1", "QUAD2"])
+            self.assertDictEqual(snapshot.get_elements_s_pos(), machine.get_elements_s_pos())
+            self.assertIs(snapshot["QUAD1"], snapshot.lattices["line1"].get_element("QUAD1"))
+            # a snapshot is used as long as its key matches
+            key = snapshot_key(self.layouts, self.sections, elements)
+            export_snapshot(snapshot_filename(key, cache), self.machine, key)
+            snapshot = PAdantic.load(
+                layout=self.layouts,
+                section=self.sections,
+                element_list=elements,
+                cache_directory=cache,
+            )
+            self.assertIs(type(snapshot), PAdantic)
+            self.assertEqual(snapshot.element_list, self.machine.element_list)
+            # touching an element file invalidates the snapshot
+            quad1 = os.path.join(elements, self.q1.subdirectory, "QUAD1.yaml")
+            os.utime(quad1, ns=(0, os.stat(quad1).st_mtime_ns + 1))
+            rebuilt = PAdantic.load(
+                layout=self.layouts,
+                section=self.sections,
+                element_list=elements,
+                cache_directory=cache,
+            )
+            self.assertEqual(rebuilt.element_list, elements)
+
+    def test_snapshot_depends_on_load_options(self):
+        with tempfile.TemporaryDirectory() as directory:
+            elements = os.path.join(directory, "elements")
+            cache = os.path.join(directory, "cache")
+            export_elements(elements, [self.q1, self.q2])
+            definition = dict(
+                layout=self.layouts, section=self.sections, element_list=elements, cache_directory=cache
+            )
+            lazy = PAdantic.load(lazy=True, **definition)
+            self.assertIsInstance(lazy.elements, LazyElementDict)
+            # a lazy build is not served to a caller asking for a validated machine
+            machine = PAdantic.load(**definition)
+            self.assertFalse(machine.lazy)
+            self.assertNotIsInstance(machine.elements, LazyElementDict)
+            self.assertEqual(len(os.listdir(cache)), 2)
+            self.assertIsInstance(PAdantic.load(lazy=True, **definition).elements, LazyElementDict)
+
+    def test_lazy_loading(self):
+        with tempfile.TemporaryDirectory() as directory:
+            export_elements(directory, [self.q1, self.q2])
+            eager = PAdantic(
+                layout=self.layouts, section=self.sections, element_list=directory
+            )
+            machine = PAdantic(
+                layout=self.layouts,
+                section=self.sections,
+                element_list=directory,
+                lazy=True,
+            )
+        self.assertDictEqual(
+            machine.materialization_statistics, {"elements": 2, "materialized": 0}
+        )
+        self.assertListEqual(
+            machine.lattices["line1"].elements, eager.lattices["line1"].elements
+        )
+        self.assertDictEqual(machine.get_elements_s_pos(), eager.get_elements_s_pos())
+        self.assertEqual(machine.materialization_statistics["materialized"], 0)
+        quad1 = machine["QUAD1"]
+        self.assertIsInstance(quad1, Quadrupole)
+        self.assertEqual(quad1.base_model_dump(), eager["QUAD1"].base_model_dump())
+        self.assertIs(machine.get_element("QUAD1"), quad1)
+        self.assertEqual(machine.materialization_statistics["materialized"], 1)
+        # the sections hold stubs, which validate the full model when needed
+        stub = machine.sections["NODO"]["QUAD2"]
+        self.assertEqual(stub.magnetic, eager["QUAD2"].magnetic)
+        self.assertEqual(machine.materialization_statistics["materialized"], 2)
+        self.assertTrue(
+            all(isinstance(e, Quadrupole) for e in machine.elements.values())
+        )
+
+    def test_lazy_loading_shares_elements(self):
+        with tempfile.TemporaryDirectory() as directory:
+            export_elements(directory, [self.q1, self.q2])
+            machine = PAdantic(
+                layout=self.layouts,
+                section=self.sections,
+                element_list=directory,
+                lazy=True,
+            )
+        # materialized through the machine, read through the lattice
+        machine["QUAD1"].magnetic.length = 0.2
+        quad1 = machine.lattices["line1"].get_element("QUAD1")
+        self.assertIsInstance(quad1, Quadrupole)
+        self.assertIs(quad1, machine["QUAD1"])
+        self.assertEqual(quad1.magnetic.length, 0.2)
+        # materialized through a section, read through the machine
+        stub = machine.sections["NODO"]["QUAD2"]
+        stub.machine_area = "NODO2"
+        self.assertIsInstance(stub, Quadrupole)
+        self.assertIs(machine["QUAD2"], stub)
+        self.assertEqual(machine["QUAD2"].machine_area, "NODO2")
+        self.assertEqual(machine.materialization_statistics["materialized"], 2)
+
+    def test_reload(self):
+        with tempfile.TemporaryDirectory() as directory:
+            export_elements(directory, [self.q1, self.q2])
+            machine = PAdantic(
+                layout=self.layouts, section=self.sections, element_list=directory
+            )
+            self.assertFalse(any(machine.reload().values()))
+            fodo = machine.sections["FODO"]
+            generation = machine.generation
+            # touching a file without changing it does not reload it
+            quad2_file = glob.glob(os.path.join(directory, "**", "QUAD2.yaml"), recursive=True)[0]
+            stat = os.stat(quad2_file)
+            os.utime(quad2_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertFalse(any(machine.reload().values()))
+
+            self.q2.physical.length = 0.2
+            self.q3 = self.q2.model_copy(update={"name": "QUAD3"})
+            export_elements(directory, [self.q2, self.q3])
+            changes = machine.reload()
+            self.assertEqual([os.path.basename(f) for f in changes["added"]], ["QUAD3.yaml"])
+            self.assertEqual(changes["changed"], [quad2_file])
+            self.assertEqual(machine["QUAD2"].physical.length, 0.2)
+            self.assertIn("QUAD3", machine.elements)
+            # only the section containing the changed elements is rebuilt
+            self.assertIs(machine.sections["FODO"], fodo)
+            self.assertGreater(machine.generation, generation)
+
+            os.remove(glob.glob(os.path.join(directory, "**", "QUAD1.yaml"), recursive=True)[0])
+            with open(quad2_file, "w") as stream:
+                stream.write("name: [unclosed\n")
+            with self.assertWarns(UserWarning):
+                changes = machine.reload()
+            self.assertEqual(len(changes["removed"]), 1)
+            self.assertNotIn("QUAD1", machine.elements)
+            self.assertNotIn("QUAD2", machine.elements)
+            # the defined sections remain, without the removed elements
+            self.assertListEqual(machine.sections["FODO"].elements.names(), [])
+            self.assertListEqual([e.filename for e in machine.load_errors], [quad2_file])
+
+    def test_watch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            export_elements(directory, [self.q1, self.q2])
+            machine = PAdantic(
+                layout=self.layouts, section=self.sections, element_list=directory
+            )
+            reloaded = threading.Event()
+            machine.watch(interval=0.01, callback=lambda changes: reloaded.set())
+            self.q2.physical.length = 0.2
+            export_elements(directory, [self.q2])
+            self.assertTrue(reloaded.wait(5))
+            machine.stop_watching()
+            self.assertEqual(machine["QUAD2"].physical.length, 0.2)
+
+    def test_parallel_export(self):
+        with tempfile.TemporaryDirectory() as serial, tempfile.TemporaryDirectory() as parallel:
+            export_elements(serial, [self.q1, self.q2])
+            machine = PAdantic(layout=self.layouts, section=self.sections, element_list=serial)
+            written = export_machine_parallel(parallel, machine, workers=2)
+            self.assertEqual(len(written), 2)
+            export_elements(serial, list(machine.elements.values()))
+            for filename in written:
+                with open(filename, "rb") as a, open(filename.replace(parallel, serial), "rb") as b:
+                    self.assertEqual(a.read(), b.read())
+            # unchanged elements are not written again, including those written by export_elements
+            self.assertEqual(export_machine_parallel(parallel, machine), [])
+            self.assertEqual(export_machine_parallel(serial, machine), [])
+            machine["QUAD2"].physical.length = 0.2
+            written = export_machine_parallel(parallel, machine)
+            self.assertEqual([os.path.basename(f) for f in written], ["QUAD2.yaml"])
+
+    def test_streaming_combined_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            export_elements(directory, [self.q1, self.q2])
+            machine = PAdantic(layout=self.layouts, section=self.sections, element_list=directory)
+            export_machine_combined_file(os.path.join(directory, "combined"), machine)
+            filename = export_machine_combined_file_streaming(os.path.join(directory, "streamed"), machine)
+            with open(filename) as a, open(os.path.join(directory, "combined", "summary.yaml")) as b:
+                self.assertEqual(a.read(), b.read())
+            compressed = export_machine_combined_file_streaming(directory, machine, compression="gzip")
+            self.assertTrue(compressed.endswith("summary.yaml.gz"))
+            self.assertEqual(
+                [name for name, _ in iter_YAML_Combined_File(compressed)], ["QUAD1", "QUAD2"]
+            )
+            loaded = PAdantic(layout=self.layouts, section=self.sections, element_list=compressed)
+            self.assertEqual(
+                loaded["QUAD2"].base_model_dump(), machine["QUAD2"].base_model_dump()
+            )
+            streamed = read_YAML_Combined_File(compressed, streaming=True)
+            self.assertEqual(
+                [e.base_model_dump() for e in streamed],
+                [e.base_model_dump() for e in loaded.elements.values()],
+            )
+
+    def test_hand_written_combined_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # an anchor shared between elements cannot be read one element at a time
+            filename = os.path.join(directory, "summary.yaml")
+            with open(filename, "w") as stream:
+                stream.write(
+                    "QUAD1:\n  name: QUAD1\n  hardware_type: Quadrupole\n  machine_area: FODO\n"
+                    "  magnetic: &magnet {length: 0.1, k1l: 1.0}\n"
+                    "  physical: {middle: [0, 0, 0.1], length: 0.1}\n"
+                    "QUAD2:\n  name: QUAD2\n  hardware_type: Quadrupole\n  machine_area: NODO\n"
+                    "  magnetic: *magnet\n  physical: {middle: [0, 0, 0.3], length: 0.1}\n"
+                )
+            machine = PAdantic(layout=self.layouts, section=self.sections, element_list=filename)
+        self.assertListEqual(list(machine.elements), ["QUAD1", "QUAD2"])
+        self.assertEqual(machine["QUAD2"].magnetic, machine["QUAD1"].magnetic)
+
+    def test_combined_file_validator_exception(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "summary.yaml")
+            with open(filename, "w") as stream:
+                stream.write(
+                    "QUAD1:\n  name: QUAD1\n  hardware_type: Quadrupole\n  machine_area: FODO\n"
+                    "  magnetic: {length: 0.1}\n  controls: {variables: 5}\n"
+                    "QUAD2:\n  name: QUAD2\n  hardware_type: Quadrupole\n  machine_area: NODO\n"
+                    "  magnetic: {length: 0.1}\n  physical: {middle: [0, 0, 0.3], length: 0.1}\n"
+                )
+            with self.assertWarns(UserWarning):
+                machine = PAdantic(
+                    layout=self.layouts, section={"sections": {"NODO": ["QUAD2"]}}, element_list=filename
+                )
+        self.assertListEqual(list(machine.elements), ["QUAD2"])
+        self.assertEqual([(e.index, e.name) for e in machine.load_errors], [(0, "QUAD1")])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_parquet_round_trip(self):
+        self.q1.controls = ControlsInformation(
+            variables={"var1": {"identifier": "var1", "dtype": "float", "protocol": "CA"}}
+        )
+        self.q2.magnetic = Quadrupole_Magnet(length=0.1, multipoles={"K3L": [3, 2.0]})
+        with tempfile.TemporaryDirectory() as directory:
+            export_elements(directory, [self.q1, self.q2])
+            machine = PAdantic(layout=self.layouts, section=self.sections, element_list=directory)
+            filename = os.path.join(directory, "machine.parquet")
+            export_machine_parquet(filename, machine)
+            loaded = PAdantic(layout=self.layouts, section=self.sections, element_list=filename)
+            self.assertEqual(list(loaded.elements), list(machine.elements))
+            for name, elem in machine.elements.items():
+                self.assertEqual(dump_element_yaml(loaded[name]), dump_element_yaml(elem))
+            self.assertEqual(loaded.sections["FODO"].elements.names(), ["QUAD1"])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_parquet_schema(self):
+        import pyarrow
+        import pyarrow.parquet
+
+        marker = Marker(
+            name="MARK1",
+            machine_area="FODO",
+            hardware_class="Marker",
+            physical=PhysicalElement(middle=Position(x=0, y=0, z=0.2)),
+        )
+        machine = PAdantic(
+            layout=self.layouts, section=self.sections, element_list=[self.q1, marker, self.q2]
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "machine.parquet")
+            export_machine_parquet(filename, machine)
+            parquet = pyarrow.parquet.ParquetFile(filename)
+            schema = parquet.schema_arrow
+            # one row group per element class, with column types taken from the models
+            self.assertEqual(parquet.num_row_groups, 2)
+            self.assertEqual(schema.field("physical.length").type, pyarrow.float64())
+            self.assertEqual(schema.field("magnetic.order").type, pyarrow.int64())
+            self.assertEqual(schema.field("name").type, pyarrow.string())
+            loaded = PAdantic(layout=self.layouts, section=self.sections, element_list=filename)
+        self.assertEqual(list(loaded.elements), ["QUAD1", "MARK1", "QUAD2"])
+        self.assertIsInstance(loaded["MARK1"], Marker)
+        self.assertEqual(loaded["MARK1"].physical, machine["MARK1"].physical)
+
+    def test_json_round_trip(self):
+        self.q2.magnetic = Quadrupole_Magnet(length=0.1, multipoles={"K3L": [3, 2.0]})
+        with tempfile.TemporaryDirectory() as directory:
+            export_elements(directory, [self.q1, self.q2])
+            machine = PAdantic(layout=self.layouts, section=self.sections, element_list=directory)
+            filename = os.path.join(directory, "machine.json")
+            export_machine_json(filename, machine)
+            with open(filename) as stream:
+                self.assertEqual(
+                    json.load(stream), {n: e.base_model_dump() for n, e in machine.elements.items()}
+                )
+            loaded = PAdantic(layout=self.layouts, section=self.sections, element_list=filename)
+            for name, elem in machine.elements.items():
+                self.assertEqual(dump_element_yaml(loaded[name]), dump_element_yaml(elem))
+            # invalid elements are skipped
+            with open(filename) as stream:
+                data = json.load(stream)
+            data["QUAD1"]["name"] = 1
+            # the controls validator raises a TypeError rather than a ValidationError
+            data["QUAD3"] = dict(data["QUAD2"], name="QUAD3", controls={"variables": 5})
+            with open(filename, "w") as stream:
+                json.dump(data, stream)
+            with self.assertWarns(UserWarning):
+                loaded = PAdantic(layout=self.layouts, section={"sections": {"NODO": ["QUAD2"]}}, element_list=filename)
+            self.assertEqual(list(loaded.elements), ["QUAD2"])
+            self.assertEqual([(e.index, e.name) for e in loaded.load_errors], [(0, None), (2, "QUAD3")])
+            error = loaded.load_errors[0]
+            self.assertEqual((error.filename, error.hardware_type), (filename, "Quadrupole"))
+            self.assertIn("name", error.error)
+            self.assertIn("variables must be a dict", loaded.load_errors[1].error)
+
+    def test_import_defers_heavy_resources(self):
+        script = (
+            "import sys, PAdantic.PAdantic, PAdantic.models.PV as PV;"
+            "print(sorted(m for m in ['pandas', 'scipy.spatial'] if m in sys.modules),"
+            " 'MagnetPV' in vars(PV), PV.pv_values.cache_info().currsize)"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        self.assertEqual(output, "[] False 0")
+
+        from PAdantic.models import PV
+
+        self.assertIs(PV.MagnetPV, PV.element_pv_model("MagnetPV"))
+        self.assertEqual(PV.MagnetPV.__module__, PV.__name__)
+        self.assertEqual(PV.PVTypes["Magnet"], "MagnetPV")
+
     def test_get_dipoles(self):
         dipoles = self.machine.get_dipoles()
         self.assertIsInstance(dipoles, list)